@@ -0,0 +1,125 @@
+import re
+import logging
+
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger('rfcrew.chunking')
+
+_HEADING_PATTERN = re.compile(r'^(#{1,6})\s+(.+?)\s*#*\s*$')
+_FENCE_PATTERN = re.compile(r'^\s*(```|~~~)[^`]*$')
+
+
+class Section(BaseModel):
+    title: str = Field(..., description='Heading of the section, empty for a preamble')
+    level: int = Field(..., description='Heading level (1-6), 0 for a preamble')
+    breadcrumb: list[str] = Field(
+        default_factory=list, description='Titles of the enclosing sections, outermost first'
+    )
+    text: str = Field(..., description='Markdown of the section, including its heading')
+
+
+class Chunk(BaseModel):
+    index: int = Field(..., description='Position of the chunk in the document')
+    titles: list[str] = Field(..., description='Breadcrumbed titles of the sections in the chunk')
+    text: str = Field(..., description='Markdown of the chunk')
+
+
+def split_sections(markdown: str) -> list[Section]:
+    """
+    Split markdown into sections at ATX headings, ignoring headings inside code fences.
+    """
+    sections: list[Section] = []
+    stack: list[tuple[int, str]] = []
+    title, level, lines = '', 0, []
+    in_fence = False
+
+    def _flush() -> None:
+        text = '\n'.join(lines).strip('\n')
+        if text.strip():
+            sections.append(
+                Section(
+                    title=title,
+                    level=level,
+                    breadcrumb=[t for lvl, t in stack if lvl < level],
+                    text=text,
+                )
+            )
+
+    for line in markdown.splitlines():
+        if _FENCE_PATTERN.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else _HEADING_PATTERN.match(line)
+        if match is None:
+            lines.append(line)
+            continue
+        _flush()
+        level, title, lines = len(match.group(1)), match.group(2), [line]
+        stack = [(lvl, t) for lvl, t in stack if lvl < level] + [(level, title)]
+    _flush()
+    return sections
+
+
+def _split_paragraphs(text: str, max_chars: int) -> list[str]:
+    """Split an oversized section at blank lines outside code fences."""
+    paragraphs: list[str] = []
+    current: list[str] = []
+    in_fence = False
+    for line in text.splitlines():
+        if _FENCE_PATTERN.match(line):
+            in_fence = not in_fence
+        if not line.strip() and not in_fence and current:
+            paragraphs.append('\n'.join(current))
+            current = []
+        else:
+            current.append(line)
+    if current:
+        paragraphs.append('\n'.join(current))
+
+    parts: list[str] = []
+    buffer = ''
+    for paragraph in paragraphs:
+        if buffer and len(buffer) + len(paragraph) + 2 > max_chars:
+            parts.append(buffer)
+            buffer = ''
+        buffer = f'{buffer}\n\n{paragraph}' if buffer else paragraph
+        # A single paragraph (e.g. a large table or code block) can exceed the limit;
+        # it is kept whole rather than cut mid-block.
+    if buffer:
+        parts.append(buffer)
+    return parts
+
+
+def chunk_markdown(markdown: str, max_chars: int = 8_000) -> list[Chunk]:
+    """
+    Split markdown into chunks of at most roughly `max_chars` characters along section
+    boundaries.
+
+    Adjacent small sections are merged into one chunk. Sections larger than `max_chars` are
+    split at paragraph boundaries, and every continuation is prefixed with the section's
+    breadcrumb so it can be understood on its own.
+    """
+    pieces: list[tuple[str, str]] = []
+    for section in split_sections(markdown):
+        label = ' > '.join([*section.breadcrumb, section.title]) if section.title else 'Preamble'
+        if len(section.text) <= max_chars:
+            pieces.append((label, section.text))
+            continue
+        for idx, part in enumerate(_split_paragraphs(section.text, max_chars)):
+            pieces.append((label, part if idx == 0 else f'*(continued: {label})*\n\n{part}'))
+
+    chunks: list[Chunk] = []
+    titles: list[str] = []
+    texts: list[str] = []
+    size = 0
+    for label, text in pieces:
+        if texts and size + len(text) + 2 > max_chars:
+            chunks.append(Chunk(index=len(chunks), titles=titles, text='\n\n'.join(texts)))
+            titles, texts, size = [], [], 0
+        if label not in titles:
+            titles.append(label)
+        texts.append(text)
+        size += len(text) + 2
+    if texts:
+        chunks.append(Chunk(index=len(chunks), titles=titles, text='\n\n'.join(texts)))
+    logger.debug(f'Split document of {len(markdown)} characters into {len(chunks)} chunks.')
+    return chunks
@@ -1,22 +1,36 @@
-import socket
+import json
+import time
 import logging
+import datetime as dt
 from typing import Annotated, cast
 import pathlib as plb
 
 from rich import print
+from rich.table import Table
 import typer
-import tenacity
 import coolname
 from pydantic import BaseModel, AfterValidator
 
-from rfcrew import __version__
+from rfcrew import __version__, log, tracing
+from rfcrew.telemetry import parse_endpoint
+from rfcrew.utils import clean_markdown, get_cache_directory
+from rfcrew.deadline import DeadlineExceeded, parse_duration
+from rfcrew.evaluation import EvalResultDiff, EvalStore, EvalSuite, run_suite
 from rfcrew.crews.assessor import ScoreAgentOutputModel
 from rfcrew.commands import (
     generate_rfc_from_notes,
     compare_documents,
     score_notes,
     convert_rfc_to_adr,
+    process_notes_batch,
+    generate_rfc_candidates,
+    RankedCandidate,
 )
+from rfcrew.flows import CandidateConfig
+from rfcrew.jobs import JobKind, JobQueue, JobStatus, Worker
+from rfcrew.planning import PlanCache
+from rfcrew.runs import Run, RunInputs, RunStore
+from rfcrew.watch import NotesWatcher, ScoreCache
 
 
 logger = logging.getLogger('rfcrew')
@@ -28,41 +42,18 @@ app = typer.Typer(
 )
 
 
-def _ping_oltp_endpoint(v: str | None) -> str | None:
+def _validate_otlp_endpoint(v: str | None) -> str | None:
+    # Only validate the format here. Reachability is checked in the background by the
+    # telemetry spool, so an unreachable collector never delays a command.
     if v is not None:
-        logger.info('Pinging OpenTelemetry endpoint...')
-    for attempt in tenacity.Retrying(
-        wait=tenacity.wait_exponential(multiplier=1, min=1, max=5),
-        stop=tenacity.stop_after_attempt(5),
-        retry=tenacity.retry_if_exception_type(ConnectionError),
-        reraise=True,
-    ):
-        with attempt:
-            logger.debug(
-                f'Attempting to ping OpenTelemetry endpoint (attempt {attempt.retry_state.attempt_number})...'
-            )
-            if v is None:
-                return None
-            else:
-                logger.debug(f'Checking OpenTelemetry endpoint: {v}')
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(3)
-                try:
-                    if v.startswith('http') or v.startswith('https'):
-                        v = v.replace('http://', '').replace('https://', '')
-                    address, port = v.rsplit(':')
-                    logger.debug(f'Parsed address: {address}, port: {port}')
-                    sock.connect((address, int(port)))
-                    logger.debug(f'Connected to OpenTelemetry endpoint: {v}')
-                    return v
-                except socket.error as e:
-                    raise ConnectionError(f'Could not connect to OpenTelemetry endpoint "{v}": {e}')
+        parse_endpoint(v)
+    return v
 
 
 class Common(BaseModel):
     verbose: bool
     output_directory: plb.Path
-    otlp_endpoint: Annotated[str | None, AfterValidator(_ping_oltp_endpoint)] = None
+    otlp_endpoint: Annotated[str | None, AfterValidator(_validate_otlp_endpoint)] = None
 
 
 @app.command(short_help='Displays the current version number of the rfcrew library')
@@ -85,18 +76,50 @@ def main(
     ] = plb.Path.cwd(),
     verbose: Annotated[bool, typer.Option(help='Enable debug logging.')] = False,
     otlp_endpoint: Annotated[str | None, typer.Option(help='OpenLit endpoint')] = None,
+    trace_file: Annotated[
+        plb.Path | None,
+        typer.Option(
+            help='Append spans to this JSON-lines file (view with `rfcrew trace`)',
+            dir_okay=False,
+            resolve_path=True,
+            envvar='RFCREW_TRACE_FILE',
+        ),
+    ] = None,
+    trace_console: Annotated[bool, typer.Option(help='Print spans to the console.')] = False,
+    log_file: Annotated[
+        plb.Path | None,
+        typer.Option(
+            help='Also write logs to this file (info and above, or everything with --verbose)',
+            dir_okay=False,
+            resolve_path=True,
+            envvar='RFCREW_LOG_FILE',
+        ),
+    ] = None,
+    log_json: Annotated[
+        bool, typer.Option(help='Write the log file as JSON lines.', envvar='RFCREW_LOG_JSON')
+    ] = False,
+    log_max_chars: Annotated[
+        int,
+        typer.Option(
+            help='Truncate log messages longer than this many characters',
+            min=100,
+            envvar='RFCREW_LOG_MAX_CHARS',
+        ),
+    ] = log.DEFAULT_MAX_CHARS,
 ):
-    if verbose:
-        logger.setLevel(logging.DEBUG)
-    if otlp_endpoint is not None:
-        import openlit
-
-        openlit.init(otlp_endpoint=otlp_endpoint)
+    log.configure_logging(
+        verbose=verbose, log_file=log_file, json_lines=log_json, max_chars=log_max_chars
+    )
+    tracing.init_tracing(otlp_endpoint=otlp_endpoint, trace_file=trace_file, console=trace_console)
     ctx.obj = Common(
         verbose=verbose, output_directory=output_directory, otlp_endpoint=otlp_endpoint
     )
 
 
+def _format_score(score: int) -> str:
+    return f'[red]{score}[/red]' if score < 6 else f'[green]{score}[/green]'
+
+
 @app.command(
     short_help='Score input notes and receive feedback on quality and completeness',
     no_args_is_help=True,
@@ -117,11 +140,78 @@ def score(
     logger.info(f'Scoring notes: {path_to_notes}')
     shared = cast(Common, ctx.obj)
     result = score_notes(path_to_notes=path_to_notes, otlp_endpoint=shared.otlp_endpoint)
-    _score = f'[red]{result.score}[/red]' if result.score < 6 else f'[green]{result.score}[/green]'
-    print(f'[bold]Score:[/bold] {_score}')
+    print(f'[bold]Score:[/bold] {_format_score(result.score)}')
     print(f'[bold]Feedback:[/bold] {result.justification}')
 
 
+@app.command(
+    short_help='Watch a directory of notes and re-score files whenever they are saved',
+    no_args_is_help=True,
+)
+def watch(
+    path_to_notes_directory: Annotated[
+        plb.Path,
+        typer.Argument(
+            help='Directory containing the notes files',
+            exists=True,
+            file_okay=False,
+            dir_okay=True,
+            resolve_path=True,
+        ),
+    ],
+    pattern: Annotated[str, typer.Option(help='Glob pattern of the notes files')] = '*.md',
+    debounce: Annotated[
+        int,
+        typer.Option(help='Wait until files were unchanged for this many milliseconds'),
+    ] = 500,
+    score_cache: Annotated[
+        plb.Path | None,
+        typer.Option(
+            help='Path to the SQLite database used to cache scores by notes content',
+            dir_okay=False,
+            resolve_path=True,
+            envvar='RFCREW_SCORE_CACHE',
+        ),
+    ] = None,
+):
+    watcher = NotesWatcher(
+        directory=path_to_notes_directory,
+        cache=ScoreCache(score_cache or get_cache_directory() / 'scores.db'),
+        pattern=pattern,
+    )
+    print(f'Watching {path_to_notes_directory} for changes to {pattern} (Ctrl+C to stop).')
+    try:
+        for notes_score in watcher.watch(debounce_ms=debounce):
+            timestamp = dt.datetime.now().strftime('%H:%M:%S')
+            name = notes_score.path.relative_to(path_to_notes_directory)
+            if notes_score.result is None:
+                print(f'[{timestamp}] [bold]{name}[/bold]: [red]error[/red] {notes_score.error}')
+                continue
+            source = 'cached' if notes_score.cached else f'{notes_score.latency:.1f}s'
+            print(
+                f'[{timestamp}] [bold]{name}[/bold]: {_format_score(notes_score.result.score)} '
+                f'({source})'
+            )
+            print(f'  {notes_score.result.justification}')
+    except KeyboardInterrupt:
+        print('Stopped watching.')
+
+
+_RunsDir = Annotated[
+    plb.Path | None,
+    typer.Option(
+        help='Directory of the run index and the RFCs and task outputs of all runs',
+        file_okay=False,
+        resolve_path=True,
+        envvar='RFCREW_RUNS_DIR',
+    ),
+]
+
+
+def _run_store(runs_dir: plb.Path | None) -> RunStore:
+    return RunStore(runs_dir or get_cache_directory() / 'runs')
+
+
 @app.command(short_help='Generate a request for comments (RFC) from notes.', no_args_is_help=True)
 def generate(
     ctx: typer.Context,
@@ -165,37 +255,284 @@ def generate(
             envvar='RFCREW_PLANNING_LLM',
         ),
     ] = None,
+    knowledge_base: Annotated[
+        bool,
+        typer.Option(
+            help='Reuse prior research reports from the local knowledge base and store new ones.',
+            envvar='RFCREW_KNOWLEDGE_BASE',
+        ),
+    ] = True,
+    candidates: Annotated[
+        int,
+        typer.Option(
+            help='Number of RFCs to generate concurrently. The best one is selected by a '
+            'ranking agent.',
+            min=1,
+        ),
+    ] = 1,
+    candidate_model: Annotated[
+        list[str] | None,
+        typer.Option(
+            help='LLM used by all agents of a candidate. Repeat to vary the model across '
+            'candidates (cycled if fewer than --candidates).',
+        ),
+    ] = None,
+    candidate_temperature: Annotated[
+        list[float] | None,
+        typer.Option(
+            help='Temperature of a candidate. Repeat to vary the temperature across candidates.',
+        ),
+    ] = None,
+    candidate_planning_llm: Annotated[
+        list[str] | None,
+        typer.Option(
+            help='Planning LLM of a candidate, or "none" to disable planning. Repeat to vary '
+            'planning across candidates (default: --planning-llm).',
+        ),
+    ] = None,
+    share_research: Annotated[
+        bool,
+        typer.Option(help='Run the research task once and share it between candidates.'),
+    ] = True,
+    parallel_drafting: Annotated[
+        bool,
+        typer.Option(
+            help='Draft the sections of the RFC template concurrently and stitch them together.',
+            envvar='RFCREW_PARALLEL_DRAFTING',
+        ),
+    ] = False,
+    patch_editor: Annotated[
+        bool,
+        typer.Option(
+            help='Let the editor return section edits that are applied to the draft instead of '
+            'rewriting the whole RFC. Falls back to a full rewrite if the edits are invalid.',
+            envvar='RFCREW_PATCH_EDITOR',
+        ),
+    ] = False,
+    reuse: Annotated[
+        bool,
+        typer.Option(
+            help='Return the RFC of an earlier run with the same notes and configuration instead '
+            'of generating a new one.',
+            envvar='RFCREW_REUSE_RUNS',
+        ),
+    ] = False,
+    runs_dir: _RunsDir = None,
+    deadline: Annotated[
+        str | None,
+        typer.Option(
+            help='Overall time limit, e.g. "10m". When it is near, optional stages (diagram, '
+            'reviews) are skipped and the best available draft is written.',
+            envvar='RFCREW_DEADLINE',
+        ),
+    ] = None,
+    task_timeout: Annotated[
+        str | None,
+        typer.Option(
+            help='Time limit of a single task, e.g. "3m". Tasks can override it with `timeout` '
+            '(in seconds) in the tasks configuration.',
+            envvar='RFCREW_TASK_TIMEOUT',
+        ),
+    ] = None,
+    plan_cache: Annotated[
+        bool,
+        typer.Option(
+            help='Reuse the task plans of earlier runs with the same tasks, agents and planning '
+            'LLM instead of planning again.',
+            envvar='RFCREW_PLAN_CACHE',
+        ),
+    ] = True,
+    plans_per_notes: Annotated[
+        bool,
+        typer.Option(
+            help='Plan with the notes filled in, and only reuse plans for the same notes.',
+            envvar='RFCREW_PLANS_PER_NOTES',
+        ),
+    ] = False,
 ):
     logger.info(f'Generating RFC from notes: {path_to_notes}')
-    _uid = coolname.generate_slug(2).replace('-', '_')
     shared = cast(Common, ctx.obj)
-    state, output = generate_rfc_from_notes(
-        path_to_notes=path_to_notes,
+    try:
+        deadline_seconds = parse_duration(deadline) if deadline else None
+        task_timeout_seconds = parse_duration(task_timeout) if task_timeout else None
+    except ValueError as e:
+        raise typer.BadParameter(str(e)) from e
+    if candidates > 1:
+        if deadline_seconds or task_timeout_seconds:
+            raise typer.BadParameter('--deadline and --task-timeout require a single candidate')
+        _generate_candidates(
+            shared=shared,
+            uid=coolname.generate_slug(2).replace('-', '_'),
+            path_to_notes=path_to_notes,
+            agents_config=agents_config,
+            tasks_config=tasks_config,
+            candidates=_candidate_configs(
+                candidates,
+                models=candidate_model or [],
+                temperatures=candidate_temperature or [],
+                planning_llms=candidate_planning_llm or [planning_llm or 'none'],
+            ),
+            share_research=share_research,
+            knowledge_base=knowledge_base,
+            parallel_drafting=parallel_drafting,
+            patch_editor=patch_editor,
+            plan_cache=plan_cache,
+        )
+        return
+    store = _run_store(runs_dir)
+    inputs = RunInputs(
+        notes=path_to_notes.read_text(),
+        notes_path=path_to_notes,
         agents_config=agents_config,
         tasks_config=tasks_config,
         planning_llm=planning_llm,
-        otlp_endpoint=shared.otlp_endpoint,
+        knowledge_base=knowledge_base,
+        parallel_drafting=parallel_drafting,
+        patch_editor=patch_editor,
+        plans_per_notes=plans_per_notes,
     )
-    if output is None:
-        print(
-            f'[bold]Score:[/bold] [red]{cast(ScoreAgentOutputModel, state.notes_feedback).score}[/red]'
+    run = store.lookup(inputs) if reuse else None
+    if run is not None:
+        logger.info(f'Reusing run {run.id} with identical notes and configuration.')
+    else:
+        start = time.perf_counter()
+        try:
+            state, output = generate_rfc_from_notes(
+                path_to_notes=path_to_notes,
+                agents_config=agents_config,
+                tasks_config=tasks_config,
+                planning_llm=planning_llm,
+                otlp_endpoint=shared.otlp_endpoint,
+                knowledge_base=get_cache_directory() / 'knowledge.db' if knowledge_base else None,
+                parallel_drafting=parallel_drafting,
+                patch_editor=patch_editor,
+                deadline=deadline_seconds,
+                task_timeout=task_timeout_seconds,
+                plan_cache=get_cache_directory() / 'plans.db' if plan_cache else None,
+                plans_per_notes=plans_per_notes,
+            )
+        except DeadlineExceeded as e:
+            run = store.record(
+                inputs,
+                notes_feedback=None,
+                output=None,
+                latency=time.perf_counter() - start,
+                failed=True,
+            )
+            for name, reason in e.skipped.items():
+                print(f'[yellow]Skipped {name}:[/yellow] {reason}')
+            print(f'[red]{e}[/red] No RFC was written (run {run.id}).')
+            raise typer.Exit(code=1) from e
+        run = store.record(
+            inputs,
+            notes_feedback=state.notes_feedback,
+            output=output,
+            latency=time.perf_counter() - start,
+            partial=bool(state.skipped_stages),
         )
-        print(
-            f'[bold]Feedback:[/bold] {cast(ScoreAgentOutputModel, state.notes_feedback).justification}'
+        for name, reason in state.skipped_stages.items():
+            print(f'[yellow]Skipped {name}:[/yellow] {reason}')
+    if run.rfc is None:
+        print(f'[bold]Score:[/bold] [red]{run.score}[/red]')
+        print(f'[bold]Feedback:[/bold] {run.justification}')
+    else:
+        path_to_rfc = shared.output_directory / f'rfc_{path_to_notes.stem}_{run.rfc[:8]}.md'
+        path_to_rfc.write_text(store.artifacts.get(run.rfc))
+        print(f'RFC of run {run.id} written to {path_to_rfc}')
+        logger.info('RFC generation complete.')
+
+
+def _candidate_configs(
+    n: int, models: list[str], temperatures: list[float], planning_llms: list[str]
+) -> list[CandidateConfig]:
+    configs = []
+    for idx in range(n):
+        planning_llm = planning_llms[idx % len(planning_llms)]
+        configs.append(
+            CandidateConfig(
+                name=f'candidate_{idx + 1}',
+                model=models[idx % len(models)] if models else None,
+                temperature=temperatures[idx % len(temperatures)] if temperatures else 0.2,
+                planning_llm=None if planning_llm.lower() == 'none' else planning_llm,
+            )
+        )
+    return configs
+
+
+def _ranking_report(ranking: list[RankedCandidate], uid: str) -> str:
+    report = ['# Candidate ranking', '']
+    report.append(
+        '| Rank | Candidate | Model | Temperature | Planning | Total | Tokens | Latency (s) |'
+    )
+    report.append('| --- | --- | --- | --- | --- | --- | --- | --- |')
+    for ranked in ranking:
+        config = ranked.candidate.config
+        report.append(
+            f'| {ranked.rank} | `rfc_{uid}_{config.name}.md` | {config.model or "default"} '
+            f'| {config.temperature} | {config.planning_llm or "-"} '
+            f'| {ranked.scores.total if ranked.scores else "-"} '
+            f'| {ranked.candidate.total_tokens or "-"} | {ranked.candidate.latency:.1f} |'
         )
+    for ranked in ranking:
+        report.append(f'\n## {ranked.rank}. {ranked.candidate.config.name}\n')
+        if ranked.candidate.error:
+            report.append(f'**Error:** {ranked.candidate.error}\n')
+        if ranked.scores:
+            report.append(
+                f'**Completeness:** {ranked.scores.completeness}, '
+                f'**Technical soundness:** {ranked.scores.technical_soundness}, '
+                f'**Clarity:** {ranked.scores.clarity}, '
+                f'**Actionability:** {ranked.scores.actionability}\n'
+            )
+            report.append(f'**Justification:** {ranked.scores.justification}\n')
+    return '\n'.join(report)
+
+
+def _generate_candidates(
+    shared: Common,
+    uid: str,
+    path_to_notes: plb.Path,
+    agents_config: plb.Path,
+    tasks_config: plb.Path,
+    candidates: list[CandidateConfig],
+    share_research: bool,
+    knowledge_base: bool,
+    parallel_drafting: bool,
+    patch_editor: bool,
+    plan_cache: bool,
+) -> None:
+    state, ranking = generate_rfc_candidates(
+        path_to_notes=path_to_notes,
+        agents_config=agents_config,
+        tasks_config=tasks_config,
+        candidates=candidates,
+        share_research=share_research,
+        otlp_endpoint=shared.otlp_endpoint,
+        knowledge_base=get_cache_directory() / 'knowledge.db' if knowledge_base else None,
+        parallel_drafting=parallel_drafting,
+        patch_editor=patch_editor,
+        plan_cache=get_cache_directory() / 'plans.db' if plan_cache else None,
+    )
+    if not ranking:
+        feedback = cast(ScoreAgentOutputModel, state.notes_feedback)
+        print(f'[bold]Score:[/bold] [red]{feedback.score}[/red]')
+        print(f'[bold]Feedback:[/bold] {feedback.justification}')
+        return
+    for ranked in ranking:
+        if ranked.candidate.rfc is not None:
+            path_to_rfc = shared.output_directory / f'rfc_{uid}_{ranked.candidate.config.name}.md'
+            with path_to_rfc.open('w') as f:
+                f.write(clean_markdown(ranked.candidate.rfc))
+    winner = ranking[0]
+    if winner.candidate.rfc is None:
+        print('[red]None of the candidates produced an RFC.[/red]')
     else:
-        if hasattr(output, 'raw'):
-            with (shared.output_directory / f'rfc_{_uid}.md').open('w') as generated_rfc:
-                raw_mkd: str = output.raw
-                # Post-process the raw markdown to remove code blocks
-                if raw_mkd.startswith('```markdown'):
-                    raw_mkd = raw_mkd.lstrip('```markdown').lstrip('\n')
-                if raw_mkd.endswith('```'):
-                    raw_mkd = raw_mkd.rstrip('```').rstrip('\n')
-                generated_rfc.write(raw_mkd)
-            logger.info('RFC generation complete.')
-        else:
-            print("Output does not have 'raw' attribute. Please check the output object.")
+        with (shared.output_directory / f'rfc_{uid}.md').open('w') as f:
+            f.write(clean_markdown(winner.candidate.rfc))
+        print(f'[bold]Selected:[/bold] {winner.candidate.config.name}')
+    with (shared.output_directory / f'rfc_{uid}_ranking.md').open('w') as f:
+        f.write(_ranking_report(ranking, uid))
+    logger.info('RFC candidate generation complete.')
 
 
 @app.command(short_help='Convert an RFC to an ADR', no_args_is_help=True)
@@ -221,11 +558,19 @@ def convert(
             resolve_path=True,
         ),
     ] = None,
+    map_reduce: Annotated[
+        bool | None,
+        typer.Option(
+            help='Process the document(s) section by section in parallel before the final step. '
+            'Defaults to on for long documents only.',
+        ),
+    ] = None,
 ):
     shared = cast(Common, ctx.obj)
     _output = convert_rfc_to_adr(
         path_to_rfc=path_to_rfc,
         otlp_endpoint=shared.otlp_endpoint,
+        map_reduce=map_reduce,
     )
     if path_to_adr is None:
         path_to_adr = path_to_rfc.parent / f'adr_{path_to_rfc.stem}.md'
@@ -263,6 +608,13 @@ def compare(
             resolve_path=True,
         ),
     ],
+    map_reduce: Annotated[
+        bool | None,
+        typer.Option(
+            help='Process the document(s) section by section in parallel before the final step. '
+            'Defaults to on for long documents only.',
+        ),
+    ] = None,
 ):
     logger.info(f'Evaluating RFC: {path_to_rfc} against ground truth: {path_to_ground_truth}')
     shared = cast(Common, ctx.obj)
@@ -270,6 +622,7 @@ def compare(
         path_to_ground_truth=path_to_ground_truth,
         path_to_rfc=path_to_rfc,
         otlp_endpoint=shared.otlp_endpoint,
+        map_reduce=map_reduce,
     )
     print('Evaluation results:')
     print('[bold]Score:[/bold] ', _output.score)
@@ -277,5 +630,482 @@ def compare(
     logger.info('RFC evaluation complete.')
 
 
+@app.command(
+    short_help='Score or generate RFCs for a directory of notes, skipping near-duplicates.',
+    no_args_is_help=True,
+)
+def batch(
+    ctx: typer.Context,
+    path_to_notes_directory: Annotated[
+        plb.Path,
+        typer.Argument(
+            help='Directory containing notes files',
+            exists=True,
+            file_okay=False,
+            dir_okay=True,
+            resolve_path=True,
+        ),
+    ],
+    pattern: Annotated[str, typer.Option(help='Glob pattern used to select notes files')] = '*.md',
+    similarity_threshold: Annotated[
+        float,
+        typer.Option(
+            help='Estimated Jaccard similarity above which notes are treated as near-duplicates',
+            min=0.0,
+            max=1.0,
+        ),
+    ] = 0.8,
+    generate: Annotated[
+        bool, typer.Option(help='Generate RFCs for the notes instead of only scoring them')
+    ] = False,
+    agents_config: Annotated[
+        plb.Path | None,
+        typer.Option(
+            help='Path to the agents configuration file',
+            exists=True,
+            file_okay=True,
+            dir_okay=False,
+            resolve_path=True,
+            envvar='RFCREW_AGENTS_CONFIG',
+        ),
+    ] = None,
+    tasks_config: Annotated[
+        plb.Path | None,
+        typer.Option(
+            help='Path to the tasks configuration file',
+            exists=True,
+            file_okay=True,
+            dir_okay=False,
+            resolve_path=True,
+            envvar='RFCREW_TASKS_CONFIG',
+        ),
+    ] = None,
+    planning_llm: Annotated[
+        str | None,
+        typer.Option(
+            help='LLM to use for planning if required. This should be a model in the gemini family.'
+            ' e.g. "gemini/gemini-2.5-flash-preview-04-17"',
+            envvar='RFCREW_PLANNING_LLM',
+        ),
+    ] = None,
+):
+    shared = cast(Common, ctx.obj)
+    if generate and (agents_config is None or tasks_config is None):
+        raise typer.BadParameter('--agents-config and --tasks-config are required with --generate')
+    paths_to_notes = sorted(path_to_notes_directory.glob(pattern))
+    logger.info(f'Processing {len(paths_to_notes)} notes files in {path_to_notes_directory}')
+    results = process_notes_batch(
+        paths_to_notes=paths_to_notes,
+        similarity_threshold=similarity_threshold,
+        generate=generate,
+        agents_config=agents_config,
+        tasks_config=tasks_config,
+        planning_llm=planning_llm,
+        otlp_endpoint=shared.otlp_endpoint,
+        knowledge_base=get_cache_directory() / 'knowledge.db' if generate else None,
+    )
+    report = ['# Batch report', '']
+    for result in results:
+        feedback = cast(ScoreAgentOutputModel, result.notes_feedback)
+        _score = (
+            f'[red]{feedback.score}[/red]'
+            if feedback.score < 6
+            else f'[green]{feedback.score}[/green]'
+        )
+        if result.is_duplicate:
+            print(
+                f'[bold]{result.path_to_notes.name}:[/bold] {_score} '
+                f'(reused from {result.representative.name}, similarity {result.similarity:.2f})'
+            )
+        else:
+            print(f'[bold]{result.path_to_notes.name}:[/bold] {_score}')
+        report.append(f'## {result.path_to_notes.name}\n')
+        report.append(f'**Score:** {feedback.score}\n')
+        report.append(f'**Feedback:** {feedback.justification}\n')
+        if result.rfc is not None and not result.is_duplicate:
+            path_to_rfc = shared.output_directory / f'rfc_{result.path_to_notes.stem}.md'
+            with path_to_rfc.open('w') as f:
+                f.write(clean_markdown(result.rfc))
+            report.append(f'**RFC:** `{path_to_rfc.name}`\n')
+        if result.is_duplicate:
+            report.append(
+                f'**Near-duplicate of:** `{result.representative.name}` '
+                f'(similarity {result.similarity:.2f}). Its result was reused.\n'
+            )
+            report.append(f'```diff\n{result.diff}```\n')
+    with (shared.output_directory / 'batch_report.md').open('w') as f:
+        f.write('\n'.join(report))
+    logger.info('Batch processing complete.')
+
+
+_QueueDb = Annotated[
+    plb.Path | None,
+    typer.Option(
+        help='SQLite database of the job queue. Put it on a shared filesystem to run workers '
+        'on several machines.',
+        dir_okay=False,
+        resolve_path=True,
+        envvar='RFCREW_QUEUE_DB',
+    ),
+]
+
+
+def _job_queue(queue_db: plb.Path | None, lease: float = 300.0) -> JobQueue:
+    return JobQueue(queue_db or get_cache_directory() / 'queue.db', lease_seconds=lease)
+
+
+@app.command(
+    short_help='Add score, generate or convert jobs to the queue processed by `rfcrew worker`.',
+    no_args_is_help=True,
+)
+def enqueue(
+    ctx: typer.Context,
+    kind: Annotated[JobKind, typer.Argument(help='Kind of job')],
+    paths: Annotated[
+        list[plb.Path],
+        typer.Argument(
+            help='Notes files (score, generate) or RFC files (convert). One job is added per file.',
+            exists=True,
+            file_okay=True,
+            dir_okay=False,
+            resolve_path=True,
+        ),
+    ],
+    agents_config: Annotated[
+        plb.Path | None,
+        typer.Option(
+            help='Path to the agents configuration file',
+            exists=True,
+            file_okay=True,
+            dir_okay=False,
+            resolve_path=True,
+            envvar='RFCREW_AGENTS_CONFIG',
+        ),
+    ] = None,
+    tasks_config: Annotated[
+        plb.Path | None,
+        typer.Option(
+            help='Path to the tasks configuration file',
+            exists=True,
+            file_okay=True,
+            dir_okay=False,
+            resolve_path=True,
+            envvar='RFCREW_TASKS_CONFIG',
+        ),
+    ] = None,
+    planning_llm: Annotated[
+        str | None,
+        typer.Option(
+            help='LLM to use for planning if required. This should be a model in the gemini family.'
+            ' e.g. "gemini/gemini-2.5-flash-preview-04-17"',
+            envvar='RFCREW_PLANNING_LLM',
+        ),
+    ] = None,
+    knowledge_base: Annotated[
+        bool,
+        typer.Option(
+            help="Use the worker's local knowledge base of prior research reports.",
+            envvar='RFCREW_KNOWLEDGE_BASE',
+        ),
+    ] = True,
+    max_attempts: Annotated[
+        int, typer.Option(help='Number of times a job is tried before it fails', min=1)
+    ] = 3,
+    queue_db: _QueueDb = None,
+):
+    shared = cast(Common, ctx.obj)
+    if kind == JobKind.generate and (agents_config is None or tasks_config is None):
+        raise typer.BadParameter('--agents-config and --tasks-config are required for generate')
+    queue = _job_queue(queue_db)
+    for path in paths:
+        if kind == JobKind.convert:
+            payload = {'path_to_rfc': str(path)}
+        elif kind == JobKind.score:
+            payload = {'path_to_notes': str(path)}
+        else:
+            payload = {
+                'path_to_notes': str(path),
+                'agents_config': str(agents_config),
+                'tasks_config': str(tasks_config),
+                'planning_llm': planning_llm,
+                'knowledge_base': knowledge_base,
+                'output_directory': str(shared.output_directory),
+            }
+        queue.enqueue(kind, payload, max_attempts=max_attempts)
+    print(f'Added {len(paths)} {kind.value} jobs to {queue.path}.')
+
+
+@app.command(short_help='Process jobs from the queue until stopped.')
+def worker(
+    queue_db: _QueueDb = None,
+    worker_id: Annotated[
+        str | None, typer.Option(help='Name of this worker (default: hostname and process id)')
+    ] = None,
+    poll_interval: Annotated[
+        float, typer.Option(help='Seconds to wait before polling an empty queue again', min=0.1)
+    ] = 5.0,
+    lease: Annotated[
+        float,
+        typer.Option(
+            help='Seconds after which the job of an unresponsive worker is handed to another',
+            min=1.0,
+        ),
+    ] = 300.0,
+    max_jobs: Annotated[
+        int | None, typer.Option(help='Stop after processing this many jobs', min=1)
+    ] = None,
+    burst: Annotated[
+        bool, typer.Option(help='Stop once the queue has no more jobs available')
+    ] = False,
+):
+    job_worker = Worker(
+        _job_queue(queue_db, lease=lease), worker_id=worker_id, poll_interval=poll_interval
+    )
+    try:
+        processed = job_worker.run(max_jobs=max_jobs, burst=burst)
+    except KeyboardInterrupt:
+        # The lease on an interrupted job expires, after which another worker retries it.
+        print('Stopped worker.')
+        return
+    print(f'Worker {job_worker.worker_id} processed {processed} jobs.')
+
+
+@app.command(short_help='Show the status of the jobs in the queue.')
+def jobs(
+    queue_db: _QueueDb = None,
+    status: Annotated[
+        JobStatus | None, typer.Option(help='Only list jobs with this status')
+    ] = None,
+    limit: Annotated[int, typer.Option(help='Maximum number of jobs to list', min=1)] = 50,
+):
+    queue = _job_queue(queue_db)
+    print(', '.join(f'[bold]{s.value}:[/bold] {n}' for s, n in queue.counts().items()))
+    table = Table()
+    for column in ('Job', 'Kind', 'Status', 'Attempts', 'Worker', 'Input', 'Result'):
+        table.add_column(column)
+    for job in queue.jobs(status=status, limit=limit):
+        table.add_row(
+            job.id[:8],
+            job.kind.value,
+            job.status.value,
+            f'{job.attempts}/{job.max_attempts}',
+            job.lease_owner or '-',
+            plb.Path(next(iter(job.payload.values()))).name,
+            f'[red]{job.error}[/red]'
+            if job.status == JobStatus.failed
+            else (json.dumps(job.result) if job.result else '-'),
+        )
+    print(table)
+
+
+def _format_delta(value: float | None, fmt: str, higher_is_better: bool) -> str:
+    if value is None or value == 0:
+        return ''
+    good = value > 0 if higher_is_better else value < 0
+    colour = 'green' if good else 'red'
+    return f' [{colour}]({value:+{fmt}})[/{colour}]'
+
+
+def _eval_table(run_id: str, diffs: list[EvalResultDiff]) -> Table:
+    table = Table(title=f'Evaluation run {run_id}')
+    for column in ('Case', 'Config', 'Score', 'Latency (s)', 'Tokens', 'Notes'):
+        table.add_column(column)
+    for diff in diffs:
+        result = diff.current
+        notes = []
+        if diff.previous is None:
+            notes.append('new')
+        elif diff.config_changed:
+            notes.append('config changed')
+        if result.error:
+            notes.append(f'[red]{result.error}[/red]')
+        table.add_row(
+            result.case_name,
+            result.config_name,
+            ('-' if result.score is None else str(result.score))
+            + _format_delta(diff.score_delta, 'd', higher_is_better=True),
+            f'{result.latency:.1f}'
+            + _format_delta(diff.latency_delta, '.1f', higher_is_better=False),
+            ('-' if result.total_tokens is None else str(result.total_tokens))
+            + _format_delta(diff.tokens_delta, 'd', higher_is_better=False),
+            ', '.join(notes),
+        )
+    return table
+
+
+@app.command(
+    name='eval',
+    short_help='Generate and score RFCs for an evaluation suite and compare with the last run.',
+    no_args_is_help=True,
+)
+def eval_(
+    ctx: typer.Context,
+    path_to_suite: Annotated[
+        plb.Path,
+        typer.Argument(
+            help='Path to a YAML suite definition with cases and configs',
+            exists=True,
+            file_okay=True,
+            dir_okay=False,
+            resolve_path=True,
+        ),
+    ],
+    max_workers: Annotated[
+        int, typer.Option(help='Number of case/config combinations to run concurrently', min=1)
+    ] = 4,
+    results_db: Annotated[
+        plb.Path | None,
+        typer.Option(
+            help='SQLite database holding the results of all evaluation runs',
+            dir_okay=False,
+            resolve_path=True,
+            envvar='RFCREW_EVAL_DB',
+        ),
+    ] = None,
+):
+    shared = cast(Common, ctx.obj)
+    suite = EvalSuite.from_yaml(path_to_suite)
+    store = EvalStore(results_db or get_cache_directory() / 'eval.db')
+    run_id, diffs = run_suite(
+        suite,
+        store=store,
+        output_directory=shared.output_directory / 'eval',
+        max_workers=max_workers,
+    )
+    print(_eval_table(run_id, diffs))
+    logger.info(f'Evaluation results stored in {store.path}')
+
+
+@app.command(short_help='Show spans from a trace file as a waterfall', no_args_is_help=True)
+def trace(
+    path_to_trace_file: Annotated[
+        plb.Path,
+        typer.Argument(
+            help='Path to a JSON-lines trace file written with --trace-file',
+            exists=True,
+            file_okay=True,
+            dir_okay=False,
+            resolve_path=True,
+        ),
+    ],
+    width: Annotated[int, typer.Option(help='Width of the waterfall bars')] = 40,
+):
+    for line in tracing.render_waterfall(tracing.read_spans(path_to_trace_file), width=width):
+        print(line)
+
+
+runs_app = typer.Typer(help='Inspect and export earlier RFC generation runs.', no_args_is_help=True)
+app.add_typer(runs_app, name='runs')
+
+
+def _get_run(store: RunStore, run_id: str) -> Run:
+    run = store.get(run_id)
+    if run is None:
+        raise typer.BadParameter(f'No unique run with id "{run_id}"')
+    return run
+
+
+@runs_app.command(name='list', short_help='List the latest runs.')
+def runs_list(
+    notes: Annotated[
+        plb.Path | None,
+        typer.Option(
+            help='Only list runs of notes with the same content as this file',
+            exists=True,
+            file_okay=True,
+            dir_okay=False,
+            resolve_path=True,
+        ),
+    ] = None,
+    limit: Annotated[int, typer.Option(help='Maximum number of runs to list', min=1)] = 20,
+    runs_dir: _RunsDir = None,
+):
+    table = Table()
+    for column in ('Run', 'Notes', 'Status', 'Score', 'Models', 'Latency (s)', 'Tokens'):
+        table.add_column(column)
+    for run in _run_store(runs_dir).latest(limit=limit, notes=notes.read_text() if notes else None):
+        table.add_row(
+            run.id,
+            run.notes_path.name,
+            run.status,
+            '-' if run.score is None else _format_score(run.score),
+            ', '.join(run.models),
+            f'{run.latency:.1f}',
+            '-' if run.total_tokens is None else str(run.total_tokens),
+        )
+    print(table)
+
+
+@runs_app.command(name='show', short_help='Show the inputs and outputs of a run.')
+def runs_show(
+    run_id: Annotated[str, typer.Argument(help='Id of the run, or a unique prefix of it')],
+    runs_dir: _RunsDir = None,
+):
+    run = _get_run(_run_store(runs_dir), run_id)
+    print(f'[bold]Run:[/bold] {run.id} ({run.created_at})')
+    print(f'[bold]Notes:[/bold] {run.notes_path} ({run.notes_hash[:12]})')
+    print(f'[bold]Config:[/bold] {run.config_hash[:12]}')
+    print(f'[bold]Models:[/bold] {", ".join(run.models)}')
+    print(f'[bold]Status:[/bold] {run.status}')
+    if run.score is not None:
+        print(f'[bold]Score:[/bold] {_format_score(run.score)}')
+        print(f'[bold]Feedback:[/bold] {run.justification}')
+    print(f'[bold]Latency:[/bold] {run.latency:.1f}s, [bold]tokens:[/bold] {run.total_tokens}')
+    for task in run.tasks:
+        print(f'  {task.task_name} ({task.agent}): {task.digest[:12]}')
+    if run.rfc:
+        print(f'[bold]RFC:[/bold] {run.rfc[:12]}')
+
+
+@runs_app.command(name='export', short_help='Write the RFC, task outputs and metadata of a run.')
+def runs_export(
+    ctx: typer.Context,
+    run_id: Annotated[str, typer.Argument(help='Id of the run, or a unique prefix of it')],
+    runs_dir: _RunsDir = None,
+):
+    shared = cast(Common, ctx.obj)
+    store = _run_store(runs_dir)
+    run = _get_run(store, run_id)
+    for path in store.export(run, shared.output_directory / f'run_{run.id}'):
+        print(path)
+
+
+plans_app = typer.Typer(help='Inspect and clear the cache of task plans.', no_args_is_help=True)
+app.add_typer(plans_app, name='plans')
+
+
+@plans_app.command(name='list', short_help='List the cached task plans.')
+def plans_list():
+    table = Table()
+    for column in ('Key', 'Planning LLM', 'Scope', 'Tasks', 'Created', 'Last used', 'Hits'):
+        table.add_column(column)
+    for entry in PlanCache(get_cache_directory() / 'plans.db').entries():
+        table.add_row(
+            entry.key[:12],
+            entry.planning_llm,
+            entry.scope,
+            str(len(entry.tasks)),
+            entry.created_at[:19],
+            entry.last_used_at[:19],
+            str(entry.hits),
+        )
+    print(table)
+
+
+@plans_app.command(name='clear', short_help='Remove cached task plans.')
+def plans_clear(
+    older_than: Annotated[
+        str | None,
+        typer.Option(help='Only remove plans created longer ago than this, e.g. "7d"'),
+    ] = None,
+):
+    try:
+        seconds = parse_duration(older_than) if older_than else None
+    except ValueError as e:
+        raise typer.BadParameter(str(e)) from e
+    removed = PlanCache(get_cache_directory() / 'plans.db').clear(older_than=seconds)
+    print(f'Removed {removed} cached plans.')
+
+
 def entrypoint():
     app()
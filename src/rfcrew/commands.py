@@ -1,38 +1,51 @@
 import logging
+import contextvars
 from typing import cast
 import pathlib as plb
+from concurrent.futures import ThreadPoolExecutor
 
+from pydantic import BaseModel, Field
 from crewai import CrewOutput
 
-from .flows import RFCFlow, RFCFlowState
+from . import tracing
+from .chunking import chunk_markdown
+from .llm import pool_stats
+from .dedupe import cluster_near_duplicates, diff_documents
+from .flows import Candidate, CandidateConfig, RFCFlow, RFCFlowState
 from .crews.evaluator import EvaluationAgent, EvaluationAgentModel
+from .crews.ranker import RankingAgent, RankingAgentModel
 from .crews.assessor import ScoreAgentOutputModel, ScoreAgent
 from .crews.converter import ConverterAgent
+from .crews.summarizer import SectionSummaryAgent
 
 logger = logging.getLogger('rfcrew.commands')
 
+# Documents longer than this are processed with map-reduce unless explicitly disabled.
+MAP_REDUCE_THRESHOLD = 24_000
+MAP_REDUCE_CHUNK_SIZE = 8_000
+NOTHING_RELEVANT = 'NOTHING_RELEVANT'
+SCORE_MODEL = 'gemini/gemini-2.5-flash-preview-04-17'
 
-def _configure_otlp_endpoint(v: str | None) -> None:
-    if v is not None:
-        import openlit
+ADR_EXTRACTION_PURPOSE = (
+    'writing an Architecture Decision Record. Extract the problem and context, the decision that '
+    'was accepted (if any), its impact on systems and people, and the consequences and trade-offs.'
+)
+COMPARISON_EXTRACTION_PURPOSE = (
+    'comparing the proposed solution with another document. Extract the solution itself: its '
+    'methodology, components and technologies, process steps, and expected outcomes.'
+)
 
-        openlit.init(otlp_endpoint=v)
 
+def _configure_otlp_endpoint(v: str | None) -> None:
+    tracing.init_tracing(otlp_endpoint=v)
 
-def score_notes(
-    path_to_notes: plb.Path,
-    otlp_endpoint: str | None = None,
-) -> ScoreAgentOutputModel:
+
+def score_text(notes: str) -> ScoreAgentOutputModel:
     """
-    Score the provided notes using the ScoreAgent.
+    Score the provided notes text using the ScoreAgent.
     """
-    _configure_otlp_endpoint(otlp_endpoint)
-    logger.info(f'Starting scoring of notes: {path_to_notes}')
-    with path_to_notes.open('r') as f:
-        notes = f.read()
-
     logger.debug('Initializing ScoreAgent')
-    agent = ScoreAgent(model='gemini/gemini-2.5-flash-preview-04-17')
+    agent = ScoreAgent(model=SCORE_MODEL)
 
     logger.debug('Executing ScoreAgent')
     result = agent.execute(
@@ -44,15 +57,45 @@ def score_notes(
     return cast(ScoreAgentOutputModel, result.pydantic)
 
 
+def score_notes(
+    path_to_notes: plb.Path,
+    otlp_endpoint: str | None = None,
+) -> ScoreAgentOutputModel:
+    """
+    Score the provided notes using the ScoreAgent.
+    """
+    _configure_otlp_endpoint(otlp_endpoint)
+    logger.info(f'Starting scoring of notes: {path_to_notes}')
+    with path_to_notes.open('r') as f:
+        notes = f.read()
+    return score_text(notes)
+
+
 def generate_rfc_from_notes(
     path_to_notes: plb.Path,
     agents_config: plb.Path,
     tasks_config: plb.Path,
     planning_llm: str | None = None,
     otlp_endpoint: str | None = None,
+    knowledge_base: plb.Path | None = None,
+    parallel_drafting: bool = False,
+    patch_editor: bool = False,
+    deadline: float | None = None,
+    task_timeout: float | None = None,
+    plan_cache: plb.Path | None = None,
+    plans_per_notes: bool = False,
 ) -> tuple[RFCFlowState, None | CrewOutput]:
     """
     Generate an RFC from the provided notes.
+
+    If `knowledge_base` is given, prior research reports stored there are handed to the
+    research task, and the new research report is added to it afterwards. With
+    `parallel_drafting`, the sections of the RFC are drafted concurrently and then stitched.
+    With `patch_editor`, the editor returns section edits that are applied to the draft.
+    With a `deadline` or `task_timeout` (in seconds), tasks that run too long are cancelled,
+    optional tasks are skipped, and the best available draft is returned; the skipped tasks
+    are listed in `state.skipped_stages`. With a `planning_llm`, the task plans are reused
+    from `plan_cache` if given; with `plans_per_notes`, plans are only reused for the same notes.
     """
     _configure_otlp_endpoint(otlp_endpoint)
     logger.info(f'Starting RFC generation from notes: {path_to_notes}')
@@ -62,23 +105,180 @@ def generate_rfc_from_notes(
     logger.debug('Initializing RFCFlow')
     flow = RFCFlow()
     logger.debug('Kicking off RFCFlow')
-    result = flow.kickoff(
-        inputs={
-            'notes': notes.rstrip(),
-            'agents_config_path': agents_config,
-            'tasks_config_path': tasks_config,
-            'planning_llm': planning_llm,
-        }
-    )
+    with tracing.span('generate_rfc_from_notes'):
+        result = flow.kickoff(
+            inputs={
+                'notes': notes.rstrip(),
+                'agents_config_path': agents_config,
+                'tasks_config_path': tasks_config,
+                'planning_llm': planning_llm,
+                'knowledge_base_path': knowledge_base,
+                'parallel_drafting': parallel_drafting,
+                'patch_editor': patch_editor,
+                'deadline': deadline,
+                'task_timeout': task_timeout,
+                'plan_cache_path': plan_cache,
+                'plans_per_notes': plans_per_notes,
+            }
+        )
     logger.info('RFC generation completed successfully.')
+    logger.debug('LLM pool statistics: %s', pool_stats())
     return flow.state, result
 
 
+class RankedCandidate(BaseModel):
+    rank: int = Field(..., description='Position in the ranking, starting at 1')
+    candidate: Candidate
+    scores: RankingAgentModel | None = Field(
+        default=None, description='Rubric scores, None if the candidate could not be graded'
+    )
+
+
+def _grade_candidate(notes: str, candidate: Candidate) -> RankingAgentModel | None:
+    if candidate.rfc is None:
+        return None
+    agent = RankingAgent(model='gemini/gemini-2.5-flash-preview-04-17')
+    try:
+        result = agent.execute({'notes': notes, 'rfc': candidate.rfc})
+    except Exception:
+        logger.exception(f'Grading of candidate "{candidate.config.name}" failed.')
+        return None
+    return cast(RankingAgentModel, result.pydantic)
+
+
+def rank_candidates(notes: str, candidates: list[Candidate]) -> list[RankedCandidate]:
+    """
+    Grade all candidates against a rubric in parallel and rank them by total score.
+
+    Ties are broken in favour of the candidate that used fewer tokens.
+    """
+    with ThreadPoolExecutor(max_workers=max(len(candidates), 1)) as executor:
+        futures = [
+            executor.submit(contextvars.copy_context().run, _grade_candidate, notes, candidate)
+            for candidate in candidates
+        ]
+        graded = [(candidate, future.result()) for candidate, future in zip(candidates, futures)]
+    graded.sort(
+        key=lambda item: (
+            -(item[1].total if item[1] else -1),
+            item[0].total_tokens if item[0].total_tokens is not None else float('inf'),
+        )
+    )
+    return [
+        RankedCandidate(rank=rank, candidate=candidate, scores=scores)
+        for rank, (candidate, scores) in enumerate(graded, start=1)
+    ]
+
+
+def generate_rfc_candidates(
+    path_to_notes: plb.Path,
+    agents_config: plb.Path,
+    tasks_config: plb.Path,
+    candidates: list[CandidateConfig],
+    share_research: bool = True,
+    otlp_endpoint: str | None = None,
+    knowledge_base: plb.Path | None = None,
+    parallel_drafting: bool = False,
+    patch_editor: bool = False,
+    plan_cache: plb.Path | None = None,
+) -> tuple[RFCFlowState, list[RankedCandidate]]:
+    """
+    Generate one RFC per candidate config concurrently and rank the drafts.
+
+    The notes are scored once and, if `share_research` is set, the research task runs once
+    and its report is handed to every candidate. Task plans are reused from `plan_cache` if
+    given. Returns an empty ranking if the notes are not good enough to generate an RFC.
+    """
+    _configure_otlp_endpoint(otlp_endpoint)
+    logger.info(f'Starting generation of {len(candidates)} candidate RFCs from: {path_to_notes}')
+    with path_to_notes.open('r') as f:
+        notes = f.read().rstrip()
+
+    flow = RFCFlow()
+    with tracing.span('generate_rfc_candidates'):
+        result = flow.kickoff(
+            inputs={
+                'notes': notes,
+                'agents_config_path': agents_config,
+                'tasks_config_path': tasks_config,
+                'knowledge_base_path': knowledge_base,
+                'candidates': candidates,
+                'share_research': share_research,
+                'parallel_drafting': parallel_drafting,
+                'patch_editor': patch_editor,
+                'plan_cache_path': plan_cache,
+            }
+        )
+        if result is None:
+            return flow.state, []
+        ranking = rank_candidates(notes, cast(list[Candidate], result))
+    logger.info(f'Ranked {len(ranking)} candidates; winner: {ranking[0].candidate.config.name}')
+    return flow.state, ranking
+
+
+def _use_map_reduce(documents: list[str], map_reduce: bool | None) -> bool:
+    if map_reduce is None:
+        return any(len(document) > MAP_REDUCE_THRESHOLD for document in documents)
+    return map_reduce
+
+
+def _extract_chunk(purpose: str, position: str, sections: str, section: str) -> str:
+    agent = SectionSummaryAgent(model='gemini/gemini-2.5-flash-preview-04-17')
+    result = agent.execute(
+        {'purpose': purpose, 'position': position, 'sections': sections, 'section': section}
+    )
+    return result.raw.strip()
+
+
+def map_documents(
+    documents: list[str], purpose: str, max_chunk_chars: int = MAP_REDUCE_CHUNK_SIZE
+) -> list[str]:
+    """
+    Condense documents by extracting what is relevant to `purpose` from each of their
+    markdown sections in parallel.
+
+    All chunks of all documents are processed concurrently, so latency depends on the size
+    of the largest chunk rather than on the size of the documents. Chunks without relevant
+    information are dropped.
+    """
+    chunked = [chunk_markdown(document, max_chars=max_chunk_chars) for document in documents]
+    logger.info(f'Mapping {sum(len(c) for c in chunked)} chunks from {len(documents)} documents.')
+    jobs = [
+        (doc_idx, chunk, len(chunks)) for doc_idx, chunks in enumerate(chunked) for chunk in chunks
+    ]
+    with tracing.span('map_documents', **{'rfcrew.map.chunks': len(jobs)}):
+        with ThreadPoolExecutor(max_workers=max(min(len(jobs), 16), 1)) as executor:
+            futures = [
+                executor.submit(
+                    contextvars.copy_context().run,
+                    _extract_chunk,
+                    purpose,
+                    f'part {chunk.index + 1} of {total}',
+                    '; '.join(chunk.titles),
+                    chunk.text,
+                )
+                for _, chunk, total in jobs
+            ]
+            extracts = [future.result() for future in futures]
+    condensed: list[list[str]] = [[] for _ in documents]
+    for (doc_idx, chunk, _), extract in zip(jobs, extracts):
+        if extract and NOTHING_RELEVANT not in extract:
+            condensed[doc_idx].append(f'### Part {chunk.index + 1}: {chunk.titles[0]}\n\n{extract}')
+    return ['\n\n'.join(parts) for parts in condensed]
+
+
 def compare_documents(
     path_to_rfc: plb.Path,
     path_to_ground_truth: plb.Path,
     otlp_endpoint: str | None = None,
+    map_reduce: bool | None = None,
 ) -> EvaluationAgentModel:
+    """
+    Compare the solutions described in two documents.
+
+    With `map_reduce` (by default only for long documents), both documents are first
+    condensed section by section in parallel, and the condensed versions are compared.
+    """
     _configure_otlp_endpoint(otlp_endpoint)
     logger.info(
         f'Starting evaluation of RFC: {path_to_rfc} against ground truth: {path_to_ground_truth}'
@@ -93,6 +293,11 @@ def compare_documents(
     with path_to_ground_truth.open('r') as f:
         ground_truth_doc = f.read()
 
+    if _use_map_reduce([rfc_doc, ground_truth_doc], map_reduce):
+        rfc_doc, ground_truth_doc = map_documents(
+            [rfc_doc, ground_truth_doc], purpose=COMPARISON_EXTRACTION_PURPOSE
+        )
+
     logger.debug('Executing evaluation agent')
     result = agent.execute({'document_1': rfc_doc, 'document_2': ground_truth_doc})
     logger.info('RFC evaluation completed successfully.')
@@ -102,7 +307,14 @@ def compare_documents(
 def convert_rfc_to_adr(
     path_to_rfc: plb.Path,
     otlp_endpoint: str | None = None,
+    map_reduce: bool | None = None,
 ) -> str:
+    """
+    Convert an RFC to an ADR.
+
+    With `map_reduce` (by default only for long RFCs), the information needed for the ADR
+    is first extracted from the RFC section by section in parallel.
+    """
     _configure_otlp_endpoint(otlp_endpoint)
     logger.info(f'Converting RFC: {path_to_rfc}')
     logger.debug('Initializing EvaluationAgent')
@@ -112,7 +324,107 @@ def convert_rfc_to_adr(
     with path_to_rfc.open('r') as f:
         rfc_doc = f.read()
 
+    if _use_map_reduce([rfc_doc], map_reduce):
+        (rfc_doc,) = map_documents([rfc_doc], purpose=ADR_EXTRACTION_PURPOSE)
+
     logger.debug('Executing converter agent')
     result = agent.execute({'RFC_content': rfc_doc})
     logger.info('RFC evaluation completed successfully.')
     return result.raw
+
+
+class BatchNotesResult(BaseModel):
+    path_to_notes: plb.Path = Field(..., description='Path to the notes file')
+    representative: plb.Path = Field(
+        ..., description='Notes file whose result is used (the file itself if not a duplicate)'
+    )
+    similarity: float = Field(
+        default=1.0, description='Estimated similarity to the representative notes'
+    )
+    notes_feedback: ScoreAgentOutputModel | None = Field(
+        default=None, description='Score and feedback for the (representative) notes'
+    )
+    rfc: str | None = Field(default=None, description='Generated RFC, if generation was requested')
+    diff: str | None = Field(
+        default=None, description='Unified diff between the representative and these notes'
+    )
+
+    @property
+    def is_duplicate(self) -> bool:
+        return self.path_to_notes != self.representative
+
+
+def process_notes_batch(
+    paths_to_notes: list[plb.Path],
+    similarity_threshold: float = 0.8,
+    generate: bool = False,
+    agents_config: plb.Path | None = None,
+    tasks_config: plb.Path | None = None,
+    planning_llm: str | None = None,
+    otlp_endpoint: str | None = None,
+    knowledge_base: plb.Path | None = None,
+) -> list[BatchNotesResult]:
+    """
+    Score (and optionally generate RFCs for) a batch of notes, processing near-duplicate
+    notes only once.
+
+    Notes are clustered with MinHash/LSH. Only the representative of each cluster is
+    scored or run through the RFC flow; the other members reuse its result together with
+    a diff describing how they differ from the representative.
+    """
+    if generate and (agents_config is None or tasks_config is None):
+        raise ValueError('agents_config and tasks_config are required to generate RFCs.')
+    documents = {}
+    for path in paths_to_notes:
+        with path.open('r') as f:
+            documents[path] = f.read().rstrip()
+    clusters = cluster_near_duplicates(documents, threshold=similarity_threshold)
+    logger.info(
+        f'Processing {len(clusters)} representative notes out of {len(paths_to_notes)} files.'
+    )
+
+    results = []
+    for cluster in clusters:
+        rfc = None
+        if generate:
+            state, output = generate_rfc_from_notes(
+                path_to_notes=cluster.representative,
+                agents_config=cast(plb.Path, agents_config),
+                tasks_config=cast(plb.Path, tasks_config),
+                planning_llm=planning_llm,
+                otlp_endpoint=otlp_endpoint,
+                knowledge_base=knowledge_base,
+            )
+            feedback = state.notes_feedback
+            rfc = output.raw if output is not None else None
+        else:
+            feedback = score_notes(
+                path_to_notes=cluster.representative, otlp_endpoint=otlp_endpoint
+            )
+        results.append(
+            BatchNotesResult(
+                path_to_notes=cluster.representative,
+                representative=cluster.representative,
+                notes_feedback=feedback,
+                rfc=rfc,
+            )
+        )
+        for member in cluster.members:
+            logger.debug(f'Reusing result of {cluster.representative} for {member}')
+            results.append(
+                BatchNotesResult(
+                    path_to_notes=member,
+                    representative=cluster.representative,
+                    similarity=cluster.similarities[member],
+                    notes_feedback=feedback,
+                    rfc=rfc,
+                    diff=diff_documents(
+                        documents[cluster.representative],
+                        documents[member],
+                        from_name=cluster.representative.name,
+                        to_name=member.name,
+                    ),
+                )
+            )
+    logger.debug('LLM pool statistics: %s', pool_stats())
+    return results
@@ -6,6 +6,7 @@ from crewai import Agent, Task, Crew, Process, TaskOutput
 from crewai.tools import BaseTool
 from crewai_tools import SerperDevTool, ScrapeWebsiteTool, WebsiteSearchTool
 
+from rfcrew.log import Preview
 from rfcrew.utils import read_yaml
 
 logger = logging.getLogger('rfcrew.crew')
@@ -36,8 +37,8 @@ def get_tools() -> dict[str, BaseTool]:
 
 
 def post_output_callback(output: TaskOutput):
-    logger.debug(f'Finished task for agent "{output.agent}".')
-    logger.debug(f'Output: {output.raw}')
+    logger.debug('Finished task for agent "%s".', output.agent)
+    logger.debug('Output: %s', Preview(output.raw))
 
 
 class RFCrew:
@@ -12,6 +12,8 @@ class ScoreAgentOutputModel(BaseModel):
 
 
 class ScoreAgent(BaseAgent):
+    output_model = ScoreAgentOutputModel
+
     @property
     def _agent(self) -> Agent:
         return Agent(
@@ -59,5 +61,4 @@ class ScoreAgent(BaseAgent):
                 '1. `score`: An integer (1-10) representing the overall readiness and quality of the input notes for RFC generation.\n'
                 '2. `justification`: A string explaining the reasoning behind the assigned score, highlighting strengths and weaknesses based on the evaluation criteria.'
             ),
-            output_pydantic=ScoreAgentOutputModel,
         )
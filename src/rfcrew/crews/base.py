@@ -1,20 +1,86 @@
-import logging
+import re
 import os
+import json
+import logging
+import threading
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, cast
+
+from crewai import CrewOutput, Agent, Task, Crew
+from pydantic import BaseModel, Field, ValidationError
 
-from crewai import LLM, CrewOutput, Agent, Task, Crew
+from rfcrew import tracing
+from rfcrew.log import Preview
+from rfcrew.llm import get_llm
 
 logger = logging.getLogger('rfcrew.crews.base')
 
+_FENCE_PATTERN = re.compile(r'^```(?:json)?\s*|\s*```$')
+
+REPAIR_PROMPT = (
+    'The following output does not match the required JSON schema.\n\n'
+    'Error: {error}\n\nJSON schema:\n{schema}\n\nOutput:\n{output}\n\n'
+    'Return only the corrected JSON object that matches the schema. Keep the content of the '
+    'output unchanged as far as possible.'
+)
+
+
+class StructuredOutputError(ValueError):
+    """Raised when an agent's output does not match its output model, even after a repair."""
+
+
+class StructuredOutputStats(BaseModel):
+    outputs: int = Field(default=0, description='Structured outputs received')
+    parsed: int = Field(default=0, description='Outputs that parsed on the first attempt')
+    repaired: int = Field(default=0, description='Outputs that parsed after the repair call')
+    failed: int = Field(default=0, description='Outputs that could not be parsed at all')
+
+    @property
+    def repair_calls(self) -> int:
+        """Number of extra LLM calls spent on repairing outputs."""
+        return self.repaired + self.failed
+
+
+_stats_lock = threading.Lock()
+_stats = StructuredOutputStats()
+
+
+def structured_output_stats() -> StructuredOutputStats:
+    """Return a snapshot of the structured output parse statistics of this process."""
+    with _stats_lock:
+        return _stats.model_copy()
+
+
+def _count(outcome: str) -> None:
+    with _stats_lock:
+        _stats.outputs += 1
+        setattr(_stats, outcome, getattr(_stats, outcome) + 1)
+
+
+def parse_structured_output(raw: Any, model: type[BaseModel]) -> BaseModel:
+    """Strictly parse an LLM output into `model`. Raises a `ValidationError` on mismatch."""
+    if isinstance(raw, BaseModel):
+        raw = raw.model_dump_json()
+    return model.model_validate_json(_FENCE_PATTERN.sub('', str(raw).strip()), strict=True)
+
 
 class BaseAgent(ABC):
+    # Set to request provider-native JSON-schema output that is parsed locally, instead of
+    # letting crewai convert free-text output to a model with additional LLM calls.
+    output_model: type[BaseModel] | None = None
+
     def __init__(self, model: str):
         self._model = model
 
     @property
     def _llm(self):
-        return LLM(model=self._model, temperature=0.2, api_key=os.environ.get('GOOGLE_API_KEY'))
+        kwargs = {'response_format': self.output_model} if self.output_model else {}
+        return get_llm(
+            model=self._model,
+            temperature=0.2,
+            api_key=os.environ.get('GOOGLE_API_KEY'),
+            **kwargs,
+        )
 
     @property
     @abstractmethod
@@ -28,14 +94,54 @@ class BaseAgent(ABC):
     def _crew(self) -> Crew:
         return Crew(agents=[self._agent], tasks=[self._task])
 
+    def _parse_output(self, raw: Any) -> tuple[BaseModel, str]:
+        """Parse the output into the output model, with a single repair call on failure."""
+        model = cast(type[BaseModel], self.output_model)
+        try:
+            parsed = parse_structured_output(raw, model)
+            _count('parsed')
+            return parsed, 'parsed'
+        except ValidationError as e:
+            logger.warning('%s output does not match schema: %s', self.__class__.__name__, e)
+            error = str(e)
+        repaired = self._llm.call(
+            [
+                {
+                    'role': 'user',
+                    'content': REPAIR_PROMPT.format(
+                        error=error,
+                        schema=json.dumps(model.model_json_schema()),
+                        output=raw,
+                    ),
+                }
+            ]
+        )
+        try:
+            parsed = parse_structured_output(repaired, model)
+            _count('repaired')
+            return parsed, 'repaired'
+        except ValidationError as e:
+            _count('failed')
+            raise StructuredOutputError(
+                f'{self.__class__.__name__} output does not match {model.__name__} after '
+                f'repair: {e}'
+            ) from e
+
     def execute(self, inputs: dict[str, Any]) -> CrewOutput:
         logger.info(
-            f'Starting {self.__class__} execution with inputs: {list(inputs.keys())}'
+            'Starting %s execution with inputs: %s', self.__class__.__name__, list(inputs)
         )  # Log only keys for brevity
         logger.debug('Kicking off crew')
-        output = self._crew.kickoff(
-            inputs=inputs,
-        )
-        logger.info(f'Agent "{self.__class__}" execution completed successfully.')
-        logger.debug(f'{self.__class__} raw output: {output}')  # Add debug log for raw output
+        with tracing.span(
+            f'{self.__class__.__name__}.execute', **{tracing.ATTR_MODEL: self._model}
+        ) as span:
+            output = self._crew.kickoff(
+                inputs=inputs,
+            )
+            tracing.record_token_usage(span, output.token_usage)
+            if self.output_model is not None:
+                output.pydantic, outcome = self._parse_output(output.raw)
+                span.set_attribute(tracing.ATTR_STRUCTURED_OUTPUT, outcome)
+        logger.info('Agent "%s" execution completed successfully.', self.__class__.__name__)
+        logger.debug('%s raw output: %s', self.__class__.__name__, Preview(output))
         return output
@@ -0,0 +1,182 @@
+import re
+import ast
+import operator
+from typing import Any, Callable
+
+from rfcrew.chunking import split_sections
+from rfcrew.crews.editing import DIAGRAM_SECTION
+
+# Variables that `run_if` conditions can use. Notes variables are known before the crew
+# starts; draft variables once the `rfc_author` task is done.
+NOTES_VARIABLES = {
+    'notes_score': 'Score of the notes (1-10)',
+    'notes_words': 'Number of words in the notes',
+}
+DRAFT_VARIABLES = {
+    'draft_words': 'Number of words in the draft RFC',
+    'draft_components': 'Number of named components in the design section of the draft',
+}
+
+_COMPARISONS: dict[type, Callable[[Any, Any], bool]] = {
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+}
+_LIST_ITEM_PATTERN = re.compile(r'^(?P<indent>[ \t]*)(?:[-*+]|\d+[.)])[ \t]+(?P<text>\S.*)$')
+_FENCE_PATTERN = re.compile(r'^\s*(```|~~~)')
+# Names that start a list item: `**Name**`, `` `name` `` or a short `Name:` label.
+_LABEL_PATTERN = re.compile(
+    r'^(?:\*\*(?P<bold>[^*]+)\*\*|`(?P<code>[^`]+)`|(?P<plain>[^:*`]+):(?:\s|$))'
+)
+# Bold names in prose, e.g. `the **Ingestion service** writes to **BigQuery**`. Bold words that
+# do not start with a capital letter are emphasis rather than names.
+_BOLD_NAME_PATTERN = re.compile(r'\*\*(?P<name>[A-Z][^*]*)\*\*')
+# List items of at most this many words are names (e.g. `- Ingestion service`); longer items
+# are sentences or steps and only name a component with a label.
+_MAX_NAME_WORDS = 5
+
+
+class ConditionError(ValueError):
+    """Raised if a `run_if` condition is not a valid expression."""
+
+
+class Condition:
+    """
+    A `run_if` condition of a task, e.g. `draft_components >= 2 or notes_words > 500`.
+
+    Conditions compare variables with numbers, and can be combined with `and`, `or`, `not`
+    and parentheses. They are parsed into a Python expression tree but never passed to
+    `eval`, so only these constructs are allowed.
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        try:
+            self._tree = ast.parse(expression.strip(), mode='eval').body
+        except SyntaxError as e:
+            raise ConditionError(f'Invalid condition "{expression}": {e.msg}') from e
+        self.variables: set[str] = set()
+        self._check(self._tree)
+
+    def _check(self, node: ast.AST) -> None:
+        if isinstance(node, ast.BoolOp):
+            for value in node.values:
+                self._check(value)
+        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            self._check(node.operand)
+        elif isinstance(node, ast.Compare):
+            if not all(type(op) in _COMPARISONS for op in node.ops):
+                raise ConditionError(f'Unsupported comparison in condition "{self.expression}"')
+            for operand in [node.left, *node.comparators]:
+                self._check_operand(operand)
+        else:
+            raise ConditionError(
+                f'Condition "{self.expression}" must compare variables with numbers, '
+                'e.g. "notes_words > 500"'
+            )
+
+    def _check_operand(self, node: ast.AST) -> None:
+        if isinstance(node, ast.Name):
+            if node.id not in NOTES_VARIABLES and node.id not in DRAFT_VARIABLES:
+                known = ', '.join([*NOTES_VARIABLES, *DRAFT_VARIABLES])
+                raise ConditionError(f'Unknown variable "{node.id}" in condition, use: {known}')
+            self.variables.add(node.id)
+        elif not isinstance(node, ast.Constant) or not isinstance(node.value, (int, float)):
+            raise ConditionError(f'Only variables and numbers can be compared: {self.expression}')
+
+    @property
+    def needs_draft(self) -> bool:
+        return any(variable in DRAFT_VARIABLES for variable in self.variables)
+
+    def evaluate(self, facts: dict[str, float]) -> bool:
+        return bool(self._evaluate(self._tree, facts))
+
+    def _evaluate(self, node: ast.AST, facts: dict[str, float]) -> Any:
+        if isinstance(node, ast.BoolOp):
+            values = (self._evaluate(value, facts) for value in node.values)
+            return all(values) if isinstance(node.op, ast.And) else any(values)
+        if isinstance(node, ast.UnaryOp):
+            return not self._evaluate(node.operand, facts)
+        if isinstance(node, ast.Compare):
+            left = self._evaluate(node.left, facts)
+            for op, comparator in zip(node.ops, node.comparators):
+                right = self._evaluate(comparator, facts)
+                if not _COMPARISONS[type(op)](left, right):
+                    return False
+                left = right
+            return True
+        if isinstance(node, ast.Name):
+            return facts[node.id]
+        return float(node.value)  # type: ignore[attr-defined]
+
+    def __repr__(self) -> str:
+        return f'Condition({self.expression!r})'
+
+
+def notes_facts(notes: str, score: int | None) -> dict[str, float]:
+    facts = {'notes_words': float(len(notes.split()))}
+    if score is not None:
+        facts['notes_score'] = float(score)
+    return facts
+
+
+def _component_name(item: str) -> str | None:
+    """Return the name of the component that a list item describes, if any."""
+    label = _LABEL_PATTERN.match(item)
+    if label is not None:
+        name = label['bold'] or label['code'] or label['plain']
+    else:
+        name = item
+    if len(name.split()) > _MAX_NAME_WORDS:
+        return None
+    return name.strip(' .:').casefold()
+
+
+def count_components(draft: str, section: str = DIAGRAM_SECTION) -> int:
+    """
+    Count the named components in the design section of a draft: its direct subsections or, if
+    it has none, the distinct names of its top-level list items and the bold names in its prose.
+
+    Prose without named components (e.g. a short design of a few sentences) counts 0.
+    """
+    sections = split_sections(draft)
+    design = next((s for s in sections if section.casefold() in s.title.casefold()), None)
+    if design is None:
+        return 0
+    subsections = [
+        s for s in sections if s.level == design.level + 1 and design.title in s.breadcrumb
+    ]
+    if subsections:
+        return len(subsections)
+    names: set[str] = set()
+    items: list[tuple[int, str]] = []
+    in_fence = False
+    for line in design.text.splitlines():
+        if _FENCE_PATTERN.match(line):
+            in_fence = not in_fence
+            continue
+        if in_fence:
+            continue
+        item = _LIST_ITEM_PATTERN.match(line)
+        if item is not None:
+            items.append((len(item['indent']), item['text'].strip()))
+        names.update(
+            match['name'].strip(' .:').casefold() for match in _BOLD_NAME_PATTERN.finditer(line)
+        )
+    if items:
+        indent = min(indent for indent, _ in items)
+        for level, text in items:
+            name = _component_name(text) if level == indent else None
+            if name:
+                names.add(name)
+    return len(names)
+
+
+def draft_facts(draft: str) -> dict[str, float]:
+    return {
+        'draft_words': float(len(draft.split())),
+        'draft_components': float(count_components(draft)),
+    }
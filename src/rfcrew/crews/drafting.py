@@ -0,0 +1,118 @@
+import re
+import logging
+
+from crewai import Agent, Task
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger('rfcrew.crews.drafting')
+
+AUTHOR_TASK = 'rfc_author'
+
+_SECTION_PATTERN = re.compile(r'(?:^|(?<=\s))## (?P<title>[^\n]+?)\s+---')
+_INLINE_CODE_PATTERN = re.compile(r'```[^`]*```')
+
+
+class TemplateSection(BaseModel):
+    title: str = Field(..., description='Heading of the section, without the leading `## `')
+    template: str = Field(..., description='Template of the section, including its heading')
+
+    @property
+    def slug(self) -> str:
+        return re.sub(r'[^a-z0-9]+', '_', self.title.lower()).strip('_')
+
+
+def template_sections(expected_output: str) -> list[TemplateSection]:
+    """
+    Return the `## ` sections of the RFC template in a task's expected output.
+
+    Sections without any guidance text (e.g. the table of contents, which only holds a
+    literal code block) are not returned since there is nothing to draft for them.
+    """
+    matches = list(_SECTION_PATTERN.finditer(expected_output))
+    sections = []
+    for match, following in zip(matches, [*matches[1:], None]):
+        end = following.start() if following else len(expected_output)
+        template = expected_output[match.start() : end].strip()
+        if template.count('```') % 2:
+            # The last section also holds the fence that closes the template.
+            template = re.sub(r'\s*```\s*$', '', template)
+        body = template[match.end() - match.start() :]
+        if not re.search(r'[A-Za-z]', _INLINE_CODE_PATTERN.sub('', body)):
+            continue
+        sections.append(TemplateSection(title=match.group('title').strip(), template=template))
+    return sections
+
+
+def _section_task(task: Task, agent: Agent, section: TemplateSection) -> Task:
+    return Task(
+        name=f'{task.name}:{section.slug}',
+        agent=agent,
+        description=f'{task.description}\n\n'
+        '**Scope of this job:** The RFC is drafted section by section, in parallel, by several '
+        f'authors working from the same research. You write ONLY the section `## {section.title}`. '
+        'Do not write any other section, even if the instructions above mention it. Another '
+        'author will assemble and harmonise all sections afterwards.',
+        expected_output='Only the markdown of the section, starting with its heading and following '
+        f'this template:\n\n{section.template}',
+        context=task.context,
+        async_execution=True,
+    )
+
+
+def _stitch_task(task: Task, section_tasks: list[Task]) -> Task:
+    return Task(
+        name=task.name,
+        agent=task.agent,
+        description='The sections of the RFC have been drafted independently and in parallel by '
+        'several authors from the same research (see context). Assemble them into a single RFC '
+        'that follows the template in the expected output exactly, in template order.\n\n'
+        '1. Keep all substantive content of the section drafts; do not summarise them.\n'
+        '2. Harmonise terminology, option names and component names across sections.\n'
+        '3. Remove duplication and resolve contradictions between sections, preferring the '
+        'content of `The Actual Design` and the research report.\n'
+        '4. Make sure the TL;DR and the final decision are consistent with the design.\n'
+        '5. Add the template sections that were not drafted (such as the table of contents) '
+        'literally as specified.\n\n'
+        f'**Original drafting brief, for reference:**\n\n{task.description}',
+        expected_output=task.expected_output,
+        context=[*(task.context if isinstance(task.context, list) else []), *section_tasks],
+        async_execution=False,
+    )
+
+
+def split_task_into_sections(
+    tasks: dict[str, Task], agents: dict[str, Agent], task_name: str = AUTHOR_TASK
+) -> tuple[dict[str, Task], dict[str, Agent]]:
+    """
+    Replace a task that writes a templated document with one asynchronous task per template
+    section and a stitching task.
+
+    The section tasks run concurrently, each with its own copy of the task's agent. The
+    stitching task keeps the original task name, so tasks that use the original task as
+    context receive the stitched document.
+    """
+    task = tasks[task_name]
+    sections = template_sections(task.expected_output)
+    if len(sections) < 2:
+        logger.warning(f'Task "{task_name}" has fewer than two template sections; not splitting.')
+        return tasks, agents
+    agent_name = next(name for name, agent in agents.items() if agent is task.agent)
+    agent = agents[agent_name]
+    section_agents = {f'{agent_name}:{s.slug}': agent.copy() for s in sections}
+    section_tasks = [
+        _section_task(task, agent, section)
+        for agent, section in zip(section_agents.values(), sections)
+    ]
+    stitch = _stitch_task(task, section_tasks)
+    logger.info(f'Split task "{task_name}" into {len(section_tasks)} parallel section tasks.')
+
+    new_tasks = {}
+    for name, other in tasks.items():
+        if name == task_name:
+            new_tasks.update({t.name: t for t in section_tasks})
+            new_tasks[name] = stitch
+            continue
+        if isinstance(other.context, list) and any(c is task for c in other.context):
+            other.context = [stitch if c is task else c for c in other.context]
+        new_tasks[name] = other
+    return new_tasks, {**agents, **section_agents}
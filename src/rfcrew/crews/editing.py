@@ -0,0 +1,228 @@
+import re
+import logging
+from typing import Literal
+
+from crewai import Task
+from crewai.tasks.task_output import TaskOutput
+from pydantic import BaseModel, Field, ValidationError
+
+from rfcrew.chunking import split_sections
+
+logger = logging.getLogger('rfcrew.crews.editing')
+
+EDITOR_TASK = 'editor'
+DIAGRAM_TASK = 'technical_diagram_illustrator'
+DIAGRAM_SECTION = 'The Actual Design'
+
+_RULE_PATTERN = re.compile(r'^\s*(-{3,}|\*{3,}|_{3,})\s*$')
+_HEADING_PATTERN = re.compile(r'^(#{1,6})\s+(.+?)\s*#*\s*$')
+_MERMAID_PATTERN = re.compile(r'```mermaid\s.*?```', re.DOTALL)
+
+
+class PatchError(ValueError):
+    """Raised when an editor patch cannot be applied to a draft."""
+
+
+class SectionEdit(BaseModel):
+    section: str = Field(
+        ..., description='Heading of the section in the draft, without the leading #'
+    )
+    operation: Literal['replace', 'append', 'insert_after', 'delete'] = Field(
+        ...,
+        description='`replace` the section content, `append` to it, `insert_after` a new '
+        'section after it, or `delete` it',
+    )
+    content: str = Field(
+        default='',
+        description='Markdown to use. Without the section heading for `replace` and `append`; '
+        'starting with a heading for `insert_after`; empty for `delete`',
+    )
+
+
+class EditorPatch(BaseModel):
+    title: str | None = Field(
+        default=None, description='Title of the RFC, added as the top-level heading'
+    )
+    edits: list[SectionEdit] = Field(
+        default_factory=list, description='Edits to apply to the draft, in document order'
+    )
+
+
+PATCH_INSTRUCTIONS = """
+
+**Output format (overrides step 9 above):** Do NOT reproduce the revised document. The draft from
+the `rfc_author` task is revised locally by applying your edits, so return only the changes as an
+`EditorPatch` object:
+*   `title`: The title of the RFC.
+*   `edits`: A list of section edits. `section` must be the exact heading text of a section in
+the draft (without the leading `#`). `operation` is one of `replace` (the `content` replaces the
+section body below the heading, including its subsections), `append` (the `content` is added at the
+end of the section), `insert_after` (the `content` is a new section, starting with its own heading,
+placed after the section), or `delete`.
+*   Only include sections that actually change. Unchanged sections must not be listed.
+*   Never include a heading of the same or a higher level than the edited section in `content` for
+`replace` and `append`.
+*   Do not include the Mermaid diagram; it is inserted into the design section automatically.
+"""
+
+PATCH_EXPECTED_OUTPUT = (
+    "An 'EditorPatch' object with the RFC `title` and a list of section-addressed `edits` that "
+    'integrate the reviewer feedback, flag conflicting feedback, and fix clarity, consistency and '
+    'formatting issues in the draft. Unchanged sections are not listed.'
+)
+
+
+def _normalise(title: str) -> str:
+    return ' '.join(re.sub(r'[^\w\s]', ' ', title).casefold().split())
+
+
+def _split_head(text: str) -> tuple[str, str]:
+    """Split a section into its heading (plus a horizontal rule right below it) and body."""
+    lines = text.split('\n')
+    head_length = 2 if len(lines) > 1 and _RULE_PATTERN.match(lines[1]) else 1
+    return '\n'.join(lines[:head_length]), '\n'.join(lines[head_length:]).strip('\n')
+
+
+def _check_content(edit: SectionEdit, level: int) -> str:
+    content = edit.content.strip('\n')
+    lines = content.split('\n')
+    heading = _HEADING_PATTERN.match(lines[0]) if lines else None
+    if heading and _normalise(heading.group(2)) == _normalise(edit.section):
+        # The heading of the edited section itself is repeated often; drop it.
+        content = '\n'.join(lines[1:]).strip('\n')
+        if content and _RULE_PATTERN.match(content.split('\n')[0]):
+            content = content.split('\n', 1)[1].strip('\n') if '\n' in content else ''
+    for line in content.split('\n'):
+        match = _HEADING_PATTERN.match(line)
+        if match and len(match.group(1)) <= level:
+            raise PatchError(
+                f'Edit of "{edit.section}" contains heading "{line.strip()}" that would change the '
+                'structure of the document.'
+            )
+    return content
+
+
+def _existing(value: str | None) -> str:
+    if value is None:
+        raise PatchError('Edit addresses a section that was removed by another edit.')
+    return value
+
+
+def apply_patch(document: str, patch: EditorPatch) -> str:
+    """
+    Apply section-addressed edits to a markdown document.
+
+    A section spans its heading up to the next heading of the same or a higher level. Edits
+    that address unknown sections, overlap with other edits, or would change the heading
+    structure raise a `PatchError`.
+    """
+    sections = split_sections(document)
+    parts: list[str | None] = [s.text for s in sections]
+    spans = []
+    for idx, section in enumerate(sections):
+        end = idx + 1
+        if section.level > 1:
+            while end < len(sections) and not (0 < sections[end].level <= section.level):
+                end += 1
+        spans.append(range(idx, end))
+    index: dict[str, int] = {}
+    for idx, section in enumerate(sections):
+        if section.title:
+            index.setdefault(_normalise(section.title), idx)
+
+    edited: set[int] = set()
+    inserts: dict[int, list[str]] = {}
+    for edit in patch.edits:
+        idx = index.get(_normalise(edit.section))
+        if idx is None:
+            raise PatchError(f'Edit addresses unknown section "{edit.section}".')
+        span = spans[idx]
+        if edit.operation == 'insert_after':
+            new_section = edit.content.strip('\n')
+            match = _HEADING_PATTERN.match(new_section.split('\n')[0])
+            if match is None:
+                raise PatchError(f'Section inserted after "{edit.section}" has no heading.')
+            inserts.setdefault(span[-1], []).append(new_section)
+            continue
+        if edited.intersection(span):
+            raise PatchError(f'Edit of "{edit.section}" overlaps with another edit.')
+        edited.update(span)
+        if edit.operation == 'delete':
+            for i in span:
+                parts[i] = None
+            continue
+        content = _check_content(edit, sections[idx].level)
+        if edit.operation == 'replace':
+            head, _ = _split_head(_existing(parts[idx]))
+            parts[idx] = f'{head}\n{content}' if content else head
+            for i in span[1:]:
+                parts[i] = None
+        else:
+            last = span[-1]
+            parts[last] = f'{_existing(parts[last]).rstrip()}\n\n{content}'
+
+    output = []
+    for idx, part in enumerate(parts):
+        if part is not None:
+            output.append(part)
+        output.extend(inserts.get(idx, []))
+    result = '\n\n'.join(output)
+    if patch.title:
+        result = _set_title(result, patch.title)
+    logger.info(f'Applied {len(patch.edits)} editor edits to draft of {len(document)} characters.')
+    return result + '\n'
+
+
+def _set_title(document: str, title: str) -> str:
+    lines = document.split('\n')
+    for idx, line in enumerate(lines):
+        match = _HEADING_PATTERN.match(line)
+        if match and len(match.group(1)) == 1:
+            lines[idx] = f'# {title.strip()}'
+            return '\n'.join(lines)
+    return f'# {title.strip()}\n\n{document}'
+
+
+def insert_diagram(document: str, diagram_output: str, section: str = DIAGRAM_SECTION) -> str:
+    """
+    Append the Mermaid diagram from the illustrator's output to the design section, unless
+    the document already contains a Mermaid diagram.
+    """
+    diagram = _MERMAID_PATTERN.search(diagram_output)
+    if diagram is None or _MERMAID_PATTERN.search(document):
+        return document
+    try:
+        return apply_patch(
+            document,
+            EditorPatch(
+                edits=[SectionEdit(section=section, operation='append', content=diagram.group(0))]
+            ),
+        )
+    except PatchError:
+        logger.warning(f'Section "{section}" not found; adding the diagram at the end.')
+        return f'{document.rstrip()}\n\n{diagram.group(0)}\n'
+
+
+def parse_patch(output: TaskOutput) -> EditorPatch:
+    """Return the editor patch from a task output, parsing the raw output if required."""
+    if isinstance(output.pydantic, EditorPatch):
+        return output.pydantic
+    raw = output.raw.strip()
+    raw = re.sub(r'^```(?:json)?\s*|\s*```$', '', raw)
+    try:
+        return EditorPatch.model_validate_json(raw)
+    except ValidationError as e:
+        raise PatchError(f'Editor output is not a valid patch: {e}') from e
+
+
+def to_patch_task(task: Task) -> Task:
+    """Turn the editor task into one that returns section edits instead of a full document."""
+    return Task(
+        name=task.name,
+        agent=task.agent,
+        description=f'{task.description}{PATCH_INSTRUCTIONS}',
+        expected_output=PATCH_EXPECTED_OUTPUT,
+        context=task.context,
+        async_execution=task.async_execution,
+        output_pydantic=EditorPatch,
+    )
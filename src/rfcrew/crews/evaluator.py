@@ -10,6 +10,8 @@ class EvaluationAgentModel(BaseModel):
 
 
 class EvaluationAgent(BaseAgent):
+    output_model = EvaluationAgentModel
+
     @property
     def _agent(self) -> Agent:
         return Agent(
@@ -44,5 +46,4 @@ class EvaluationAgent(BaseAgent):
                 '2. `justification`: A string explaining the reasoning behind the assigned score, highlighting strengths and weaknesses '
                 'based on the evaluation criteria. Also explain how the two solutions differ.'
             ),
-            output_pydantic=EvaluationAgentModel,
         )
@@ -0,0 +1,56 @@
+from pydantic import BaseModel, Field
+from crewai import Agent, Task
+
+from .base import BaseAgent
+
+
+class RankingAgentModel(BaseModel):
+    completeness: int = Field(
+        ..., description='Score from 1 to 10 for how completely the RFC covers the notes'
+    )
+    technical_soundness: int = Field(
+        ..., description='Score from 1 to 10 for the correctness and feasibility of the design'
+    )
+    clarity: int = Field(..., description='Score from 1 to 10 for structure and readability')
+    actionability: int = Field(
+        ..., description='Score from 1 to 10 for how well reviewers can act on the RFC'
+    )
+    justification: str = Field(..., description='Justification for the scores')
+
+    @property
+    def total(self) -> int:
+        return self.completeness + self.technical_soundness + self.clarity + self.actionability
+
+
+class RankingAgent(BaseAgent):
+    @property
+    def _agent(self) -> Agent:
+        return Agent(
+            role='RFC Review Board Chair',
+            goal='To grade draft RFCs consistently against a fixed rubric so the strongest draft can be selected',
+            backstory='You have chaired architecture review boards for years and have read hundreds of RFCs. You grade '
+            'each draft on its own merits against the rubric, independent of length or formatting polish, and you '
+            'are strict about proposals that drift away from the problem described in the original notes.',
+            llm=self._llm,
+        )
+
+    @property
+    def _task(self) -> Task:
+        return Task(
+            agent=self._agent,
+            description='Grade the draft RFC below against the notes it was written from. Score each rubric '
+            'criterion on a scale of 1 to 10:\n'
+            '1. `completeness`: Does the RFC address every requirement, constraint and question in the notes?\n'
+            '2. `technical_soundness`: Is the proposed solution correct, feasible and are trade-offs discussed?\n'
+            '3. `clarity`: Is the RFC well structured, concise and easy to follow?\n'
+            '4. `actionability`: Could reviewers approve or reject the RFC and could engineers start on it?'
+            '\n\nNotes: {notes}'
+            '\n---'
+            '\n\nDraft RFC: {rfc}',
+            expected_output=(
+                "A 'RankingAgentModel' object containing an integer score (1-10) for each of `completeness`, "
+                '`technical_soundness`, `clarity` and `actionability`, and a `justification` string explaining '
+                'the scores with concrete strengths and weaknesses of the draft.'
+            ),
+            output_pydantic=RankingAgentModel,
+        )
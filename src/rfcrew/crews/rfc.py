@@ -1,38 +1,71 @@
 import os
+import math
+import time
 import logging
+import threading
+import contextvars
 import pathlib as plb
-from typing import Any
+from typing import Any, Callable, cast
 
-from crewai import Agent, Task, Crew, Process, LLM
+from crewai import Agent, Task, Crew, CrewOutput, Process
+from crewai.tasks.task_output import TaskOutput
 from crewai.tools import BaseTool
-from crewai_tools import SerperDevTool, ScrapeWebsiteTool, WebsiteSearchTool
+from crewai.types.usage_metrics import UsageMetrics
+from crewai_tools import SerperDevTool
 
-from rfcrew.utils import read_yaml
+from rfcrew import tracing
+from rfcrew.deadline import Deadline, DeadlineExceeded
+from rfcrew.llm import get_llm
+from rfcrew.utils import get_cache_directory, read_yaml
+from rfcrew.mermaid import MermaidGuardrail
+from rfcrew.planning import PlanCache, create_plans, plan_key
+from rfcrew.scraping import RelevantScrapeWebsiteTool
+from rfcrew.website_index import (
+    DEFAULT_EMBEDDING_MODEL,
+    CachedWebsiteSearchTool,
+    Embedder,
+    WebsiteIndex,
+)
+from rfcrew.crews.conditions import Condition, ConditionError, draft_facts
+from rfcrew.crews.drafting import AUTHOR_TASK, split_task_into_sections
+from rfcrew.crews.editing import (
+    DIAGRAM_TASK,
+    EDITOR_TASK,
+    PatchError,
+    apply_patch,
+    insert_diagram,
+    parse_patch,
+    to_patch_task,
+)
 
 logger = logging.getLogger('rfcrew.crews.rfc')
 
+GUARDRAILS = {'mermaid': MermaidGuardrail}
 
-def get_tools() -> dict[str, BaseTool]:
+SKIPPED_OUTPUT = 'This stage was skipped because {reason}. Proceed without its output.'
+SKIPPED_NOTE = (
+    '> **Note:** This RFC was generated under a deadline. The following stages were skipped, '
+    'so their feedback is not reflected in the document:'
+)
+
+
+def get_tools(notes: str | None = None) -> dict[str, BaseTool]:
+    """
+    Initialize the tools available to agents. Scraped pages are reduced to the passages
+    most relevant to the agent's query, or to the `notes` if the agent does not pass one.
+    Website searches use a persistent local embedding index; set `RFCREW_EMBEDDING_MODEL`
+    to use another (e.g. local) embedding model.
+    """
     logger.info('Initializing tools...')
     tools = {
         'serper_dev_tool': SerperDevTool(),
-        'scrape_website_tool': ScrapeWebsiteTool(),
-        'website_search_tool': WebsiteSearchTool(
-            config=dict(
-                llm=dict(
-                    provider='google',  # or google, openai, anthropic, llama2, ...
-                    config=dict(
-                        model='gemini-2.5-flash-preview-04-17',
-                        api_key=os.environ.get('GOOGLE_API_KEY'),
-                    ),
-                ),
-                embedder=dict(
-                    provider='google',  # or openai, ollama, ...
-                    config=dict(
-                        model='models/embedding-004',
-                        task_type='retrieval_document',
-                        # google_api_key=os.environ.get('GOOGLE_API_KEY'),
-                    ),
+        'scrape_website_tool': RelevantScrapeWebsiteTool(default_query=notes),
+        'website_search_tool': CachedWebsiteSearchTool(
+            index=WebsiteIndex(
+                get_cache_directory() / 'website_index.db',
+                embedder=Embedder(
+                    model=os.environ.get('RFCREW_EMBEDDING_MODEL', DEFAULT_EMBEDDING_MODEL),
+                    api_key=os.environ.get('GOOGLE_API_KEY'),
                 ),
             )
         ),
@@ -42,6 +75,18 @@ def get_tools() -> dict[str, BaseTool]:
     return tools
 
 
+def _planning_llm(model: str) -> Any:
+    return get_llm(
+        model=model,
+        temperature=0.2,
+        # Apparently, we need to specify `google_api_key` here as well
+        #  ...
+        # How on earth does this work?
+        api_key=os.environ.get('GOOGLE_API_KEY'),
+        google_api_key=os.environ.get('GOOGLE_API_KEY'),
+    )
+
+
 class RFCrew:
     def __init__(
         self,
@@ -49,15 +94,32 @@ class RFCrew:
         agents: dict[str, Any],
         tools: dict[str, BaseTool],
         verbose: bool = False,
+        rewrite_editor: Task | None = None,
+        optional: set[str] | None = None,
+        timeouts: dict[str, float] | None = None,
+        conditions: dict[str, Condition] | None = None,
     ):
         self.tasks = tasks
         self.agents = agents
         self.tools = tools
         self.verbose = verbose
+        # Set in patch mode: the original editor task, used if the patch cannot be applied.
+        self.rewrite_editor = rewrite_editor
+        # Tasks that are skipped when a deadline is near, and per-task timeouts in seconds.
+        self.optional = optional or set()
+        self.timeouts = timeouts or {}
+        self.skipped: dict[str, str] = {}
+        self._cancelled: set[str] = set()
+        # `run_if` conditions of tasks, and the tasks they removed.
+        self.conditions = conditions or {}
+        self.pruned: dict[str, str] = {}
 
     @staticmethod
     def _parse_agent_config(
-        agents_config: dict[str, Any], tools: dict[str, BaseTool]
+        agents_config: dict[str, Any],
+        tools: dict[str, BaseTool],
+        model: str | None = None,
+        temperature: float = 0.2,
     ) -> dict[str, Agent]:
         logger.info(f'Parsing {len(agents_config)} agent configurations.')
         agents = {}
@@ -67,8 +129,10 @@ class RFCrew:
                 agent_tools_config = agent_config.pop('tools', [])
                 _tools = [tools[tool_name.strip()] for tool_name in agent_tools_config]
                 llm_config = agent_config.pop('llm')
-                _llm = LLM(
-                    model=llm_config, temperature=0.2, api_key=os.environ.get('GOOGLE_API_KEY')
+                _llm = get_llm(
+                    model=model or llm_config,
+                    temperature=temperature,
+                    api_key=os.environ.get('GOOGLE_API_KEY'),
                 )
                 agents[agent_name] = Agent(**agent_config, tools=_tools, llm=_llm)
             logger.info(f'Successfully parsed {len(agents)} agents.')
@@ -96,7 +160,15 @@ class RFCrew:
                 _agent = agents[agent_name]
                 context_tasks = task_config.pop('context', [])
                 _context = [tasks[context_task_name.strip()] for context_task_name in context_tasks]
-                tasks[task_name] = Task(agent=_agent, context=_context, **task_config)
+                guardrail = task_config.get('guardrail')
+                if isinstance(guardrail, str) and guardrail.strip() in GUARDRAILS:
+                    # Named local guardrails; any other string is an LLM guardrail in crewai.
+                    task_config['guardrail'] = GUARDRAILS[guardrail.strip()](
+                        max_retries=task_config.get('max_retries', 3)
+                    )
+                tasks[task_name] = Task(
+                    name=task_name, agent=_agent, context=_context, **task_config
+                )
             logger.info(f'Successfully parsed {len(tasks)} tasks.')
             logger.debug(f'Parsed tasks: {list(tasks.keys())}')
             return tasks
@@ -109,43 +181,402 @@ class RFCrew:
 
     @classmethod
     def from_config(
-        cls, agents_config_path: plb.Path, tasks_config_path: plb.Path, tools: dict[str, BaseTool]
+        cls,
+        agents_config_path: plb.Path,
+        tasks_config_path: plb.Path,
+        tools: dict[str, BaseTool],
+        model: str | None = None,
+        temperature: float = 0.2,
+        parallel_drafting: bool = False,
+        patch_editor: bool = False,
     ) -> 'RFCrew':
+        """
+        Create an RFCrew from config files. `model` overrides the LLM of every agent.
+
+        With `parallel_drafting`, the sections of the RFC template are drafted concurrently
+        and stitched together by the `rfc_author` task. With `patch_editor`, the editor
+        returns section edits that are applied to the draft (see `finalize`) instead of
+        rewriting the whole RFC.
+        """
         logger.info(
             f'Creating RFCrew from config files: agents="{agents_config_path}", tasks="{tasks_config_path}"'
         )
         logger.debug(f'Reading agent config from: {agents_config_path}')
         agents_config = read_yaml(agents_config_path)
-        agents = cls._parse_agent_config(agents_config=agents_config, tools=tools)
+        agents = cls._parse_agent_config(
+            agents_config=agents_config, tools=tools, model=model, temperature=temperature
+        )
 
         logger.debug(f'Reading task config from: {tasks_config_path}')
         tasks_config = read_yaml(tasks_config_path)
+        optional = {name for name, config in tasks_config.items() if config.pop('optional', False)}
+        timeouts = {
+            name: float(config.pop('timeout'))
+            for name, config in tasks_config.items()
+            if 'timeout' in config
+        }
+        conditions = {
+            name: Condition(config.pop('run_if'))
+            for name, config in tasks_config.items()
+            if 'run_if' in config
+        }
+        names = list(tasks_config)
+        for name, condition in conditions.items():
+            if condition.needs_draft and (
+                AUTHOR_TASK not in names or names.index(name) < names.index(AUTHOR_TASK)
+            ):
+                raise ConditionError(
+                    f'The condition of task "{name}" uses the draft, so the task must come after '
+                    f'"{AUTHOR_TASK}".'
+                )
         tasks = cls._parse_task_config(tasks_config=tasks_config, agents=agents)
+        if parallel_drafting:
+            tasks, agents = split_task_into_sections(tasks, agents)
+        rewrite_editor = None
+        if patch_editor and EDITOR_TASK in tasks:
+            rewrite_editor = tasks[EDITOR_TASK]
+            tasks[EDITOR_TASK] = to_patch_task(rewrite_editor)
 
         logger.info('RFCrew created successfully from config.')
-        return cls(agents=agents, tasks=tasks, tools=tools)
+        return cls(
+            agents=agents,
+            tasks=tasks,
+            tools=tools,
+            rewrite_editor=rewrite_editor,
+            optional=optional,
+            timeouts=timeouts,
+            conditions=conditions,
+        )
 
-    def crew(self, planning_llm: str | None = None) -> Crew:
+    def crew(self, planning_llm: str | None = None, task_names: list[str] | None = None) -> Crew:
+        """
+        Create the crew. If `task_names` is given, only those tasks are run; context tasks
+        outside the selection must already have an output.
+        """
         logger.info(
             f'Creating Crew with planning={True if planning_llm else False}, planning_llm={planning_llm}'
         )
+        tasks = [
+            task for name, task in self.tasks.items() if task_names is None or name in task_names
+        ]
         crew = Crew(
-            tasks=list(self.tasks.values()),
+            tasks=tasks,
             agents=list(self.agents.values()),
             process=Process.sequential,
             verbose=self.verbose,
             planning=False if not planning_llm else True,
-            planning_llm=LLM(
-                model=planning_llm,
-                temperature=0.2,
-                # Apparently, we need to specify `google_api_key` here as well
-                #  ...
-                # How on earth does this work?
-                api_key=os.environ.get('GOOGLE_API_KEY'),
-                google_api_key=os.environ.get('GOOGLE_API_KEY'),
-            )
-            if planning_llm
-            else None,
+            planning_llm=_planning_llm(planning_llm) if planning_llm else None,
         )
         logger.info('Crew created.')
         return crew
+
+    def plan(
+        self,
+        planning_llm: str,
+        inputs: dict[str, Any],
+        cache: PlanCache | None = None,
+        per_notes: bool = False,
+        task_names: list[str] | None = None,
+    ) -> None:
+        """
+        Add a step-by-step plan to the description of each task, as crewai planning does, but
+        reuse the plans from `cache` if the tasks, agents and planning LLM are unchanged.
+
+        By default, the plans are created from the task templates and shared by all notes.
+        With `per_notes`, they are created from the tasks with the inputs filled in, as crewai
+        does, and only reused for the same notes. Use this instead of `crew(planning_llm=...)`
+        before the tasks are first run.
+        """
+        tasks = {
+            name: task
+            for name, task in self.tasks.items()
+            if task_names is None or name in task_names
+        }
+        key = plan_key(tasks, planning_llm, notes=inputs['notes'] if per_notes else None)
+        with tracing.span('RFCrew.plan', planning_llm=planning_llm) as span:
+            plans = cache.get(key) if cache is not None else None
+            if cache is not None:
+                tracing.record_cache_lookup('plans', hit=plans is not None)
+            if plans is not None:
+                logger.info(f'Reusing cached plans {key[:12]} for {len(plans)} tasks.')
+            else:
+                logger.info(f'Planning {len(tasks)} tasks with {planning_llm}.')
+                plans = create_plans(
+                    tasks, _planning_llm(planning_llm), inputs=inputs if per_notes else None
+                )
+                if cache is not None:
+                    cache.put(key, plans, planning_llm, scope='notes' if per_notes else 'config')
+            span.set_attribute('rfcrew.plan.key', key)
+        for name, plan in plans.items():
+            if name in tasks:
+                tasks[name].description = f'{tasks[name].description}\n\n{plan}'
+
+    def prune(self, facts: dict[str, float]) -> list[str]:
+        """
+        Remove the tasks whose `run_if` condition is false, also from the context of the other
+        tasks. Conditions that use a variable missing from `facts` are not evaluated yet.
+        Returns the names of the removed tasks.
+        """
+        removed = [
+            name
+            for name, condition in self.conditions.items()
+            if name in self.tasks
+            and condition.variables <= facts.keys()
+            and not condition.evaluate(facts)
+        ]
+        for name in removed:
+            logger.info(f'Skipping task "{name}": {self.conditions[name].expression} is false.')
+            self.pruned[name] = self.conditions[name].expression
+            task = self.tasks.pop(name)
+            for other in [*self.tasks.values(), self.rewrite_editor]:
+                if other is not None and isinstance(other.context, list):
+                    other.context = [context for context in other.context if context is not task]
+        return removed
+
+    def kickoff(
+        self,
+        inputs: dict[str, Any],
+        facts: dict[str, float] | None = None,
+        task_names: list[str] | None = None,
+        span_name: str = 'RFCrew.kickoff',
+    ) -> CrewOutput:
+        """
+        Run the crew, skipping tasks whose `run_if` condition is false for the notes `facts`.
+        If a condition depends on the draft, the crew runs in two parts: up to and including
+        `rfc_author`, and the remaining tasks once the conditions have been checked.
+        """
+        facts = dict(facts or {})
+        self.prune(facts)
+        names = [name for name in self.tasks if task_names is None or name in task_names]
+        split = len(names)
+        if AUTHOR_TASK in names and any(
+            self.conditions[name].needs_draft for name in names if name in self.conditions
+        ):
+            split = names.index(AUTHOR_TASK) + 1
+        outputs = []
+        for part in (names[:split], names[split:]):
+            # Tasks may have been removed by the conditions on the draft.
+            part = [name for name in part if name in self.tasks]
+            if not part:
+                continue
+            crew = self.crew(task_names=part)
+            with tracing.trace_crew(crew, span_name) as span:
+                outputs.append(crew.kickoff(inputs))
+                tracing.record_token_usage(span, outputs[-1].token_usage)
+            author = self.tasks.get(AUTHOR_TASK)
+            if AUTHOR_TASK in part and author is not None and author.output is not None:
+                facts.update(draft_facts(author.output.raw))
+                self.prune(facts)
+        if len(outputs) == 1:
+            return outputs[0]
+        usage = UsageMetrics()
+        for output in outputs:
+            usage.add_usage_metrics(output.token_usage)
+        return outputs[-1].model_copy(
+            update={
+                'tasks_output': [task for output in outputs for task in output.tasks_output],
+                'token_usage': usage,
+            }
+        )
+
+    def _patched_document(self) -> tuple[str, int]:
+        """Apply the editor's section edits and the diagram to the draft."""
+        editor, author = self.tasks[EDITOR_TASK], self.tasks.get(AUTHOR_TASK)
+        if editor.output is None or author is None or author.output is None:
+            raise PatchError('The editor patch or the draft it applies to is missing.')
+        patch = parse_patch(editor.output)
+        document = apply_patch(author.output.raw, patch)
+        diagram = self.tasks.get(DIAGRAM_TASK)
+        if diagram is not None and diagram.output is not None and DIAGRAM_TASK not in self.skipped:
+            document = insert_diagram(document, diagram.output.raw)
+        return document, len(patch.edits)
+
+    def finalize(self, result: CrewOutput, inputs: dict[str, Any]) -> CrewOutput:
+        """
+        In patch mode, apply the editor's section edits to the `rfc_author` draft.
+
+        If the patch is invalid or cannot be applied, the original editor task is run to
+        rewrite the whole RFC instead. Outside patch mode `result` is returned unchanged.
+        """
+        if self.rewrite_editor is None:
+            return result
+        with tracing.span('RFCrew.apply_editor_patch') as span:
+            try:
+                document, edits = self._patched_document()
+                span.set_attribute('rfcrew.editor.edits', edits)
+                return result.model_copy(update={'raw': document, 'pydantic': None})
+            except PatchError as e:
+                logger.warning(f'Editor patch could not be applied ({e}); rewriting the RFC.')
+                span.set_attribute('rfcrew.editor.fallback', True)
+        editor = self.rewrite_editor
+        crew = Crew(
+            tasks=[editor],
+            agents=[editor.agent] if editor.agent else [],
+            process=Process.sequential,
+            verbose=self.verbose,
+        )
+        with tracing.trace_crew(crew, 'RFCrew.rewrite_editor') as span:
+            rewrite = crew.kickoff(inputs)
+            tracing.record_token_usage(span, rewrite.token_usage)
+        return rewrite.model_copy(
+            update={'tasks_output': [*result.tasks_output[:-1], *rewrite.tasks_output]}
+        )
+
+    def _step_callback(self, agent_name: str, deadline: Deadline) -> Callable[[Any], None]:
+        def _check(step: Any) -> None:
+            # Called by crewai after every agent step; stops agents of cancelled stages.
+            if agent_name in self._cancelled or deadline.expired:
+                raise DeadlineExceeded(f'Agent "{agent_name}" ran past its deadline.')
+
+        return _check
+
+    def _stages(self) -> list[list[str]]:
+        # Consecutive asynchronous tasks run concurrently, as in a crewai kickoff.
+        stages: list[list[str]] = []
+        for name, task in self.tasks.items():
+            if stages and task.async_execution and self.tasks[stages[-1][-1]].async_execution:
+                stages[-1].append(name)
+            else:
+                stages.append([name])
+        return stages
+
+    def _skip(self, name: str, reason: str) -> None:
+        logger.warning(f'Skipping task "{name}": {reason}.')
+        self.skipped[name] = reason
+        task = self.tasks[name]
+        # Later tasks that use this task as context receive a note instead of its output.
+        task.output = TaskOutput(
+            name=name,
+            description=task.description,
+            agent=task.agent.role if task.agent else name,
+            raw=SKIPPED_OUTPUT.format(reason=reason),
+        )
+
+    def _run_stage(
+        self, names: list[str], inputs: dict[str, Any], budgets: dict[str, float]
+    ) -> dict[str, CrewOutput]:
+        results: dict[str, CrewOutput | Exception] = {}
+
+        def _run(name: str) -> None:
+            crew = self.crew(task_names=[name])
+            try:
+                with tracing.trace_crew(crew, f'RFCrew.stage.{name}') as span:
+                    output = crew.kickoff(inputs)
+                    tracing.record_token_usage(span, output.token_usage)
+                results[name] = output
+            except Exception as e:
+                results[name] = e
+
+        threads = {}
+        for name in names:
+            self._cancelled.discard(self._agent_name(name))
+            # Copy the context so stage spans are children of the current span.
+            threads[name] = threading.Thread(
+                target=contextvars.copy_context().run, args=(_run, name), daemon=True
+            )
+            threads[name].start()
+        start = time.monotonic()
+        outputs = {}
+        for name, thread in threads.items():
+            timeout = budgets[name] - (time.monotonic() - start)
+            thread.join(None if math.isinf(timeout) else max(timeout, 0.0))
+            result = results.get(name)
+            if thread.is_alive() or isinstance(result, DeadlineExceeded):
+                # The thread cannot be killed, but its agent stops at its next step and the
+                # daemon thread does not keep the process alive.
+                self._cancelled.add(self._agent_name(name))
+                self._skip(name, f'it did not finish within {budgets[name]:.0f}s')
+            elif isinstance(result, Exception):
+                if name not in self.optional:
+                    raise result
+                self._skip(name, f'it failed ({result})')
+            else:
+                outputs[name] = result
+        return outputs
+
+    def _agent_name(self, task_name: str) -> str:
+        agent = self.tasks[task_name].agent
+        return next((name for name, a in self.agents.items() if a is agent), task_name)
+
+    def kickoff_with_deadline(
+        self,
+        inputs: dict[str, Any],
+        deadline: Deadline,
+        task_timeout: float | None = None,
+        facts: dict[str, float] | None = None,
+    ) -> CrewOutput:
+        """
+        Run the tasks stage by stage, each within its timeout and the overall deadline. Tasks
+        are removed by their `run_if` conditions as in `kickoff`.
+
+        Optional tasks (`optional: true` in the tasks config) are skipped once less than the
+        deadline's reserve is left, and cancelled if they run past it. If a required task is
+        cut, no further tasks run. The best available draft (edited, or else the author's
+        draft) is returned with a note about the skipped stages. Raises `DeadlineExceeded`,
+        listing the skipped stages, if there is no draft at all.
+        """
+        self.skipped = {}
+        for name, agent in self.agents.items():
+            agent.step_callback = self._step_callback(name, deadline)
+        facts = dict(facts or {})
+        self.prune(facts)
+        usage = UsageMetrics()
+        stopped = False
+        for stage in self._stages():
+            stage = [name for name in stage if name in self.tasks]
+            budgets = {}
+            for name in stage:
+                optional = name in self.optional
+                budget = min(
+                    deadline.remaining(optional=optional),
+                    self.timeouts.get(name, task_timeout or float('inf')),
+                )
+                if stopped:
+                    self._skip(name, 'an earlier required stage did not finish in time')
+                elif budget <= 0:
+                    self._skip(name, 'the deadline was reached before it started')
+                else:
+                    budgets[name] = budget
+            for name, output in self._run_stage(list(budgets), inputs, budgets).items():
+                usage.add_usage_metrics(output.token_usage)
+            stopped = stopped or any(
+                name in self.skipped and name not in self.optional for name in stage
+            )
+            author = self.tasks.get(AUTHOR_TASK)
+            if AUTHOR_TASK in stage and AUTHOR_TASK not in self.skipped and author is not None:
+                facts.update(draft_facts(cast(TaskOutput, author.output).raw))
+                self.prune(facts)
+        return self._partial_result(inputs, deadline, usage)
+
+    def _partial_result(
+        self, inputs: dict[str, Any], deadline: Deadline, usage: UsageMetrics
+    ) -> CrewOutput:
+        tasks_output = [
+            task.output
+            for name, task in self.tasks.items()
+            if task.output is not None and name not in self.skipped
+        ]
+        document = None
+        if EDITOR_TASK in self.tasks and EDITOR_TASK not in self.skipped:
+            if self.rewrite_editor is None:
+                document = self.tasks[EDITOR_TASK].output.raw
+            else:
+                try:
+                    document = self._patched_document()[0]
+                except PatchError as e:
+                    if not deadline.expired:
+                        result = CrewOutput(raw='', tasks_output=tasks_output, token_usage=usage)
+                        document = self.finalize(result, inputs).raw
+                    else:
+                        self.skipped[EDITOR_TASK] = f'its edits could not be applied ({e})'
+        if document is None:
+            author = self.tasks.get(AUTHOR_TASK)
+            if author is None or author.output is None or AUTHOR_TASK in self.skipped:
+                raise DeadlineExceeded(
+                    'The deadline was reached before a draft was written.', skipped=self.skipped
+                )
+            document = author.output.raw
+        if self.skipped:
+            notes = '\n'.join(f'> * `{name}`: {reason}' for name, reason in self.skipped.items())
+            document = f'{document.rstrip()}\n\n{SKIPPED_NOTE}\n>\n{notes}\n'
+        return CrewOutput(raw=document, tasks_output=tasks_output, token_usage=usage)
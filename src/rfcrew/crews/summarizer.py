@@ -0,0 +1,33 @@
+from crewai import Agent, Task
+
+from .base import BaseAgent
+
+
+class SectionSummaryAgent(BaseAgent):
+    @property
+    def _agent(self) -> Agent:
+        return Agent(
+            role='Technical Document Analyst',
+            goal='To extract every fact from a part of a technical document that matters for a given purpose, without losing detail',
+            backstory='You routinely condense long design documents for architects who do not have time to read them in full. '
+            'You know that decisions, constraints, numbers, component names and trade-offs must survive condensation verbatim, '
+            'while prose, repetition and formatting can go. You never add information that is not in the text you are given.',
+            llm=self._llm,
+        )
+
+    @property
+    def _task(self) -> Task:
+        return Task(
+            agent=self._agent,
+            description='You are given one part ({position}) of a larger markdown document. The sections it covers '
+            'are: {sections}.\n\n'
+            'Extract the information from this part that is needed for the following purpose: {purpose}\n\n'
+            'Rules:\n'
+            '- Only use information stated in this part. Do not speculate about the rest of the document.\n'
+            '- Keep decisions, requirements, constraints, component and technology names, numbers and trade-offs.\n'
+            '- Mention which section each point comes from.\n'
+            '- If the part contains nothing relevant to the purpose, output `NOTHING_RELEVANT`.'
+            '\n\nDocument part:\n{section}',
+            expected_output='A concise markdown bullet list of the extracted information, grouped by section heading, '
+            'or the string `NOTHING_RELEVANT`.',
+        )
@@ -0,0 +1,46 @@
+import re
+import math
+import time
+
+_DURATION_PATTERN = re.compile(r'(\d+(?:\.\d+)?)([dhms]?)')
+_UNITS = {'d': 86400, 'h': 3600, 'm': 60, 's': 1, '': 1}
+
+
+def parse_duration(value: str) -> float:
+    """Parse a duration such as `90`, `90s`, `10m`, `1h30m` or `7d` into seconds."""
+    text = value.strip().lower().replace(' ', '')
+    parts = _DURATION_PATTERN.findall(text)
+    if not text or ''.join(number + unit for number, unit in parts) != text:
+        raise ValueError(f'Invalid duration "{value}", expected e.g. "90s", "10m" or "1h30m".')
+    return sum(float(number) * _UNITS[unit] for number, unit in parts)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised to stop work that ran past its deadline or timeout."""
+
+    def __init__(self, message: str, skipped: dict[str, str] | None = None):
+        super().__init__(message)
+        # Stages that were skipped or cancelled, with the reason.
+        self.skipped = skipped or {}
+
+
+class Deadline:
+    """
+    Time budget of a run, counted from its creation.
+
+    Optional stages only run in the part of the budget before the `reserve` (a fraction of
+    the budget), so that the remainder is left for the required stages.
+    """
+
+    def __init__(self, seconds: float, reserve: float = 0.25):
+        self.seconds = seconds
+        self.reserve = reserve * seconds if math.isfinite(seconds) else 0.0
+        self._end = time.monotonic() + seconds
+
+    def remaining(self, optional: bool = False) -> float:
+        remaining = self._end - time.monotonic() - (self.reserve if optional else 0.0)
+        return max(remaining, 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
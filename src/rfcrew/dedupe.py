@@ -0,0 +1,159 @@
+import re
+import difflib
+import hashlib
+import logging
+import random
+import pathlib as plb
+from collections import defaultdict
+
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger('rfcrew.dedupe')
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_WORD_PATTERN = re.compile(r'\w+')
+
+
+class DuplicateCluster(BaseModel):
+    representative: plb.Path = Field(..., description='Notes file processed for the cluster')
+    members: list[plb.Path] = Field(
+        default_factory=list, description='Near-duplicates that reuse the representative result'
+    )
+    similarities: dict[plb.Path, float] = Field(
+        default_factory=dict,
+        description='Estimated Jaccard similarity of each member to the representative',
+    )
+
+
+def shingles(text: str, size: int = 3) -> set[str]:
+    """Return the set of word `size`-grams of a text, normalised for case and whitespace."""
+    words = _WORD_PATTERN.findall(text.lower())
+    if len(words) < size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """
+    MinHash signatures for estimating Jaccard similarity between shingle sets.
+
+    Uses `num_perm` universal hash functions `(a * x + b) mod p` over a 32-bit hash of
+    each shingle. The seed is fixed so signatures are comparable across runs.
+    """
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._coefficients = [
+            (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, shingle_set: set[str]) -> list[int]:
+        hashes = [
+            int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=4).digest(), 'little')
+            for s in shingle_set
+        ]
+        if not hashes:
+            return [_MAX_HASH] * self.num_perm
+        return [
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._coefficients
+        ]
+
+
+def estimate_jaccard(signature_a: list[int], signature_b: list[int]) -> float:
+    """Estimate the Jaccard similarity of two sets from their MinHash signatures."""
+    matches = sum(1 for a, b in zip(signature_a, signature_b) if a == b)
+    return matches / len(signature_a)
+
+
+def cluster_near_duplicates(
+    documents: dict[plb.Path, str],
+    threshold: float = 0.8,
+    num_perm: int = 128,
+    bands: int = 32,
+    shingle_size: int = 3,
+) -> list[DuplicateCluster]:
+    """
+    Group near-identical documents using MinHash and locality-sensitive hashing.
+
+    Signatures are split into `bands` bands; documents sharing any band are candidate pairs,
+    which are kept if their estimated Jaccard similarity is at least `threshold`. Each
+    resulting cluster is represented by its longest document, on the assumption that the
+    longest revision carries the most information, and only contains members whose
+    similarity to the representative is at least `threshold`.
+    """
+    if num_perm % bands != 0:
+        raise ValueError(f'num_perm ({num_perm}) must be divisible by bands ({bands})')
+    rows = num_perm // bands
+    hasher = MinHasher(num_perm=num_perm)
+    paths = list(documents)
+    signatures = {
+        path: hasher.signature(shingles(documents[path], size=shingle_size)) for path in paths
+    }
+
+    buckets: dict[tuple[int, tuple[int, ...]], list[plb.Path]] = defaultdict(list)
+    for path in paths:
+        for band in range(bands):
+            buckets[(band, tuple(signatures[path][band * rows : (band + 1) * rows]))].append(path)
+
+    parent = {path: path for path in paths}
+
+    def _find(path: plb.Path) -> plb.Path:
+        while parent[path] != path:
+            parent[path] = parent[parent[path]]
+            path = parent[path]
+        return path
+
+    checked: set[tuple[plb.Path, plb.Path]] = set()
+    for bucket in buckets.values():
+        for i, path_a in enumerate(bucket):
+            for path_b in bucket[i + 1 :]:
+                pair = (path_a, path_b)
+                if pair in checked:
+                    continue
+                checked.add(pair)
+                if estimate_jaccard(signatures[path_a], signatures[path_b]) >= threshold:
+                    parent[_find(path_b)] = _find(path_a)
+    logger.debug(f'Compared {len(checked)} candidate pairs for {len(paths)} documents.')
+
+    groups: dict[plb.Path, list[plb.Path]] = defaultdict(list)
+    for path in paths:
+        groups[_find(path)].append(path)
+
+    clusters = []
+    for group in groups.values():
+        # Pairs chain (A~B, B~C), so C is not necessarily similar to A. Members that are not
+        # similar to the representative are split off and clustered among themselves.
+        while group:
+            representative = max(group, key=lambda p: (len(documents[p]), str(p)))
+            similarities = {
+                p: estimate_jaccard(signatures[representative], signatures[p])
+                for p in group
+                if p != representative
+            }
+            members = [p for p, similarity in similarities.items() if similarity >= threshold]
+            clusters.append(
+                DuplicateCluster(
+                    representative=representative,
+                    members=members,
+                    similarities={p: similarities[p] for p in members},
+                )
+            )
+            group = [p for p in similarities if p not in members]
+    logger.info(f'Grouped {len(paths)} documents into {len(clusters)} clusters.')
+    return clusters
+
+
+def diff_documents(representative: str, member: str, from_name: str, to_name: str) -> str:
+    """Return a unified diff describing how `member` differs from `representative`."""
+    return ''.join(
+        difflib.unified_diff(
+            representative.splitlines(keepends=True),
+            member.splitlines(keepends=True),
+            fromfile=from_name,
+            tofile=to_name,
+        )
+    )
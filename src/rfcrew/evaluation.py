@@ -0,0 +1,277 @@
+import time
+import uuid
+import sqlite3
+import logging
+import pathlib as plb
+import datetime as dt
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from pydantic import BaseModel, Field
+
+from rfcrew.commands import compare_documents, generate_rfc_from_notes
+from rfcrew.utils import hash_text, read_yaml
+
+logger = logging.getLogger('rfcrew.evaluation')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY,
+    suite TEXT NOT NULL,
+    started_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_suite ON runs (suite, started_at);
+CREATE TABLE IF NOT EXISTS results (
+    run_id TEXT NOT NULL REFERENCES runs (id),
+    case_name TEXT NOT NULL,
+    config_name TEXT NOT NULL,
+    config_hash TEXT NOT NULL,
+    score INTEGER,
+    justification TEXT,
+    latency REAL NOT NULL,
+    total_tokens INTEGER,
+    rfc_path TEXT,
+    error TEXT,
+    PRIMARY KEY (run_id, case_name, config_name)
+);
+"""
+
+
+class EvalCase(BaseModel):
+    name: str = Field(..., description='Name of the case')
+    notes: plb.Path = Field(..., description='Path to the notes used to generate the RFC')
+    ground_truth: plb.Path = Field(..., description='Path to the RFC to compare against')
+
+
+class EvalConfig(BaseModel):
+    name: str = Field(..., description='Name of the configuration')
+    agents_config: plb.Path = Field(..., description='Path to the agents configuration file')
+    tasks_config: plb.Path = Field(..., description='Path to the tasks configuration file')
+    planning_llm: str | None = Field(default=None, description='LLM to use for planning')
+
+    @property
+    def config_hash(self) -> str:
+        """Hash of everything that determines how RFCs are generated under this config."""
+        return hash_text(
+            '\n'.join(
+                [
+                    self.agents_config.read_text(),
+                    self.tasks_config.read_text(),
+                    str(self.planning_llm),
+                ]
+            )
+        )
+
+
+class EvalSuite(BaseModel):
+    name: str = Field(..., description='Name of the suite, used to find previous runs')
+    cases: list[EvalCase]
+    configs: list[EvalConfig]
+
+    @classmethod
+    def from_yaml(cls, path: plb.Path) -> 'EvalSuite':
+        """Load a suite definition. Relative paths are resolved against the suite file."""
+        data = read_yaml(path)
+        data.setdefault('name', path.stem)
+        for case in data.get('cases', []):
+            for key in ('notes', 'ground_truth'):
+                case[key] = (path.parent / case[key]).resolve()
+        for config in data.get('configs', []):
+            for key in ('agents_config', 'tasks_config'):
+                config[key] = (path.parent / config[key]).resolve()
+        return cls(**data)
+
+
+class EvalResult(BaseModel):
+    case_name: str
+    config_name: str
+    config_hash: str
+    score: int | None = None
+    justification: str | None = None
+    latency: float = Field(..., description='Wall time of generation and scoring in seconds')
+    total_tokens: int | None = None
+    rfc_path: plb.Path | None = None
+    error: str | None = None
+
+
+class EvalResultDiff(BaseModel):
+    current: EvalResult
+    previous: EvalResult | None = None
+
+    @property
+    def score_delta(self) -> int | None:
+        if self.previous is None or self.current.score is None or self.previous.score is None:
+            return None
+        return self.current.score - self.previous.score
+
+    @property
+    def latency_delta(self) -> float | None:
+        return None if self.previous is None else self.current.latency - self.previous.latency
+
+    @property
+    def tokens_delta(self) -> int | None:
+        if (
+            self.previous is None
+            or self.current.total_tokens is None
+            or self.previous.total_tokens is None
+        ):
+            return None
+        return self.current.total_tokens - self.previous.total_tokens
+
+    @property
+    def config_changed(self) -> bool:
+        return self.previous is not None and self.previous.config_hash != self.current.config_hash
+
+
+class EvalStore:
+    """SQLite store of evaluation runs and their per-case, per-config results."""
+
+    def __init__(self, path: plb.Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def create_run(self, suite: str) -> str:
+        run_id = f'{dt.datetime.now(dt.timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}'
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO runs (id, suite, started_at) VALUES (?, ?, ?)',
+                (run_id, suite, dt.datetime.now(dt.timezone.utc).isoformat()),
+            )
+        return run_id
+
+    def add_result(self, run_id: str, result: EvalResult) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO results (run_id, case_name, config_name, config_hash, score, '
+                'justification, latency, total_tokens, rfc_path, error) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (
+                    run_id,
+                    result.case_name,
+                    result.config_name,
+                    result.config_hash,
+                    result.score,
+                    result.justification,
+                    result.latency,
+                    result.total_tokens,
+                    str(result.rfc_path) if result.rfc_path else None,
+                    result.error,
+                ),
+            )
+
+    def results(self, run_id: str) -> list[EvalResult]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT * FROM results WHERE run_id = ? ORDER BY case_name, config_name', (run_id,)
+            ).fetchall()
+        return [EvalResult(**{k: row[k] for k in row.keys() if k != 'run_id'}) for row in rows]
+
+    def previous_run(self, suite: str, run_id: str) -> str | None:
+        """Return the id of the run of `suite` that preceded `run_id`, if any."""
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT id FROM runs WHERE suite = ? AND started_at < '
+                '(SELECT started_at FROM runs WHERE id = ?) ORDER BY started_at DESC LIMIT 1',
+                (suite, run_id),
+            ).fetchone()
+        return row['id'] if row else None
+
+
+def evaluate_case(case: EvalCase, config: EvalConfig, output_directory: plb.Path) -> EvalResult:
+    """
+    Generate an RFC for a case under a config and score it against the ground truth.
+
+    The research knowledge base is not used, so that runs are comparable.
+    """
+    config_hash = config.config_hash
+    start = time.perf_counter()
+    try:
+        state, output = generate_rfc_from_notes(
+            path_to_notes=case.notes,
+            agents_config=config.agents_config,
+            tasks_config=config.tasks_config,
+            planning_llm=config.planning_llm,
+        )
+        if output is None:
+            return EvalResult(
+                case_name=case.name,
+                config_name=config.name,
+                config_hash=config_hash,
+                latency=time.perf_counter() - start,
+                error=f'Notes rejected with score {state.notes_feedback.score}'
+                if state.notes_feedback
+                else 'Notes rejected',
+            )
+        rfc_path = output_directory / f'{case.name}__{config.name}.md'
+        rfc_path.write_text(output.raw)
+        evaluation = compare_documents(path_to_rfc=rfc_path, path_to_ground_truth=case.ground_truth)
+        return EvalResult(
+            case_name=case.name,
+            config_name=config.name,
+            config_hash=config_hash,
+            score=evaluation.score,
+            justification=evaluation.justification,
+            latency=time.perf_counter() - start,
+            total_tokens=output.token_usage.total_tokens if output.token_usage else None,
+            rfc_path=rfc_path,
+        )
+    except Exception as e:
+        logger.exception(f'Evaluation of case "{case.name}" with config "{config.name}" failed.')
+        return EvalResult(
+            case_name=case.name,
+            config_name=config.name,
+            config_hash=config_hash,
+            latency=time.perf_counter() - start,
+            error=str(e),
+        )
+
+
+def run_suite(
+    suite: EvalSuite,
+    store: EvalStore,
+    output_directory: plb.Path,
+    max_workers: int = 4,
+) -> tuple[str, list[EvalResultDiff]]:
+    """
+    Run every case under every config in parallel, record the results and compare them
+    with the previous run of the same suite.
+    """
+    run_id = store.create_run(suite.name)
+    run_directory = output_directory / run_id
+    run_directory.mkdir(parents=True, exist_ok=True)
+    logger.info(
+        f'Starting evaluation run {run_id}: {len(suite.cases)} cases x {len(suite.configs)} configs'
+    )
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(evaluate_case, case, config, run_directory)
+            for case in suite.cases
+            for config in suite.configs
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            store.add_result(run_id, result)
+            logger.info(
+                f'Finished {result.case_name}/{result.config_name}: score={result.score}, '
+                f'latency={result.latency:.1f}s'
+            )
+    return run_id, diff_runs(store, suite.name, run_id)
+
+
+def diff_runs(store: EvalStore, suite: str, run_id: str) -> list[EvalResultDiff]:
+    previous_run_id = store.previous_run(suite, run_id)
+    previous = (
+        {(r.case_name, r.config_name): r for r in store.results(previous_run_id)}
+        if previous_run_id
+        else {}
+    )
+    return [
+        EvalResultDiff(current=r, previous=previous.get((r.case_name, r.config_name)))
+        for r in store.results(run_id)
+    ]
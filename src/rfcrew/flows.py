@@ -1,17 +1,44 @@
+import time
 import logging
+import contextvars
 from typing import cast
 import pathlib as plb
+from concurrent.futures import ThreadPoolExecutor
 
 from pydantic import BaseModel, Field
 from crewai import CrewOutput
+from crewai.tasks.task_output import TaskOutput
 from crewai.flow.flow import Flow, listen, start, router
 
+from rfcrew import tracing
+from rfcrew.deadline import Deadline
+from rfcrew.log import Preview
+from rfcrew.planning import PlanCache
 from rfcrew.crews.assessor import ScoreAgentOutputModel, ScoreAgent
+from rfcrew.crews.conditions import notes_facts
 from rfcrew.crews.rfc import RFCrew, get_tools
+from rfcrew.knowledge import ResearchKnowledgeBase, format_prior_research, NO_PRIOR_RESEARCH
 
 logger = logging.getLogger('rfcrew.flows')
 
 
+class CandidateConfig(BaseModel):
+    name: str = Field(..., description='Name of the candidate')
+    model: str | None = Field(
+        default=None, description='LLM used by every agent (default: as in the agents config)'
+    )
+    temperature: float = Field(default=0.2, description='Temperature of the agent LLMs')
+    planning_llm: str | None = Field(default=None, description='LLM to use for planning')
+
+
+class Candidate(BaseModel):
+    config: CandidateConfig
+    rfc: str | None = Field(default=None, description='Generated RFC, None if generation failed')
+    total_tokens: int | None = Field(default=None, description='Tokens used by the crew')
+    latency: float = Field(default=0.0, description='Wall time of the crew in seconds')
+    error: str | None = Field(default=None, description='Error raised during generation')
+
+
 class RFCFlowState(BaseModel):
     agents_config_path: plb.Path = Field(
         default='', description='Path to the agents configuration file'
@@ -22,59 +49,243 @@ class RFCFlowState(BaseModel):
     planning_llm: str | None = Field(
         default=None, description='LLM to use for planning if required'
     )
+    knowledge_base_path: plb.Path | None = Field(
+        default=None, description='Path to the research knowledge base, if enabled'
+    )
+    plan_cache_path: plb.Path | None = Field(
+        default=None, description='Path to the cache of task plans, if enabled'
+    )
+    plans_per_notes: bool = Field(
+        default=False, description='Create (and cache) plans per notes instead of per config'
+    )
+    candidates: list[CandidateConfig] = Field(
+        default_factory=list,
+        description='If given, generate one RFC per candidate config concurrently',
+    )
+    share_research: bool = Field(
+        default=True, description='Run the research task once and share it between candidates'
+    )
+    parallel_drafting: bool = Field(
+        default=False, description='Draft the sections of the RFC template concurrently'
+    )
+    patch_editor: bool = Field(
+        default=False, description='Let the editor return section edits instead of a full RFC'
+    )
+    deadline: float | None = Field(
+        default=None, description='Seconds after which the run returns its best available draft'
+    )
+    task_timeout: float | None = Field(
+        default=None, description='Default timeout of a single task in seconds'
+    )
+    skipped_stages: dict[str, str] = Field(
+        default_factory=dict, description='Tasks skipped because of the deadline, with reasons'
+    )
+    pruned_tasks: dict[str, str] = Field(
+        default_factory=dict,
+        description='Tasks skipped because their `run_if` condition was false, with the condition',
+    )
     notes: str = Field(default='', description='Initial notes provided for the RFC process')
     notes_feedback: ScoreAgentOutputModel | None = Field(
         default=None, description='Feedback from the ScoreAgent on the RFC notes'
     )
 
 
+RESEARCH_TASK = 'rfc_research_assistant'
+
+
 class RFCFlow(Flow[RFCFlowState]):
+    _deadline: Deadline | None = None
+
+    def _retrieve_prior_research(self) -> str:
+        if self.state.knowledge_base_path is None:
+            return NO_PRIOR_RESEARCH
+        knowledge_base = ResearchKnowledgeBase(self.state.knowledge_base_path)
+        reports = knowledge_base.search(self.state.notes)
+        logger.info(f'Retrieved {len(reports)} prior research reports from knowledge base.')
+        return format_prior_research(reports)
+
+    def _store_research(self, crew_builder: RFCrew) -> None:
+        if self.state.knowledge_base_path is None:
+            return
+        research_task = crew_builder.tasks.get(RESEARCH_TASK)
+        if research_task is None or research_task.output is None:
+            logger.warning('No research output available to store in knowledge base.')
+            return
+        ResearchKnowledgeBase(self.state.knowledge_base_path).add(
+            notes=self.state.notes, report=research_task.output.raw
+        )
+
+    def _notes_facts(self) -> dict[str, float]:
+        score = self.state.notes_feedback.score if self.state.notes_feedback else None
+        return notes_facts(self.state.notes, score)
+
+    def _plan(
+        self,
+        crew_builder: RFCrew,
+        planning_llm: str | None,
+        inputs: dict,
+        task_names: list[str] | None = None,
+    ) -> None:
+        if not planning_llm:
+            return
+        crew_builder.plan(
+            planning_llm,
+            inputs,
+            cache=PlanCache(self.state.plan_cache_path) if self.state.plan_cache_path else None,
+            per_notes=self.state.plans_per_notes,
+            task_names=task_names,
+        )
+
+    def _share_research(self, prior_research: str) -> TaskOutput:
+        _crew_builder = RFCrew.from_config(
+            agents_config_path=self.state.agents_config_path,
+            tasks_config_path=self.state.tasks_config_path,
+            tools=get_tools(notes=self.state.notes),
+        )
+        _crew = _crew_builder.crew(task_names=[RESEARCH_TASK])
+        with tracing.trace_crew(_crew, 'RFCrew.research') as span:
+            result = _crew.kickoff({'notes': self.state.notes, 'prior_research': prior_research})
+            tracing.record_token_usage(span, result.token_usage)
+        self._store_research(_crew_builder)
+        return cast(TaskOutput, _crew_builder.tasks[RESEARCH_TASK].output)
+
+    def _generate_candidate(
+        self, config: CandidateConfig, prior_research: str, research: TaskOutput | None
+    ) -> Candidate:
+        start = time.perf_counter()
+        try:
+            _crew_builder = RFCrew.from_config(
+                agents_config_path=self.state.agents_config_path,
+                tasks_config_path=self.state.tasks_config_path,
+                tools=get_tools(notes=self.state.notes),
+                model=config.model,
+                temperature=config.temperature,
+                parallel_drafting=self.state.parallel_drafting,
+                patch_editor=self.state.patch_editor,
+            )
+            task_names = None
+            if research is not None:
+                _crew_builder.tasks[RESEARCH_TASK].output = research
+                task_names = [name for name in _crew_builder.tasks if name != RESEARCH_TASK]
+            inputs = {'notes': self.state.notes, 'prior_research': prior_research}
+            facts = self._notes_facts()
+            _crew_builder.prune(facts)
+            self._plan(_crew_builder, config.planning_llm, inputs, task_names=task_names)
+            result = _crew_builder.kickoff(
+                inputs, facts, task_names=task_names, span_name=f'RFCrew.kickoff.{config.name}'
+            )
+            result = _crew_builder.finalize(result, inputs)
+            if research is None:
+                self._store_research(_crew_builder)
+            return Candidate(
+                config=config,
+                rfc=result.raw,
+                total_tokens=result.token_usage.total_tokens if result.token_usage else None,
+                latency=time.perf_counter() - start,
+            )
+        except Exception as e:
+            logger.exception(f'Generation of candidate "{config.name}" failed.')
+            return Candidate(config=config, latency=time.perf_counter() - start, error=str(e))
+
+    def _generate_candidates(self, prior_research: str) -> list[Candidate]:
+        research = self._share_research(prior_research) if self.state.share_research else None
+        logger.info(f'Generating {len(self.state.candidates)} candidate RFCs concurrently.')
+        with ThreadPoolExecutor(max_workers=len(self.state.candidates)) as executor:
+            # Copy the context so candidate spans are children of the current span.
+            futures = [
+                executor.submit(
+                    contextvars.copy_context().run,
+                    self._generate_candidate,
+                    config,
+                    prior_research,
+                    research,
+                )
+                for config in self.state.candidates
+            ]
+            return [future.result() for future in futures]
+
+    def _kickoff_with_deadline(self, crew_builder: RFCrew, inputs: dict) -> CrewOutput:
+        logger.debug('Kicking off RFC generation crew stage by stage.')
+        with tracing.span('RFCrew.kickoff_with_deadline') as span:
+            result = crew_builder.kickoff_with_deadline(
+                inputs,
+                deadline=self._deadline or Deadline(float('inf')),
+                task_timeout=self.state.task_timeout,
+                facts=self._notes_facts(),
+            )
+            tracing.record_token_usage(span, result.token_usage)
+            span.set_attribute('rfcrew.skipped_stages', ','.join(crew_builder.skipped))
+        self.state.skipped_stages = crew_builder.skipped
+        self.state.pruned_tasks = crew_builder.pruned
+        if RESEARCH_TASK not in crew_builder.skipped:
+            self._store_research(crew_builder)
+        return result
+
     @start()
     def score(self) -> ScoreAgentOutputModel:
-        logger.debug('Starting initial notes scoring.')
-        logger.debug('Initializing ScoreAgent.')
-        scorer = ScoreAgent(model='gemini/gemini-2.5-flash-preview-04-17')
-        logger.debug('Executing ScoreAgent.')
-        output = scorer.execute({'notes': self.state.notes})
+        # The deadline covers the whole flow, including scoring the notes.
+        self._deadline = Deadline(self.state.deadline) if self.state.deadline else None
+        with tracing.span('RFCFlow.score') as span:
+            logger.debug('Starting initial notes scoring.')
+            logger.debug('Initializing ScoreAgent.')
+            scorer = ScoreAgent(model='gemini/gemini-2.5-flash-preview-04-17')
+            logger.debug('Executing ScoreAgent.')
+            output = scorer.execute({'notes': self.state.notes})
 
-        self.state.notes_feedback = cast(ScoreAgentOutputModel, output.pydantic)
-        logger.debug(f'Notes scoring completed. Score: {self.state.notes_feedback.score}')
-        logger.debug(f'ScoreAgent raw output: {output}')
-        return self.state.notes_feedback
+            self.state.notes_feedback = cast(ScoreAgentOutputModel, output.pydantic)
+            span.set_attribute('rfcrew.notes.score', self.state.notes_feedback.score)
+            logger.debug('Notes scoring completed. Score: %s', self.state.notes_feedback.score)
+            logger.debug('ScoreAgent raw output: %s', Preview(output))
+            return self.state.notes_feedback
 
     @router(score)
     def process_score(self, scorer_output: ScoreAgentOutputModel) -> str:
-        logger.debug(f'Processing score: {scorer_output.score}')
-        if scorer_output.score <= 6:
-            logger.info('Score is not OK.')
-            return 'not_OK'
-        else:
-            logger.info('Score is OK.')
-            return 'OK'
+        with tracing.span('RFCFlow.process_score') as span:
+            logger.debug('Processing score: %s', scorer_output.score)
+            if scorer_output.score <= 6:
+                logger.info('Score is not OK.')
+                route = 'not_OK'
+            else:
+                logger.info('Score is OK.')
+                route = 'OK'
+            span.set_attribute('rfcrew.flow.route', route)
+            return route
 
     @listen('not_OK')
     def not_ok(self) -> None:
         logger.debug('The input notes are not sufficient to proceed with the RFC process.')
         logger.debug(
-            f'Feedback: {cast(ScoreAgentOutputModel, self.state.notes_feedback).justification}'
+            'Feedback: %s', cast(ScoreAgentOutputModel, self.state.notes_feedback).justification
         )
         logger.info('Please provide more detailed notes.')
 
     @listen('OK')
-    def ok(self) -> CrewOutput:
-        logger.debug('Notes score is OK. Proceeding with RFC generation.')
-        logger.debug('Creating RFCrew from config.')
-        _crew_builder = RFCrew.from_config(
-            agents_config_path=self.state.agents_config_path,
-            tasks_config_path=self.state.tasks_config_path,
-            tools=get_tools(),
-        )
-        logger.debug('Building Crew instance.')
-        _crew = _crew_builder.crew(
-            planning_llm=self.state.planning_llm
-        )  #'gemini/gemini-2.0-flash-lite-001')
-        logger.debug('Kicking off RFC generation crew.')
-        result = _crew.kickoff({'notes': self.state.notes})
-        logger.debug('RFC generation crew finished successfully.')
-        logger.debug(f'RFC crew raw output: {result}')
-        return result
+    def ok(self) -> CrewOutput | list[Candidate]:
+        with tracing.span('RFCFlow.ok'):
+            logger.debug('Notes score is OK. Proceeding with RFC generation.')
+            if self.state.candidates:
+                return self._generate_candidates(self._retrieve_prior_research())
+            logger.debug('Creating RFCrew from config.')
+            _crew_builder = RFCrew.from_config(
+                agents_config_path=self.state.agents_config_path,
+                tasks_config_path=self.state.tasks_config_path,
+                tools=get_tools(notes=self.state.notes),
+                parallel_drafting=self.state.parallel_drafting,
+                patch_editor=self.state.patch_editor,
+            )
+            prior_research = self._retrieve_prior_research()
+            inputs = {'notes': self.state.notes, 'prior_research': prior_research}
+            facts = self._notes_facts()
+            # Remove tasks that are not needed for these notes before planning them.
+            _crew_builder.prune(facts)
+            self._plan(_crew_builder, self.state.planning_llm, inputs)
+            if self._deadline is not None or self.state.task_timeout is not None:
+                return self._kickoff_with_deadline(_crew_builder, inputs)
+            logger.debug('Kicking off RFC generation crew.')
+            result = _crew_builder.kickoff(inputs, facts)
+            self.state.pruned_tasks = _crew_builder.pruned
+            result = _crew_builder.finalize(result, inputs)
+            logger.debug('RFC generation crew finished successfully.')
+            self._store_research(_crew_builder)
+            logger.debug('RFC crew raw output: %s', Preview(result))
+            return result
@@ -0,0 +1,384 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+import threading
+import pathlib as plb
+import datetime as dt
+from enum import Enum
+from typing import Any, Callable
+
+from pydantic import BaseModel, Field
+
+from rfcrew.commands import convert_rfc_to_adr, generate_rfc_from_notes, score_notes
+from rfcrew.utils import clean_markdown, get_cache_directory
+
+logger = logging.getLogger('rfcrew.jobs')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    available_at REAL NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_available ON jobs (status, available_at);
+CREATE INDEX IF NOT EXISTS jobs_lease ON jobs (status, lease_expires);
+"""
+
+
+class JobKind(str, Enum):
+    score = 'score'
+    generate = 'generate'
+    convert = 'convert'
+
+
+class JobStatus(str, Enum):
+    queued = 'queued'
+    running = 'running'
+    done = 'done'
+    failed = 'failed'
+
+
+class Job(BaseModel):
+    id: str
+    kind: JobKind
+    payload: dict[str, Any] = Field(..., description='Arguments passed to the job handler')
+    status: JobStatus
+    attempts: int = Field(..., description='Number of times the job was claimed by a worker')
+    max_attempts: int
+    lease_owner: str | None = Field(default=None, description='Worker that holds the lease')
+    lease_expires: float | None = Field(default=None, description='Epoch time the lease ends')
+    result: dict[str, Any] | None = None
+    error: str | None = None
+    created_at: str
+
+
+def _now() -> str:
+    return dt.datetime.now(dt.timezone.utc).isoformat()
+
+
+def default_worker_id() -> str:
+    return f'{socket.gethostname()}-{os.getpid()}'
+
+
+class JobQueue:
+    """
+    Job queue in a SQLite database that can be shared by workers on several machines.
+
+    Workers claim a job by taking a lease on it, which they extend with heartbeats while the
+    job runs. If a worker dies, its lease expires and the job is handed to another worker,
+    until the job ran out of attempts. Failed jobs are retried with exponential backoff.
+
+    Claims run in `BEGIN IMMEDIATE` transactions, so that no two workers can claim the same
+    job. The database uses the default rollback journal rather than WAL, since WAL requires
+    shared memory and does not work on network filesystems. Leases are compared against the
+    clocks of the workers, so `lease_seconds` should be well above the clock skew between them.
+    """
+
+    def __init__(self, path: plb.Path, lease_seconds: float = 300.0, retry_delay: float = 30.0):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.retry_delay = retry_delay
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Transactions are managed explicitly. Writers on other nodes hold the database lock
+        # briefly, so wait for it rather than failing.
+        conn = sqlite3.connect(self.path, timeout=60.0, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _job(self, row: sqlite3.Row) -> Job:
+        data = dict(row)
+        data['payload'] = json.loads(data['payload'])
+        data['result'] = json.loads(data['result']) if data['result'] else None
+        data.pop('available_at')
+        data.pop('updated_at')
+        return Job(**data)
+
+    def enqueue(self, kind: JobKind, payload: dict[str, Any], max_attempts: int = 3) -> str:
+        job_id = uuid.uuid4().hex
+        now = _now()
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO jobs (id, kind, payload, status, max_attempts, available_at, '
+                'created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (
+                    job_id,
+                    JobKind(kind).value,
+                    json.dumps(payload),
+                    JobStatus.queued.value,
+                    max_attempts,
+                    time.time(),
+                    now,
+                    now,
+                ),
+            )
+        logger.debug(f'Enqueued {kind} job {job_id}')
+        return job_id
+
+    def claim(self, worker_id: str, kinds: list[JobKind] | None = None) -> Job | None:
+        """
+        Lease the oldest job that is available, or whose previous lease expired.
+
+        Returns None if there is nothing to do.
+        """
+        now = time.time()
+        kind_filter = ''
+        params: list[Any] = [now, now]
+        if kinds:
+            kind_filter = f' AND kind IN ({", ".join("?" for _ in kinds)})'
+            params.extend(JobKind(kind).value for kind in kinds)
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            # Jobs whose worker died during their last attempt are not handed out again.
+            conn.execute(
+                'UPDATE jobs SET status = ?, lease_owner = NULL, updated_at = ?, '
+                "error = COALESCE(error, 'Lease expired on the last attempt') "
+                'WHERE status = ? AND lease_expires < ? AND attempts >= max_attempts',
+                (JobStatus.failed.value, _now(), JobStatus.running.value, now),
+            )
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE ((status = 'queued' AND available_at <= ?) "
+                f"OR (status = 'running' AND lease_expires < ?)){kind_filter} "
+                'ORDER BY created_at LIMIT 1',
+                params,
+            ).fetchone()
+            if row is None:
+                conn.execute('COMMIT')
+                return None
+            conn.execute(
+                'UPDATE jobs SET status = ?, attempts = attempts + 1, lease_owner = ?, '
+                'lease_expires = ?, updated_at = ? WHERE id = ?',
+                (
+                    JobStatus.running.value,
+                    worker_id,
+                    now + self.lease_seconds,
+                    _now(),
+                    row['id'],
+                ),
+            )
+            job = self._job(
+                conn.execute('SELECT * FROM jobs WHERE id = ?', (row['id'],)).fetchone()
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+        logger.debug(f'Worker {worker_id} claimed {job.kind.value} job {job.id}')
+        return job
+
+    def _update_leased(self, job_id: str, worker_id: str, sql: str, params: tuple) -> bool:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f'UPDATE jobs SET {sql}, updated_at = ? '
+                'WHERE id = ? AND lease_owner = ? AND status = ?',
+                (*params, _now(), job_id, worker_id, JobStatus.running.value),
+            )
+        return cursor.rowcount == 1
+
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        """Extend the lease on a job. Returns False if the worker no longer holds the lease."""
+        return self._update_leased(
+            job_id, worker_id, 'lease_expires = ?', (time.time() + self.lease_seconds,)
+        )
+
+    def complete(self, job_id: str, worker_id: str, result: dict[str, Any]) -> bool:
+        """
+        Store the result of a job. Returns False (and drops the result) if the worker lost
+        the lease in the meantime, since the job was then handed to another worker.
+        """
+        return self._update_leased(
+            job_id,
+            worker_id,
+            'status = ?, result = ?, error = NULL, lease_owner = NULL, lease_expires = NULL',
+            (JobStatus.done.value, json.dumps(result)),
+        )
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        """Record a failed attempt. The job is retried with backoff while it has attempts left."""
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT attempts, max_attempts FROM jobs WHERE id = ?', (job_id,)
+            ).fetchone()
+        if row is None:
+            return False
+        if row['attempts'] < row['max_attempts']:
+            delay = self.retry_delay * 2 ** (row['attempts'] - 1)
+            logger.info(f'Job {job_id} failed, retrying in {delay:.0f}s: {error}')
+            return self._update_leased(
+                job_id,
+                worker_id,
+                'status = ?, error = ?, available_at = ?, lease_owner = NULL, lease_expires = NULL',
+                (JobStatus.queued.value, error, time.time() + delay),
+            )
+        logger.warning(f'Job {job_id} failed after {row["attempts"]} attempts: {error}')
+        return self._update_leased(
+            job_id,
+            worker_id,
+            'status = ?, error = ?, lease_owner = NULL, lease_expires = NULL',
+            (JobStatus.failed.value, error),
+        )
+
+    def get(self, job_id: str) -> Job | None:
+        with self._connect() as conn:
+            row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return self._job(row) if row else None
+
+    def jobs(self, status: JobStatus | None = None, limit: int = 100) -> list[Job]:
+        with self._connect() as conn:
+            if status is None:
+                rows = conn.execute(
+                    'SELECT * FROM jobs ORDER BY created_at LIMIT ?', (limit,)
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    'SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT ?',
+                    (JobStatus(status).value, limit),
+                ).fetchall()
+        return [self._job(row) for row in rows]
+
+    def counts(self) -> dict[JobStatus, int]:
+        with self._connect() as conn:
+            rows = conn.execute('SELECT status, COUNT(*) AS n FROM jobs GROUP BY status').fetchall()
+        counts = {status: 0 for status in JobStatus}
+        counts.update({JobStatus(row['status']): row['n'] for row in rows})
+        return counts
+
+
+Handler = Callable[[dict[str, Any]], dict[str, Any]]
+
+
+def _score(payload: dict[str, Any]) -> dict[str, Any]:
+    return score_notes(path_to_notes=plb.Path(payload['path_to_notes'])).model_dump()
+
+
+def _generate(payload: dict[str, Any]) -> dict[str, Any]:
+    path_to_notes = plb.Path(payload['path_to_notes'])
+    state, output = generate_rfc_from_notes(
+        path_to_notes=path_to_notes,
+        agents_config=plb.Path(payload['agents_config']),
+        tasks_config=plb.Path(payload['tasks_config']),
+        planning_llm=payload.get('planning_llm'),
+        knowledge_base=get_cache_directory() / 'knowledge.db'
+        if payload.get('knowledge_base')
+        else None,
+        parallel_drafting=payload.get('parallel_drafting', False),
+        patch_editor=payload.get('patch_editor', False),
+        plan_cache=get_cache_directory() / 'plans.db',
+    )
+    notes_feedback = state.notes_feedback.model_dump() if state.notes_feedback else None
+    if output is None:
+        return {'notes_feedback': notes_feedback, 'rfc': None}
+    path_to_rfc = plb.Path(payload['output_directory']) / f'rfc_{path_to_notes.stem}.md'
+    path_to_rfc.write_text(clean_markdown(output.raw))
+    return {'notes_feedback': notes_feedback, 'rfc': str(path_to_rfc)}
+
+
+def _convert(payload: dict[str, Any]) -> dict[str, Any]:
+    path_to_rfc = plb.Path(payload['path_to_rfc'])
+    path_to_adr = path_to_rfc.parent / f'adr_{path_to_rfc.stem}.md'
+    path_to_adr.write_text(
+        clean_markdown(
+            convert_rfc_to_adr(path_to_rfc=path_to_rfc, map_reduce=payload.get('map_reduce'))
+        )
+    )
+    return {'adr': str(path_to_adr)}
+
+
+HANDLERS: dict[JobKind, Handler] = {
+    JobKind.score: _score,
+    JobKind.generate: _generate,
+    JobKind.convert: _convert,
+}
+
+
+class Worker:
+    """
+    Pull jobs from a queue and run them with the handler for their kind.
+
+    While a job runs, a background thread extends its lease every `lease_seconds / 3`
+    seconds. Run one worker per node (or several, to overlap LLM calls); throughput scales
+    with the number of workers up to the rate limits of the API keys they use.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handlers: dict[JobKind, Handler] = HANDLERS,
+        worker_id: str | None = None,
+        poll_interval: float = 5.0,
+    ):
+        self.queue = queue
+        self.handlers = handlers
+        self.worker_id = worker_id or default_worker_id()
+        self.poll_interval = poll_interval
+
+    def _heartbeat(self, job: Job, done: threading.Event) -> None:
+        while not done.wait(self.queue.lease_seconds / 3):
+            if not self.queue.heartbeat(job.id, self.worker_id):
+                logger.warning(f'Worker {self.worker_id} lost the lease on job {job.id}')
+                return
+
+    def run_once(self) -> Job | None:
+        """Claim and run a single job. Returns None if no job was available."""
+        job = self.queue.claim(self.worker_id, kinds=list(self.handlers))
+        if job is None:
+            return None
+        logger.info(f'Running {job.kind.value} job {job.id} (attempt {job.attempts})')
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job, done), daemon=True)
+        heartbeat.start()
+        try:
+            result = self.handlers[job.kind](job.payload)
+        except Exception as e:
+            logger.exception(f'Job {job.id} failed.')
+            self.queue.fail(job.id, self.worker_id, f'{e.__class__.__name__}: {e}')
+        else:
+            if not self.queue.complete(job.id, self.worker_id, result):
+                logger.warning(f'Result of job {job.id} discarded, since its lease expired.')
+        finally:
+            done.set()
+            heartbeat.join()
+        return self.queue.get(job.id)
+
+    def run(
+        self,
+        stop_event: threading.Event | None = None,
+        max_jobs: int | None = None,
+        burst: bool = False,
+    ) -> int:
+        """
+        Process jobs until `stop_event` is set or `max_jobs` jobs ran. With `burst`, stop as
+        soon as the queue has no available jobs. Returns the number of jobs that ran.
+        """
+        stop_event = stop_event or threading.Event()
+        processed = 0
+        logger.info(f'Worker {self.worker_id} polling {self.queue.path}')
+        while not stop_event.is_set() and (max_jobs is None or processed < max_jobs):
+            if self.run_once() is not None:
+                processed += 1
+                continue
+            if burst:
+                break
+            stop_event.wait(self.poll_interval)
+        return processed
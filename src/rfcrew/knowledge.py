@@ -0,0 +1,154 @@
+import re
+import sqlite3
+import logging
+import pathlib as plb
+import datetime as dt
+from collections import Counter
+
+from pydantic import BaseModel, Field
+
+from rfcrew.ranking import tokenize
+from rfcrew.utils import hash_text
+
+logger = logging.getLogger('rfcrew.knowledge')
+
+NO_PRIOR_RESEARCH = 'No prior research available for these notes.'
+
+_URL_PATTERN = re.compile(r'https?://[^\s\)\]>"\'`]+')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    notes_hash TEXT NOT NULL,
+    report_hash TEXT NOT NULL UNIQUE,
+    notes TEXT NOT NULL,
+    report TEXT NOT NULL,
+    sources TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reports_notes_hash ON reports (notes_hash);
+CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5(
+    notes, report, content='reports', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS reports_ai AFTER INSERT ON reports BEGIN
+    INSERT INTO reports_fts (rowid, notes, report) VALUES (new.id, new.notes, new.report);
+END;
+CREATE TRIGGER IF NOT EXISTS reports_ad AFTER DELETE ON reports BEGIN
+    INSERT INTO reports_fts (reports_fts, rowid, notes, report)
+    VALUES ('delete', old.id, old.notes, old.report);
+END;
+"""
+
+
+class ResearchReport(BaseModel):
+    id: int = Field(..., description='Identifier of the report in the knowledge base')
+    notes_hash: str = Field(..., description='SHA-256 hash of the notes the report was made for')
+    report: str = Field(..., description='The research report in markdown format')
+    sources: list[str] = Field(default_factory=list, description='URLs cited in the report')
+    created_at: dt.datetime = Field(..., description='When the report was stored')
+    rank: float | None = Field(default=None, description='BM25 rank (lower is more relevant)')
+
+
+def extract_sources(report: str) -> list[str]:
+    """Return the unique URLs cited in a report, in order of appearance."""
+    return list(dict.fromkeys(url.rstrip('.,;:') for url in _URL_PATTERN.findall(report)))
+
+
+def build_match_query(text: str, max_terms: int = 32) -> str | None:
+    """
+    Turn free text into an FTS5 query that ORs its most frequent meaningful terms.
+    """
+    tokens = tokenize(text)
+    if not tokens:
+        return None
+    terms = [term for term, _ in Counter(tokens).most_common(max_terms)]
+    return ' OR '.join(f'"{term}"' for term in terms)
+
+
+class ResearchKnowledgeBase:
+    """
+    Persistent, lexically indexed store of past research reports.
+
+    Reports are stored in SQLite and indexed with FTS5 so that the research task can
+    retrieve relevant prior findings (ranked with BM25) before searching the web.
+    """
+
+    def __init__(self, path: plb.Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @staticmethod
+    def _to_model(row: sqlite3.Row, rank: float | None = None) -> ResearchReport:
+        return ResearchReport(
+            id=row['id'],
+            notes_hash=row['notes_hash'],
+            report=row['report'],
+            sources=[s for s in row['sources'].split('\n') if s],
+            created_at=dt.datetime.fromisoformat(row['created_at']),
+            rank=rank,
+        )
+
+    def add(self, notes: str, report: str) -> int | None:
+        """
+        Store a research report. Returns the id of the new report, or None if an identical
+        report was already stored.
+        """
+        sources = extract_sources(report)
+        with self._connect() as conn:
+            cursor = conn.execute(
+                'INSERT OR IGNORE INTO reports (notes_hash, report_hash, notes, report, sources, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (
+                    hash_text(notes),
+                    hash_text(report),
+                    notes,
+                    report,
+                    '\n'.join(sources),
+                    dt.datetime.now(dt.timezone.utc).isoformat(),
+                ),
+            )
+            if cursor.rowcount == 0:
+                logger.debug('Research report already present in knowledge base.')
+                return None
+            logger.info(f'Stored research report {cursor.lastrowid} with {len(sources)} sources.')
+            return cursor.lastrowid
+
+    def search(self, query: str, limit: int = 3) -> list[ResearchReport]:
+        """Return up to `limit` stored reports ranked by BM25 relevance to `query`."""
+        match_query = build_match_query(query)
+        if match_query is None:
+            return []
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT reports.*, bm25(reports_fts) AS rank FROM reports_fts '
+                'JOIN reports ON reports.id = reports_fts.rowid '
+                'WHERE reports_fts MATCH ? ORDER BY rank LIMIT ?',
+                (match_query, limit),
+            ).fetchall()
+        logger.debug(f'Knowledge base search returned {len(rows)} reports.')
+        return [self._to_model(row, rank=row['rank']) for row in rows]
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute('SELECT COUNT(*) FROM reports').fetchone()[0]
+
+
+def format_prior_research(reports: list[ResearchReport], max_chars: int = 20_000) -> str:
+    """Render retrieved reports as a markdown block for the research task prompt."""
+    if not reports:
+        return NO_PRIOR_RESEARCH
+    budget = max_chars // len(reports)
+    sections = []
+    for idx, report in enumerate(reports, start=1):
+        body = report.report
+        if len(body) > budget:
+            body = body[:budget].rstrip() + '\n\n[... report truncated ...]'
+        sections.append(f'### Prior research report {idx} ({report.created_at:%Y-%m-%d})\n\n{body}')
+    return '\n\n---\n\n'.join(sections)
@@ -0,0 +1,143 @@
+import copy
+import logging
+import threading
+from typing import Any
+
+import httpx
+from crewai import LLM
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger('rfcrew.llm')
+
+_lock = threading.Lock()
+_llms: dict[tuple, LLM] = {}
+_http_client: httpx.Client | None = None
+
+
+class PoolStats(BaseModel):
+    llm_instances: int = Field(
+        default=0, description='Number of distinct LLM configurations created'
+    )
+    llm_reuses: int = Field(
+        default=0, description='Number of times the clients of a cached LLM were reused'
+    )
+    requests: int = Field(default=0, description='HTTP requests sent through the shared client')
+    connections: int = Field(default=0, description='TCP connections opened by the shared client')
+
+    @property
+    def reused_connections(self) -> int:
+        """Requests that were sent over an already open (kept-alive) connection."""
+        return self.requests - self.connections
+
+
+_stats = PoolStats()
+
+
+class _CountingTransport(httpx.HTTPTransport):
+    """HTTP transport that counts requests and newly opened connections."""
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        trace = request.extensions.get('trace')
+
+        def _trace(event_name: str, info: dict[str, Any]) -> None:
+            if event_name == 'connection.connect_tcp.complete':
+                with _lock:
+                    _stats.connections += 1
+            if trace is not None:
+                trace(event_name, info)
+
+        request.extensions['trace'] = _trace
+        with _lock:
+            _stats.requests += 1
+        return super().handle_request(request)
+
+
+def get_http_client(max_connections: int = 20, keepalive_expiry: float = 60.0) -> httpx.Client:
+    """
+    Return the process-wide HTTP client with a keep-alive connection pool.
+
+    The arguments only apply when the client is first created.
+    """
+    global _http_client
+    with _lock:
+        if _http_client is None or _http_client.is_closed:
+            limits = httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=keepalive_expiry,
+            )
+            _http_client = httpx.Client(
+                transport=_CountingTransport(limits=limits), timeout=httpx.Timeout(600.0)
+            )
+            logger.debug(f'Created shared HTTP client with {max_connections} connections.')
+        return _http_client
+
+
+# LiteLLM providers whose handlers accept a `client=HTTPHandler(...)` argument per request. Other
+# providers (e.g. OpenAI) expect an SDK client instead, so they keep LiteLLM's own clients.
+_HTTP_HANDLER_PROVIDERS = ('gemini', 'vertex_ai')
+
+
+def _share_http_client(llm: LLM) -> None:
+    # Only LiteLLM-backed LLMs forward `additional_params` to `litellm.completion`. Native
+    # provider implementations of newer crewai versions manage their own SDK clients.
+    if type(llm) is not LLM or llm.model.split('/', 1)[0] not in _HTTP_HANDLER_PROVIDERS:
+        return
+    from litellm.llms.custom_httpx.http_handler import HTTPHandler
+
+    llm.additional_params['client'] = HTTPHandler(client=get_http_client())
+
+
+def _agent_copy(llm: LLM) -> LLM:
+    llm = copy.copy(llm)
+    # Token usage is tracked on the instance and crews sum it per agent, so every copy starts
+    # counting from zero. Provider and HTTP clients remain shared with the cached instance.
+    usage = (getattr(llm, '__pydantic_private__', None) or {}).get('_token_usage')
+    if isinstance(usage, dict):
+        llm.__pydantic_private__['_token_usage'] = dict.fromkeys(usage, 0)  # type: ignore[index]
+    return llm
+
+
+def get_llm(model: str, temperature: float = 0.2, **kwargs: Any) -> LLM:
+    """
+    Return an LLM for a model and configuration that shares its clients with other callers.
+
+    The first call for a configuration creates the LLM (and with it the provider client and
+    connection pool). Every call returns a shallow copy of that instance, so agents and threads
+    can set their own attributes (e.g. stop words) and track their own token usage while sending
+    requests through the same clients and kept-alive connections.
+    """
+    key = (model, temperature, *sorted((k, repr(v)) for k, v in kwargs.items()))
+    with _lock:
+        llm = _llms.get(key)
+        if llm is not None:
+            _stats.llm_reuses += 1
+            return _agent_copy(llm)
+    llm = LLM(model=model, temperature=temperature, **kwargs)
+    _share_http_client(llm)
+    with _lock:
+        # Another thread may have created the same LLM in the meantime; keep the first.
+        if key not in _llms:
+            _llms[key] = llm
+            _stats.llm_instances += 1
+            logger.debug(f'Created LLM instance for {model} (temperature={temperature}).')
+        else:
+            _stats.llm_reuses += 1
+        return _agent_copy(_llms[key])
+
+
+def pool_stats() -> PoolStats:
+    """Return a snapshot of the LLM and HTTP connection pool statistics."""
+    with _lock:
+        return _stats.model_copy()
+
+
+def reset() -> None:
+    """Drop all cached LLMs, close the shared HTTP client and reset the statistics."""
+    global _http_client, _stats
+    with _lock:
+        _llms.clear()
+        if _http_client is not None:
+            _http_client.close()
+        _http_client = None
+        _stats = PoolStats()
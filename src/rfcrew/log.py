@@ -0,0 +1,151 @@
+import sys
+import copy
+import json
+import queue
+import atexit
+import logging
+import pathlib as plb
+import datetime as dt
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any
+
+# Maximum length of a formatted log message. Longer messages are cut with a marker.
+DEFAULT_MAX_CHARS = 4_000
+TRUNCATION_MARKER = '… [{omitted} more characters]'
+
+# Attributes of every LogRecord. Anything else was passed with `extra=` and is kept as a field
+# of structured records.
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+_listener: QueueListener | None = None
+_exception_formatter = logging.Formatter()
+
+
+def truncate(text: str, max_chars: int = DEFAULT_MAX_CHARS) -> str:
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars] + TRUNCATION_MARKER.format(omitted=len(text) - max_chars)
+
+
+class Preview:
+    """
+    Log argument that is only converted to a (truncated) string if the record is emitted.
+
+    Use it with %-style arguments, e.g. `logger.debug('Output: %s', Preview(output))`, so that
+    large outputs cost nothing when the log level is disabled.
+    """
+
+    __slots__ = ('value', 'max_chars')
+
+    def __init__(self, value: Any, max_chars: int = 500):
+        self.value = value
+        self.max_chars = max_chars
+
+    def __str__(self) -> str:
+        value = self.value
+        # Outputs of crews and tasks convert to their raw text.
+        text = value if isinstance(value, str) else str(getattr(value, 'raw', value))
+        return truncate(text, self.max_chars)
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects, including any `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': dt.datetime.fromtimestamp(record.created, dt.timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key not in entry:
+                entry[key] = value
+        return json.dumps(entry, default=str)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Queue handler that caps the length of each message before it is handed to the listener.
+
+    Records are formatted in the logging thread, as with `QueueHandler`, but written to the
+    console or file sinks by the listener thread, so that slow sinks never block the caller.
+    """
+
+    def __init__(self, log_queue: queue.SimpleQueue, max_chars: int = DEFAULT_MAX_CHARS):
+        super().__init__(log_queue)
+        self.max_chars = max_chars
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Keep `extra` fields, but drop the arguments and the exception so that no references to
+        # large objects end up on the queue. Only the message is capped: the traceback is
+        # rendered in full to `exc_text`, which formatters append to (or put next to) it.
+        message = truncate(record.getMessage(), self.max_chars)
+        exc_text = record.exc_text
+        if record.exc_info and not exc_text:
+            exc_text = _exception_formatter.formatException(record.exc_info)
+        record = copy.copy(record)
+        record.msg = record.message = message
+        record.args = None
+        record.exc_info = None
+        record.exc_text = exc_text
+        return record
+
+
+def configure_logging(
+    verbose: bool = False,
+    log_file: plb.Path | None = None,
+    json_lines: bool = False,
+    max_chars: int = DEFAULT_MAX_CHARS,
+) -> None:
+    """
+    Send rfcrew logs through a queue to the console and, optionally, a file sink.
+
+    The console shows warnings, or everything with `verbose`. The file sink receives info
+    messages, or everything with `verbose`, as plain text or as JSON lines.
+    """
+    global _listener
+    stop_logging()
+    level = logging.DEBUG if verbose else logging.INFO
+    console = logging.StreamHandler(sys.stderr)
+    console.setLevel(logging.DEBUG if verbose else logging.WARNING)
+    console.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    handlers: list[logging.Handler] = [console]
+    if log_file is not None:
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+        sink = logging.FileHandler(log_file, encoding='utf-8')
+        sink.setLevel(level)
+        sink.setFormatter(
+            JsonFormatter()
+            if json_lines
+            else logging.Formatter(
+                '%(asctime)s %(levelname)s %(name)s [%(threadName)s]: %(message)s'
+            )
+        )
+        handlers.append(sink)
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger('rfcrew')
+    # Records below this level are dropped before their message is formatted.
+    root.setLevel(min(handler.level for handler in handlers))
+    root.handlers = [BoundedQueueHandler(log_queue, max_chars=max_chars)]
+    root.propagate = False
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Flush queued records to their sinks and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
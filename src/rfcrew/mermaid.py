@@ -0,0 +1,280 @@
+import re
+import logging
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger('rfcrew.mermaid')
+
+_BLOCK_PATTERN = re.compile(r'```mermaid[ \t]*\n(.*?)```', re.DOTALL)
+_FLOWCHART_HEADER = re.compile(r'^(graph|flowchart)(\s+(TD|TB|BT|RL|LR))?\s*;?$')
+_OTHER_HEADERS = (
+    'sequenceDiagram',
+    'classDiagram',
+    'stateDiagram',
+    'stateDiagram-v2',
+    'erDiagram',
+    'gantt',
+    'pie',
+    'journey',
+    'gitGraph',
+    'mindmap',
+    'timeline',
+    'quadrantChart',
+    'C4Context',
+    'C4Container',
+    'C4Component',
+)
+# Node ids may contain `-`, but not the start of a link such as `-->` or `-.->`.
+_NODE_ID = re.compile(r'"[^"]+"|[A-Za-z0-9_](?:[\w.]|-(?![-.>]))*')
+# Node shapes, longest delimiters first so that e.g. `((` is not read as `(`.
+_SHAPES = [
+    ('(((', ')))'),
+    ('([', '])'),
+    ('[[', ']]'),
+    ('[(', ')]'),
+    ('((', '))'),
+    ('{{', '}}'),
+    ('[/', '/]'),
+    ('[\\', '\\]'),
+    ('[/', '\\]'),
+    ('[\\', '/]'),
+    ('>', ']'),
+    ('[', ']'),
+    ('(', ')'),
+    ('{', '}'),
+]
+_LINK_PATTERN = re.compile(
+    r'\s*(<?(?:-{2,}|={2,}|-\.+-)(?:>|x|o)?|<?-\.+->|~~~)'
+    r'(?:\|(?P<label>[^|]*)\|)?\s*'
+)
+_TEXT_LINK_PATTERN = re.compile(r'\s*(?:--|==|-\.)\s+[^-=>]+?\s+(?:-->|==>|\.->|---|===)\s*')
+_FORBIDDEN_IN_LABEL = set('()[]{}|')
+_SEQUENCE_MESSAGE = re.compile(
+    r'^(?P<from>[^\s:-][^:]*?)\s*(->>|-->>|->|-->|-x|--x|-\)|--\))\s*[+-]?(?P<to>[^:]+?)\s*:\s*.*$'
+)
+_SEQUENCE_BLOCKS = ('loop', 'alt', 'opt', 'par', 'critical', 'break', 'rect', 'box')
+_SEQUENCE_STATEMENTS = re.compile(
+    r'^(participant|actor|autonumber|note\s|activate\s|deactivate\s|title\s|create\s|destroy\s|'
+    r'links?\s)',
+    re.IGNORECASE,
+)
+_FLOWCHART_STATEMENTS = re.compile(r'^(classDef|class|style|linkStyle|click|direction)\s')
+
+
+class MermaidError(BaseModel):
+    line: int = Field(..., description='Line number in the diagram (1-based)')
+    message: str = Field(..., description='Description of the problem')
+
+    def __str__(self) -> str:
+        return f'line {self.line}: {self.message}'
+
+
+class MermaidValidation(BaseModel):
+    diagram: str | None = Field(default=None, description='The diagram code that was validated')
+    errors: list[MermaidError] = Field(default_factory=list)
+
+    @property
+    def valid(self) -> bool:
+        return not self.errors
+
+    def feedback(self) -> str:
+        lines = '\n'.join(f'- {error}' for error in self.errors)
+        return (
+            f'The Mermaid diagram is invalid and cannot be rendered:\n{lines}\n'
+            'Fix these errors and return the complete, corrected diagram in a single '
+            '```mermaid code block.'
+        )
+
+
+def extract_diagram(text: str) -> str | None:
+    """Return the code of the first ```mermaid block in `text`."""
+    match = _BLOCK_PATTERN.search(text)
+    return match.group(1) if match else None
+
+
+def _parse_label(text: str, pos: int, close: str, lineno: int) -> tuple[int, MermaidError | None]:
+    """Parse a node label starting at `pos`. Returns the position after `close`."""
+    rest = text[pos:]
+    if rest.lstrip().startswith('"'):
+        start = pos + len(rest) - len(rest.lstrip()) + 1
+        end_quote = text.find('"', start)
+        if end_quote == -1:
+            return len(text), MermaidError(line=lineno, message='Unterminated quoted label.')
+        after = text[end_quote + 1 :]
+        if not after.lstrip().startswith(close):
+            return len(text), MermaidError(
+                line=lineno, message=f'Expected "{close}" after quoted label.'
+            )
+        return end_quote + 1 + (len(after) - len(after.lstrip())) + len(close), None
+    end = text.find(close, pos)
+    if end == -1:
+        return len(text), MermaidError(line=lineno, message=f'Missing "{close}" to close label.')
+    label = text[pos:end]
+    forbidden = sorted(set(label) & _FORBIDDEN_IN_LABEL)
+    if forbidden or '"' in label:
+        chars = ' '.join(forbidden) or '"'
+        return len(text), MermaidError(
+            line=lineno,
+            message=f'Label "{label}" contains {chars}; labels with special characters must be '
+            'enclosed in double quotes, e.g. A["My (label)"].',
+        )
+    return end + len(close), None
+
+
+def _parse_node(text: str, pos: int, lineno: int) -> tuple[int, MermaidError | None]:
+    match = _NODE_ID.match(text, pos)
+    if match is None:
+        snippet = text[pos : pos + 20]
+        return len(text), MermaidError(line=lineno, message=f'Expected a node id at "{snippet}".')
+    pos = match.end()
+    for open_, close in _SHAPES:
+        if text.startswith(open_, pos):
+            pos, error = _parse_label(text, pos + len(open_), close, lineno)
+            if error:
+                return pos, error
+            break
+    if text.startswith(':::', pos):
+        class_match = re.compile(r':::\w+').match(text, pos)
+        pos = class_match.end() if class_match else pos + 3
+    return pos, None
+
+
+def _validate_flowchart_line(line: str, lineno: int) -> list[MermaidError]:
+    pos = 0
+    line = line.rstrip(';').rstrip()
+    while True:
+        pos, error = _parse_node(line, pos, lineno)
+        if error:
+            return [error]
+        # Node groups such as `A & B --> C`.
+        ampersand = re.compile(r'\s*&\s*').match(line, pos)
+        if ampersand:
+            pos = ampersand.end()
+            continue
+        if pos >= len(line):
+            return []
+        link = _TEXT_LINK_PATTERN.match(line, pos) or _LINK_PATTERN.match(line, pos)
+        if link is None or link.end() == pos:
+            return [
+                MermaidError(
+                    line=lineno, message=f'Unexpected text "{line[pos:].strip()}" after node.'
+                )
+            ]
+        label = link.groupdict().get('label')
+        if label and '"' not in label and set(label) & _FORBIDDEN_IN_LABEL:
+            return [MermaidError(line=lineno, message=f'Link label "{label}" must be quoted.')]
+        pos = link.end()
+        if pos >= len(line):
+            return [MermaidError(line=lineno, message='Link without a target node.')]
+
+
+def _validate_flowchart(lines: list[tuple[int, str]]) -> list[MermaidError]:
+    errors = []
+    depth = 0
+    for lineno, line in lines:
+        if line.startswith('subgraph'):
+            depth += 1
+            continue
+        if line == 'end':
+            depth -= 1
+            if depth < 0:
+                errors.append(MermaidError(line=lineno, message='"end" without "subgraph".'))
+                depth = 0
+            continue
+        if _FLOWCHART_STATEMENTS.match(line):
+            continue
+        errors.extend(_validate_flowchart_line(line, lineno))
+    if depth > 0:
+        errors.append(MermaidError(line=lines[-1][0], message=f'{depth} unclosed "subgraph".'))
+    return errors
+
+
+def _validate_sequence(lines: list[tuple[int, str]]) -> list[MermaidError]:
+    errors = []
+    stack: list[str] = []
+    for lineno, line in lines:
+        keyword = line.split()[0]
+        if keyword in _SEQUENCE_BLOCKS:
+            stack.append(keyword)
+        elif keyword == 'end':
+            if not stack:
+                errors.append(MermaidError(line=lineno, message='"end" without an open block.'))
+            else:
+                stack.pop()
+        elif keyword in ('else', 'and'):
+            if not stack or stack[-1] not in ('alt', 'par', 'critical'):
+                errors.append(MermaidError(line=lineno, message=f'"{keyword}" outside a block.'))
+        elif not (_SEQUENCE_STATEMENTS.match(line) or _SEQUENCE_MESSAGE.match(line)):
+            errors.append(
+                MermaidError(
+                    line=lineno,
+                    message=f'Cannot parse "{line}"; messages look like "A->>B: text".',
+                )
+            )
+    if stack:
+        errors.append(MermaidError(line=lines[-1][0], message=f'Unclosed "{stack[-1]}" block.'))
+    return errors
+
+
+def validate_mermaid(diagram: str) -> MermaidValidation:
+    """
+    Check the syntax of a Mermaid diagram offline.
+
+    Flowcharts and sequence diagrams are checked statement by statement. For other diagram
+    types only the diagram header is checked.
+    """
+    lines = [
+        (lineno, line.strip())
+        for lineno, line in enumerate(diagram.splitlines(), start=1)
+        if line.strip() and not line.strip().startswith('%%')
+    ]
+    if not lines:
+        return MermaidValidation(diagram=diagram, errors=[MermaidError(line=1, message='Empty.')])
+    header_lineno, header = lines[0]
+    if _FLOWCHART_HEADER.match(header):
+        errors = _validate_flowchart(lines[1:])
+    elif header == 'sequenceDiagram':
+        errors = _validate_sequence(lines[1:])
+    elif header.split()[0] in _OTHER_HEADERS:
+        errors = []
+    else:
+        errors = [MermaidError(line=header_lineno, message=f'Unknown diagram type "{header}".')]
+    return MermaidValidation(diagram=diagram, errors=errors)
+
+
+def validate_markdown(text: str) -> MermaidValidation:
+    """Validate the Mermaid diagram in a markdown text, which must contain one."""
+    diagram = extract_diagram(text)
+    if diagram is None:
+        return MermaidValidation(
+            errors=[MermaidError(line=1, message='No ```mermaid code block found in the output.')]
+        )
+    return validate_mermaid(diagram)
+
+
+class MermaidGuardrail:
+    """
+    Task guardrail that validates the Mermaid diagram in a task's output.
+
+    On failure the task is re-run by crewai with the parser errors as feedback. After
+    `max_retries` failed retries, the output is accepted with the errors noted in a markdown
+    comment, so that a broken diagram never fails the whole crew.
+    """
+
+    def __init__(self, max_retries: int = 2):
+        self.max_retries = max_retries
+        self._failures = 0
+
+    def __call__(self, output: Any) -> tuple[bool, Any]:
+        validation = validate_markdown(output.raw)
+        if validation.valid:
+            if self._failures:
+                logger.info(f'Mermaid diagram valid after {self._failures} retries.')
+            return True, output.raw
+        self._failures += 1
+        logger.warning(f'Invalid Mermaid diagram (attempt {self._failures}): {validation.errors}')
+        if self._failures > self.max_retries:
+            errors = '; '.join(str(e) for e in validation.errors)
+            return True, f'{output.raw}\n\n<!-- Mermaid validation failed: {errors} -->'
+        return False, validation.feedback()
@@ -0,0 +1,163 @@
+import re
+import json
+import time
+import sqlite3
+import logging
+import pathlib as plb
+import datetime as dt
+from typing import Any
+
+from crewai import Task
+from crewai.utilities.planning_handler import CrewPlanner
+from crewai.utilities.string_utils import interpolate_only
+from pydantic import BaseModel, Field
+
+from rfcrew.utils import hash_text
+
+logger = logging.getLogger('rfcrew.planning')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS plans (
+    key TEXT PRIMARY KEY,
+    planning_llm TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    plans TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    last_used_at TEXT NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS plans_created ON plans (created_at);
+"""
+
+# Placeholders such as `{notes}` that crewai would interpolate when the task runs.
+_PLACEHOLDER = re.compile(r'\{([A-Za-z_][A-Za-z0-9_\-]*)\}')
+
+
+class PlanEntry(BaseModel):
+    key: str
+    planning_llm: str
+    scope: str = Field(..., description='"config", or "notes" if the plans are specific to notes')
+    tasks: list[str] = Field(..., description='Names of the planned tasks')
+    created_at: str
+    last_used_at: str
+    hits: int = Field(default=0, description='Number of times the plans were reused')
+
+
+def neutralize_placeholders(plan: str) -> str:
+    """
+    Replace `{name}` in a plan by `name`, so that the plan can be added to a task description
+    without crewai trying to interpolate it.
+    """
+    return _PLACEHOLDER.sub(r'`\1`', plan)
+
+
+def plan_key(tasks: dict[str, Task], planning_llm: str, notes: str | None = None) -> str:
+    """
+    Hash of everything the planner sees: the task templates, their agents and tools, and the
+    planning LLM. With `notes`, the key is specific to those notes.
+    """
+    parts = [planning_llm]
+    for name, task in tasks.items():
+        agent = task.agent
+        parts.extend(
+            [
+                name,
+                task.description,
+                task.expected_output,
+                agent.role if agent else '',
+                agent.goal if agent else '',
+                ','.join(sorted(tool.name for tool in (agent.tools if agent else None) or [])),
+            ]
+        )
+    if notes is not None:
+        parts.append(hash_text(notes.rstrip()))
+    return hash_text('\n'.join(parts))
+
+
+def create_plans(
+    tasks: dict[str, Task], planning_llm: Any, inputs: dict[str, Any] | None = None
+) -> dict[str, str]:
+    """
+    Create a step-by-step plan per task with crewai's planner, as crewai planning does.
+
+    With `inputs`, the planner sees the interpolated tasks; otherwise the plans are based on
+    the task templates, so they do not depend on the notes.
+    """
+    planned = [
+        task.model_copy(
+            update={
+                'description': interpolate_only(task.description, inputs),
+                'expected_output': interpolate_only(task.expected_output, inputs),
+            }
+        )
+        if inputs
+        else task
+        for task in tasks.values()
+    ]
+    result = CrewPlanner(tasks=planned, planning_agent_llm=planning_llm)._handle_crew_planning()
+    names = list(tasks)
+    plans: dict[str, str] = {}
+    for idx, step in enumerate(result.list_of_plans_per_task):
+        # Older crewai versions return the plans in task order, without task numbers.
+        number = getattr(step, 'task_number', idx + 1)
+        if 1 <= number <= len(names) and names[number - 1] not in plans:
+            plans[names[number - 1]] = neutralize_placeholders(step.plan)
+    missing = [name for name in names if name not in plans]
+    if missing:
+        logger.warning(f'No plan was created for tasks: {", ".join(missing)}')
+    return plans
+
+
+class PlanCache:
+    """
+    Persistent cache of task plans, keyed by `plan_key`.
+    """
+
+    def __init__(self, path: plb.Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def get(self, key: str) -> dict[str, str] | None:
+        with self._connect() as conn:
+            row = conn.execute('SELECT plans FROM plans WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                'UPDATE plans SET hits = hits + 1, last_used_at = ? WHERE key = ?',
+                (dt.datetime.now(dt.timezone.utc).isoformat(), key),
+            )
+        return json.loads(row['plans'])
+
+    def put(self, key: str, plans: dict[str, str], planning_llm: str, scope: str) -> None:
+        now = dt.datetime.now(dt.timezone.utc).isoformat()
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO plans '
+                '(key, planning_llm, scope, plans, created_at, last_used_at, hits) '
+                'VALUES (?, ?, ?, ?, ?, ?, 0)',
+                (key, planning_llm, scope, json.dumps(plans), now, now),
+            )
+
+    def entries(self) -> list[PlanEntry]:
+        with self._connect() as conn:
+            rows = conn.execute('SELECT * FROM plans ORDER BY created_at DESC').fetchall()
+        return [PlanEntry(**{**dict(row), 'tasks': list(json.loads(row['plans']))}) for row in rows]
+
+    def clear(self, older_than: float | None = None) -> int:
+        """Remove all plans, or those created more than `older_than` seconds ago."""
+        with self._connect() as conn:
+            if older_than is None:
+                cursor = conn.execute('DELETE FROM plans')
+            else:
+                cutoff = dt.datetime.fromtimestamp(time.time() - older_than, dt.timezone.utc)
+                cursor = conn.execute(
+                    'DELETE FROM plans WHERE created_at < ?', (cutoff.isoformat(),)
+                )
+            return cursor.rowcount
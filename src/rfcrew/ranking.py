@@ -0,0 +1,52 @@
+import re
+import math
+from collections import Counter
+
+_URL_PATTERN = re.compile(r'https?://[^\s\)\]>"\'`]+')
+_TOKEN_PATTERN = re.compile(r'[a-zA-Z][a-zA-Z0-9_]{2,}')
+_STOPWORDS = frozenset(
+    'the and for are but not you all any can had her was one our out has have with this that '
+    'from they will would there their what about which when make like than then them these '
+    'some into could should other only also more most such very just over does use used using '
+    'need needs want wants how why who where while been being each its itself may must'.split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase the meaningful terms in a text, ignoring URLs, short tokens and stopwords."""
+    return [
+        token.lower()
+        for token in _TOKEN_PATTERN.findall(_URL_PATTERN.sub(' ', text))
+        if token.lower() not in _STOPWORDS
+    ]
+
+
+def bm25_scores(documents: list[str], query: str, k1: float = 1.5, b: float = 0.75) -> list[float]:
+    """
+    Score every document against a query with Okapi BM25. Higher is more relevant.
+
+    Document frequencies are computed over `documents` themselves, so scores are only
+    comparable within one call.
+    """
+    query_terms = set(tokenize(query))
+    tokenized = [tokenize(document) for document in documents]
+    if not query_terms or not tokenized:
+        return [0.0] * len(documents)
+    average_length = sum(len(tokens) for tokens in tokenized) / len(tokenized) or 1.0
+    frequencies = Counter(term for tokens in tokenized for term in set(tokens) & query_terms)
+    idf = {
+        term: math.log(1 + (len(tokenized) - df + 0.5) / (df + 0.5))
+        for term, df in frequencies.items()
+    }
+    scores = []
+    for tokens in tokenized:
+        counts = Counter(tokens)
+        norm = k1 * (1 - b + b * len(tokens) / average_length)
+        scores.append(
+            sum(
+                weight * counts[term] * (k1 + 1) / (counts[term] + norm)
+                for term, weight in idf.items()
+                if counts[term]
+            )
+        )
+    return scores
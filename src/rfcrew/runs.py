@@ -0,0 +1,300 @@
+import os
+import json
+import uuid
+import sqlite3
+import logging
+import tempfile
+import pathlib as plb
+import datetime as dt
+
+from crewai import CrewOutput
+from pydantic import BaseModel, Field
+
+from rfcrew.crews.assessor import ScoreAgentOutputModel
+from rfcrew.utils import clean_markdown, hash_text, read_yaml
+
+logger = logging.getLogger('rfcrew.runs')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    notes_path TEXT NOT NULL,
+    notes_hash TEXT NOT NULL,
+    config_hash TEXT NOT NULL,
+    input_hash TEXT NOT NULL,
+    models TEXT NOT NULL,
+    status TEXT NOT NULL,
+    rfc TEXT,
+    score INTEGER,
+    justification TEXT,
+    latency REAL NOT NULL,
+    total_tokens INTEGER
+);
+CREATE INDEX IF NOT EXISTS runs_input ON runs (input_hash, status, created_at);
+CREATE INDEX IF NOT EXISTS runs_notes ON runs (notes_hash, created_at);
+CREATE INDEX IF NOT EXISTS runs_created ON runs (created_at);
+CREATE TABLE IF NOT EXISTS task_outputs (
+    run_id TEXT NOT NULL REFERENCES runs (id),
+    position INTEGER NOT NULL,
+    task_name TEXT NOT NULL,
+    agent TEXT,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (run_id, position)
+);
+"""
+
+
+class ArtifactStore:
+    """
+    Content-addressed store of documents. Each document is stored once, under its hash.
+    """
+
+    def __init__(self, directory: plb.Path):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path(self, digest: str) -> plb.Path:
+        return self.directory / digest[:2] / digest[2:]
+
+    def put(self, text: str) -> str:
+        digest = hash_text(text)
+        path = self.path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first so readers never see a partial artifact.
+            with tempfile.NamedTemporaryFile('w', dir=path.parent, delete=False) as f:
+                f.write(text)
+            os.replace(f.name, path)
+        return digest
+
+    def get(self, digest: str) -> str:
+        return self.path(digest).read_text()
+
+
+class RunInputs(BaseModel):
+    notes: str = Field(..., description='Notes the RFC is generated from')
+    notes_path: plb.Path = Field(..., description='Path to the notes file')
+    agents_config: plb.Path = Field(..., description='Path to the agents configuration file')
+    tasks_config: plb.Path = Field(..., description='Path to the tasks configuration file')
+    planning_llm: str | None = Field(default=None, description='LLM to use for planning')
+    knowledge_base: bool = Field(default=False, description='Whether prior research is reused')
+    parallel_drafting: bool = False
+    patch_editor: bool = False
+    plans_per_notes: bool = False
+
+    @property
+    def notes_hash(self) -> str:
+        return hash_text(self.notes.rstrip())
+
+    @property
+    def config_hash(self) -> str:
+        """Hash of everything other than the notes that determines the generated RFC."""
+        return hash_text(
+            '\n'.join(
+                [
+                    self.agents_config.read_text(),
+                    self.tasks_config.read_text(),
+                    str(self.planning_llm),
+                    str(self.knowledge_base),
+                    str(self.parallel_drafting),
+                    str(self.patch_editor),
+                    str(self.plans_per_notes),
+                ]
+            )
+        )
+
+    @property
+    def input_hash(self) -> str:
+        return hash_text(f'{self.notes_hash}:{self.config_hash}')
+
+    @property
+    def models(self) -> list[str]:
+        models = {
+            config['llm'] for config in read_yaml(self.agents_config).values() if 'llm' in config
+        }
+        if self.planning_llm:
+            models.add(self.planning_llm)
+        return sorted(models)
+
+
+class TaskArtifact(BaseModel):
+    task_name: str
+    agent: str | None = None
+    digest: str = Field(..., description='Digest of the task output in the artifact store')
+
+
+class Run(BaseModel):
+    id: str
+    created_at: str
+    notes_path: plb.Path
+    notes_hash: str
+    config_hash: str
+    input_hash: str
+    models: list[str]
+    status: str = Field(
+        ...,
+        description='"done", "partial" if stages were skipped because of a deadline, '
+        '"failed" if the deadline was reached before a draft was written, or "rejected" if the '
+        'notes scored too low',
+    )
+    rfc: str | None = Field(default=None, description='Digest of the RFC in the artifact store')
+    score: int | None = Field(default=None, description='Score of the notes')
+    justification: str | None = None
+    latency: float = Field(..., description='Wall time of the run in seconds')
+    total_tokens: int | None = None
+    tasks: list[TaskArtifact] = Field(default_factory=list)
+
+
+class RunStore:
+    """
+    Index of generation runs in SQLite, with their RFCs and task outputs in an artifact store.
+
+    Runs are indexed by a hash of their inputs (notes and configuration), so that the RFC of
+    an earlier run with identical inputs can be found without a scan.
+    """
+
+    def __init__(self, directory: plb.Path):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.artifacts = ArtifactStore(directory / 'objects')
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.directory / 'index.db')
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _run(self, conn: sqlite3.Connection, row: sqlite3.Row) -> Run:
+        tasks = conn.execute(
+            'SELECT task_name, agent, digest FROM task_outputs WHERE run_id = ? ORDER BY position',
+            (row['id'],),
+        ).fetchall()
+        return Run(
+            **{**dict(row), 'models': json.loads(row['models'])},
+            tasks=[TaskArtifact(**dict(task)) for task in tasks],
+        )
+
+    def record(
+        self,
+        inputs: RunInputs,
+        notes_feedback: ScoreAgentOutputModel | None,
+        output: CrewOutput | None,
+        latency: float,
+        partial: bool = False,
+        failed: bool = False,
+    ) -> Run:
+        """
+        Store the outputs of a run and add it to the index. Partial and failed runs (cut short
+        by a deadline) are not returned by `lookup`.
+        """
+        tasks = [
+            TaskArtifact(
+                task_name=task_output.name or f'task_{idx}',
+                agent=task_output.agent,
+                digest=self.artifacts.put(task_output.raw),
+            )
+            for idx, task_output in enumerate(output.tasks_output if output else [])
+        ]
+        if failed:
+            status = 'failed'
+        elif output is None:
+            status = 'rejected'
+        else:
+            status = 'partial' if partial else 'done'
+        run = Run(
+            id=f'{dt.datetime.now(dt.timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}',
+            created_at=dt.datetime.now(dt.timezone.utc).isoformat(),
+            notes_path=inputs.notes_path,
+            notes_hash=inputs.notes_hash,
+            config_hash=inputs.config_hash,
+            input_hash=inputs.input_hash,
+            models=inputs.models,
+            status=status,
+            rfc=self.artifacts.put(clean_markdown(output.raw)) if output else None,
+            score=notes_feedback.score if notes_feedback else None,
+            justification=notes_feedback.justification if notes_feedback else None,
+            latency=latency,
+            total_tokens=output.token_usage.total_tokens if output and output.token_usage else None,
+            tasks=tasks,
+        )
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO runs (id, created_at, notes_path, notes_hash, config_hash, input_hash, '
+                'models, status, rfc, score, justification, latency, total_tokens) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (
+                    run.id,
+                    run.created_at,
+                    str(run.notes_path),
+                    run.notes_hash,
+                    run.config_hash,
+                    run.input_hash,
+                    json.dumps(run.models),
+                    run.status,
+                    run.rfc,
+                    run.score,
+                    run.justification,
+                    run.latency,
+                    run.total_tokens,
+                ),
+            )
+            conn.executemany(
+                'INSERT INTO task_outputs (run_id, position, task_name, agent, digest) '
+                'VALUES (?, ?, ?, ?, ?)',
+                [
+                    (run.id, idx, task.task_name, task.agent, task.digest)
+                    for idx, task in enumerate(tasks)
+                ],
+            )
+        logger.debug(f'Recorded run {run.id} for {run.notes_path}')
+        return run
+
+    def lookup(self, inputs: RunInputs) -> Run | None:
+        """Return the latest completed run with the same notes and configuration, if any."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM runs WHERE input_hash = ? AND status = 'done' "
+                'ORDER BY created_at DESC LIMIT 1',
+                (inputs.input_hash,),
+            ).fetchone()
+            return self._run(conn, row) if row else None
+
+    def get(self, run_id: str) -> Run | None:
+        """Return a run by its id, or by a prefix of its id if that is unique."""
+        with self._connect() as conn:
+            # A range instead of LIKE, so that the primary key index is used.
+            rows = conn.execute(
+                'SELECT * FROM runs WHERE id >= ? AND id < ? LIMIT 2',
+                (run_id, run_id + '\uffff'),
+            ).fetchall()
+            return self._run(conn, rows[0]) if len(rows) == 1 else None
+
+    def latest(self, limit: int = 20, notes: str | None = None) -> list[Run]:
+        """Return the latest runs, optionally only those for the given notes."""
+        with self._connect() as conn:
+            if notes is None:
+                rows = conn.execute(
+                    'SELECT * FROM runs ORDER BY created_at DESC LIMIT ?', (limit,)
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    'SELECT * FROM runs WHERE notes_hash = ? ORDER BY created_at DESC LIMIT ?',
+                    (hash_text(notes.rstrip()), limit),
+                ).fetchall()
+            return [self._run(conn, row) for row in rows]
+
+    def export(self, run: Run, directory: plb.Path) -> list[plb.Path]:
+        """Write the RFC, the task outputs and the metadata of a run to a directory."""
+        directory.mkdir(parents=True, exist_ok=True)
+        paths = []
+        if run.rfc:
+            paths.append(directory / 'rfc.md')
+            paths[-1].write_text(self.artifacts.get(run.rfc))
+        for idx, task in enumerate(run.tasks, start=1):
+            paths.append(directory / f'{idx:02d}_{task.task_name}.md')
+            paths[-1].write_text(self.artifacts.get(task.digest))
+        paths.append(directory / 'run.json')
+        paths[-1].write_text(run.model_dump_json(indent=2))
+        return paths
@@ -0,0 +1,263 @@
+import re
+import logging
+from typing import Any
+
+from bs4 import BeautifulSoup, Tag
+from crewai_tools import ScrapeWebsiteTool
+from pydantic import BaseModel, Field
+
+from rfcrew.ranking import bm25_scores
+
+try:
+    from crewai_tools.security.safe_requests import safe_get as _get
+except ImportError:  # crewai-tools < 1.0
+    from requests import get as _get
+
+logger = logging.getLogger('rfcrew.scraping')
+
+# Roughly four characters per token for English prose.
+CHARS_PER_TOKEN = 4
+
+_BOILERPLATE_TAGS = (
+    'script',
+    'style',
+    'noscript',
+    'template',
+    'iframe',
+    'svg',
+    'canvas',
+    'form',
+    'button',
+    'input',
+    'select',
+    'nav',
+    'header',
+    'footer',
+    'aside',
+)
+# Class, id and role tokens (or their `-`/`_` separated parts) of boilerplate elements.
+_BOILERPLATE_WORDS = frozenset(
+    {
+        'cookie',
+        'cookies',
+        'consent',
+        'gdpr',
+        'banner',
+        'navbar',
+        'nav',
+        'menu',
+        'breadcrumb',
+        'breadcrumbs',
+        'footer',
+        'sidebar',
+        'social',
+        'share',
+        'advert',
+        'ad',
+        'ads',
+        'promo',
+        'newsletter',
+        'subscribe',
+        'popup',
+        'modal',
+        'skip-link',
+    }
+)
+_MAIN_CONTENT = ('main', 'article')
+# Elements with more than this share of the page text are wrappers, not boilerplate.
+_MAX_BOILERPLATE_SHARE = 0.5
+_BLOCK_TAGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'li', 'pre', 'blockquote', 'tr', 'dt', 'dd')
+
+
+class Passage(BaseModel):
+    index: int = Field(..., description='Position of the passage in the page')
+    text: str = Field(..., description='Text of the passage, starting with its heading if any')
+    score: float = Field(default=0.0, description='BM25 relevance to the query')
+
+
+def fetch_html(
+    url: str, headers: dict[str, str] | None = None, cookies: dict[str, str] | None = None
+) -> str:
+    """Download a web page and return its HTML."""
+    page = _get(url, timeout=15, headers=headers, cookies=cookies or {})
+    page.encoding = page.apparent_encoding
+    return page.text
+
+
+def _is_boilerplate(tag: Tag) -> bool:
+    if tag.attrs is None:
+        return False
+    tokens = [
+        *(tag.get('class') or []),
+        *str(tag.get('id') or '').split(),
+        *str(tag.get('role') or '').split(),
+    ]
+    return any(
+        token in _BOILERPLATE_WORDS or _BOILERPLATE_WORDS.intersection(re.split(r'[-_]', token))
+        for token in (token.lower() for token in tokens)
+    )
+
+
+def _contains_main_content(tag: Tag) -> bool:
+    return tag.find(_MAIN_CONTENT) is not None or tag.find(role='main') is not None
+
+
+def extract_main_text(html: str) -> str:
+    """
+    Extract the main content of an HTML page as lightly formatted text.
+
+    Scripts, navigation, headers, footers, cookie banners and similar boilerplate are
+    removed. If the page marks its main content (`<main>`, `<article>`, `role="main"`), only
+    that is kept. Headings are rendered as markdown headings and blocks are separated by
+    blank lines so the text can be split into passages.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    for tag in soup.find_all(_BOILERPLATE_TAGS):
+        if not _contains_main_content(tag):
+            tag.decompose()
+    page_chars = len(soup.get_text(strip=True))
+    for tag in soup.find_all(_is_boilerplate):
+        # Wrappers such as `<div class="has-sidebar">` around the content are kept.
+        if (
+            tag.decomposed
+            or tag.name in ('html', 'body', *_MAIN_CONTENT)
+            or _contains_main_content(tag)
+            or len(tag.get_text(strip=True)) > _MAX_BOILERPLATE_SHARE * page_chars
+        ):
+            continue
+        tag.decompose()
+    root = soup.find('main') or soup.find('article') or soup.find(role='main') or soup
+
+    blocks: list[str] = []
+    seen: set[str] = set()
+    for tag in root.find_all(_BLOCK_TAGS):
+        if tag.name == 'pre':
+            text = tag.get_text()
+        elif tag.find(_BLOCK_TAGS):
+            # Nested blocks are emitted on their own; only keep this block's own text.
+            text = ' '.join(tag.find_all(string=True, recursive=False))
+        else:
+            text = tag.get_text(' | ' if tag.name == 'tr' else ' ')
+        text = text.strip('\n') if tag.name == 'pre' else re.sub(r'\s+', ' ', text).strip()
+        if not text or text in seen:
+            continue
+        seen.add(text)
+        if tag.name[0] == 'h' and tag.name[1:].isdigit():
+            text = f'{"#" * int(tag.name[1])} {text}'
+        elif tag.name == 'li':
+            text = f'* {text}'
+        blocks.append(text)
+    if not blocks:
+        # Pages built from bare <div>s have no block tags; fall back to their text.
+        text = root.get_text('\n')
+        blocks = [line.strip() for line in text.splitlines() if line.strip()]
+    return '\n\n'.join(blocks)
+
+
+def split_passages(text: str, max_chars: int = 1_200) -> list[Passage]:
+    """
+    Split extracted text into passages of at most roughly `max_chars` characters.
+
+    A heading starts a new passage, and every passage is prefixed with the most recent
+    heading so it can be understood on its own.
+    """
+    passages: list[Passage] = []
+    heading = ''
+    buffer: list[str] = []
+
+    def _flush() -> None:
+        if any(not block.startswith('#') for block in buffer):
+            passages.append(Passage(index=len(passages), text='\n\n'.join(buffer)))
+
+    for block in text.split('\n\n'):
+        is_heading = block.startswith('#')
+        size = sum(len(b) + 2 for b in buffer)
+        if buffer and (is_heading or size + len(block) > max_chars):
+            _flush()
+            buffer = [heading] if heading and not is_heading else []
+        if is_heading:
+            heading = block
+        buffer.append(block)
+    _flush()
+    return passages
+
+
+def select_passages(
+    text: str, query: str, max_tokens: int = 2_000, max_passage_chars: int = 1_200
+) -> list[Passage]:
+    """
+    Return the passages of `text` most relevant to `query`, in page order, within a budget of
+    `max_tokens` tokens.
+
+    Passages are ranked with BM25 and passages that do not match the query are dropped. If
+    no passage matches the query, the first passages of the page are returned.
+    """
+    passages = split_passages(text, max_chars=max_passage_chars)
+    for passage, score in zip(passages, bm25_scores([p.text for p in passages], query)):
+        passage.score = score
+    ranked = sorted((p for p in passages if p.score > 0), key=lambda p: (-p.score, p.index))
+    if not ranked:
+        ranked = passages
+    budget = max_tokens * CHARS_PER_TOKEN
+    selected = []
+    for passage in ranked:
+        if len(passage.text) > budget:
+            if selected:
+                continue
+            passage.text = passage.text[:budget]
+        selected.append(passage)
+        budget -= len(passage.text)
+        if budget <= 0:
+            break
+    return sorted(selected, key=lambda p: p.index)
+
+
+class RelevantScrapeWebsiteToolSchema(BaseModel):
+    website_url: str = Field(..., description='Mandatory website url to read the file')
+    query: str | None = Field(
+        default=None,
+        description='What you are looking for on the page. Only the passages most relevant to '
+        'this query are returned',
+    )
+
+
+class RelevantScrapeWebsiteTool(ScrapeWebsiteTool):
+    """
+    Scrape a website and return only the passages most relevant to a query.
+
+    Boilerplate is stripped from the page, the main content is split into passages and
+    ranked with BM25 against the query passed by the agent, falling back to
+    `default_query` (the notes the RFC is generated from), and cut off at `max_tokens`.
+    """
+
+    name: str = 'Read website content'
+    description: str = (
+        'A tool that can be used to read the content of a website. Pass a `query` describing '
+        'what you are looking for to receive the most relevant passages of the page.'
+    )
+    args_schema: type[BaseModel] = RelevantScrapeWebsiteToolSchema
+    default_query: str | None = None
+    max_tokens: int = 2_000
+
+    def _run(self, **kwargs: Any) -> Any:
+        website_url = kwargs.get('website_url', self.website_url)
+        if website_url is None:
+            raise ValueError('Website URL must be provided.')
+        html = fetch_html(website_url, headers=self.headers, cookies=self.cookies)
+        text = extract_main_text(html)
+        query = kwargs.get('query') or self.default_query or ''
+        passages = select_passages(text, query, max_tokens=self.max_tokens)
+        content = ''
+        for previous, passage in zip([None, *passages], passages):
+            if previous is not None:
+                # Mark where passages were left out.
+                content += '\n\n' if passage.index == previous.index + 1 else '\n\n[...]\n\n'
+            content += passage.text
+        logger.debug(
+            f'Reduced {website_url} from {len(html)} characters of HTML to '
+            f'{len(content)} characters in {len(passages)} passages.'
+        )
+        return (
+            'The following are the passages of the website content most relevant to the '
+            f'query:\n\n{content}'
+        )
@@ -0,0 +1,303 @@
+import time
+import uuid
+import queue
+import socket
+import logging
+import threading
+import pathlib as plb
+import urllib.error
+import urllib.request
+from typing import Sequence
+
+from opentelemetry.exporter.otlp.proto.common.metrics_encoder import encode_metrics
+from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+from opentelemetry.sdk.metrics.export import MetricExporter, MetricExportResult, MetricsData
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+logger = logging.getLogger('rfcrew.telemetry')
+
+OPENLIT_PRICING_URL = 'https://raw.githubusercontent.com/openlit/openlit/main/assets/pricing.json'
+PRICING_MAX_AGE = 7 * 24 * 60 * 60
+
+TRACES_PATH = '/v1/traces'
+METRICS_PATH = '/v1/metrics'
+_SPOOL_SUFFIXES = {TRACES_PATH: '.traces', METRICS_PATH: '.metrics'}
+
+
+def parse_endpoint(endpoint: str) -> tuple[str, int]:
+    """Return the host and port of an OTLP endpoint such as `http://127.0.0.1:4318`."""
+    address = endpoint.replace('http://', '').replace('https://', '').rstrip('/')
+    try:
+        host, port = address.rsplit(':', 1)
+        return host, int(port)
+    except ValueError:
+        raise ValueError(
+            f'Invalid OpenTelemetry endpoint "{endpoint}", expected "[http://]host:port".'
+        )
+
+
+def cached_pricing_json(path: plb.Path, max_age: float = PRICING_MAX_AGE) -> plb.Path:
+    """
+    Return a local copy of openlit's pricing file, refreshing it in the background.
+
+    openlit downloads this file synchronously on every `openlit.init` unless it is given a
+    local path. An empty placeholder is used until the first background download finishes.
+    """
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text('{}')
+    elif time.time() - path.stat().st_mtime < max_age and path.stat().st_size > 2:
+        return path
+
+    def _refresh() -> None:
+        try:
+            with urllib.request.urlopen(OPENLIT_PRICING_URL, timeout=20) as response:
+                payload = response.read()
+            tmp = path.with_suffix('.tmp')
+            tmp.write_bytes(payload)
+            tmp.rename(path)
+            logger.debug(f'Refreshed openlit pricing information at {path}')
+        except OSError as e:
+            logger.debug(f'Could not refresh openlit pricing information: {e}')
+
+    threading.Thread(target=_refresh, name='rfcrew-openlit-pricing', daemon=True).start()
+    return path
+
+
+class EndpointHealthChecker:
+    """
+    Check in a background thread whether the collector accepts TCP connections.
+
+    Checks are repeated every `interval` seconds while the endpoint is up, and back off
+    exponentially (up to `max_interval`) while it is down.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        interval: float = 10.0,
+        max_interval: float = 60.0,
+        timeout: float = 3.0,
+    ):
+        self.host, self.port = parse_endpoint(endpoint)
+        self.interval = interval
+        self.max_interval = max_interval
+        self.timeout = timeout
+        self._healthy = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def healthy(self) -> bool:
+        return self._healthy.is_set()
+
+    def mark_unhealthy(self) -> None:
+        self._healthy.clear()
+
+    def check(self) -> bool:
+        try:
+            with socket.create_connection((self.host, self.port), timeout=self.timeout):
+                self._healthy.set()
+        except OSError as e:
+            logger.debug(f'OpenTelemetry endpoint {self.host}:{self.port} unreachable: {e}')
+            self._healthy.clear()
+        return self.healthy
+
+    def _run(self) -> None:
+        wait = self.interval
+        while not self._stopped.is_set():
+            wait = self.interval if self.check() else min(wait * 2, self.max_interval)
+            self._stopped.wait(wait)
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name='rfcrew-otlp-health', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+
+class OTLPSpool:
+    """
+    Non-blocking delivery of OTLP payloads.
+
+    Payloads are put on a bounded in-memory queue and sent by a background thread while the
+    collector is healthy. When the collector is down, the queue is full, or the process is
+    shutting down and they cannot be delivered in time, payloads are written to an on-disk
+    spool instead; spooled payloads are replayed (oldest first) once the collector is
+    reachable again. The spool is capped at `max_spool_bytes`, dropping the oldest payloads
+    first.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        spool_directory: plb.Path,
+        max_queue_size: int = 512,
+        max_spool_bytes: int = 50 * 1024 * 1024,
+        timeout: float = 10.0,
+        health_checker: EndpointHealthChecker | None = None,
+    ):
+        self.endpoint = (endpoint if '://' in endpoint else f'http://{endpoint}').rstrip('/')
+        self.spool_directory = spool_directory
+        self.spool_directory.mkdir(parents=True, exist_ok=True)
+        self.max_spool_bytes = max_spool_bytes
+        self.timeout = timeout
+        self.health_checker = health_checker or EndpointHealthChecker(endpoint)
+        self._queue: queue.Queue[tuple[str, bytes]] = queue.Queue(maxsize=max_queue_size)
+        self._spool_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self.health_checker.start()
+        self._thread = threading.Thread(target=self._run, name='rfcrew-otlp-spool', daemon=True)
+        self._thread.start()
+
+    def submit(self, path: str, payload: bytes) -> None:
+        """Hand over a payload for delivery. Never blocks on the network."""
+        if self._stopped.is_set():
+            self._spill(path, payload)
+            return
+        try:
+            self._queue.put_nowait((path, payload))
+        except queue.Full:
+            logger.debug('Telemetry queue is full, spilling payload to disk.')
+            self._spill(path, payload)
+
+    def _send(self, path: str, payload: bytes) -> bool:
+        request = urllib.request.Request(
+            f'{self.endpoint}{path}',
+            data=payload,
+            headers={'Content-Type': 'application/x-protobuf'},
+            method='POST',
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout):
+                return True
+        except urllib.error.HTTPError as e:
+            if 400 <= e.code < 500 and e.code not in (408, 429):
+                logger.warning(f'Collector rejected telemetry payload ({e.code}); dropping it.')
+                return True
+            logger.debug(f'Collector returned {e.code}; will retry later.')
+        except OSError as e:
+            logger.debug(f'Failed to send telemetry payload: {e}')
+        self.health_checker.mark_unhealthy()
+        return False
+
+    def _spool_files(self) -> list[plb.Path]:
+        return sorted(
+            p for p in self.spool_directory.iterdir() if p.suffix in ('.traces', '.metrics')
+        )
+
+    def _spill(self, path: str, payload: bytes) -> None:
+        name = f'{time.time_ns():020d}-{uuid.uuid4().hex}{_SPOOL_SUFFIXES[path]}'
+        with self._spool_lock:
+            tmp = self.spool_directory / f'{name}.tmp'
+            tmp.write_bytes(payload)
+            tmp.rename(self.spool_directory / name)
+            files = self._spool_files()
+            total = sum(f.stat().st_size for f in files)
+            while files and total > self.max_spool_bytes:
+                oldest = files.pop(0)
+                total -= oldest.stat().st_size
+                oldest.unlink(missing_ok=True)
+                logger.warning(f'Telemetry spool exceeds its size limit; dropped {oldest.name}')
+
+    def replay(self, max_files: int = 16) -> int:
+        """Send up to `max_files` spooled payloads. Returns the number delivered."""
+        delivered = 0
+        with self._spool_lock:
+            files = self._spool_files()[:max_files]
+        for spooled in files:
+            if not self.health_checker.healthy:
+                break
+            path = TRACES_PATH if spooled.suffix == '.traces' else METRICS_PATH
+            try:
+                payload = spooled.read_bytes()
+            except FileNotFoundError:
+                continue
+            if not self._send(path, payload):
+                break
+            spooled.unlink(missing_ok=True)
+            delivered += 1
+        if delivered:
+            logger.debug(f'Replayed {delivered} spooled telemetry payloads.')
+        return delivered
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                path, payload = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                if self.health_checker.healthy:
+                    self.replay()
+                continue
+            try:
+                if not (self.health_checker.healthy and self._send(path, payload)):
+                    self._spill(path, payload)
+            finally:
+                self._queue.task_done()
+
+    def shutdown(self, timeout: float = 2.0) -> None:
+        """
+        Stop delivering and move everything still queued to the spool. While the collector is
+        healthy, queued payloads are first given up to `timeout` seconds to be delivered.
+        """
+        if self._stopped.is_set():
+            return
+        deadline = time.monotonic() + timeout
+        while (
+            self._thread is not None
+            and not self._queue.empty()
+            and self.health_checker.healthy
+            and time.monotonic() < deadline
+        ):
+            time.sleep(0.05)
+        self._stopped.set()
+        self.health_checker.stop()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        while True:
+            try:
+                path, payload = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._spill(path, payload)
+
+
+class SpoolingSpanExporter(SpanExporter):
+    """Span exporter that hands OTLP-encoded spans to an `OTLPSpool`."""
+
+    def __init__(self, spool: OTLPSpool):
+        self.spool = spool
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        self.spool.submit(TRACES_PATH, encode_spans(spans).SerializeToString())
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        # The spool is shared with the metric exporter, so it is shut down by its owner.
+        pass
+
+
+class SpoolingMetricExporter(MetricExporter):
+    """Metric exporter that hands OTLP-encoded metrics to an `OTLPSpool`."""
+
+    def __init__(self, spool: OTLPSpool):
+        super().__init__()
+        self.spool = spool
+
+    def export(
+        self, metrics_data: MetricsData, timeout_millis: float = 10_000, **kwargs
+    ) -> MetricExportResult:
+        self.spool.submit(METRICS_PATH, encode_metrics(metrics_data).SerializeToString())
+        return MetricExportResult.SUCCESS
+
+    def force_flush(self, timeout_millis: float = 10_000) -> bool:
+        return True
+
+    def shutdown(self, timeout_millis: float = 30_000, **kwargs) -> None:
+        # The spool is shared with the span exporter, so it is shut down by its owner.
+        pass
@@ -0,0 +1,385 @@
+import json
+import atexit
+import logging
+import threading
+import pathlib as plb
+from contextlib import contextmanager
+from typing import Any, Iterator, Sequence
+
+from opentelemetry import metrics, trace
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
+from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SimpleSpanProcessor,
+    SpanExporter,
+    SpanExportResult,
+)
+from opentelemetry.trace import Span, Status, StatusCode
+
+from rfcrew.telemetry import (
+    OTLPSpool,
+    SpoolingMetricExporter,
+    SpoolingSpanExporter,
+    cached_pricing_json,
+)
+from rfcrew.utils import get_cache_directory
+
+logger = logging.getLogger('rfcrew.tracing')
+
+TRACER_NAME = 'rfcrew'
+
+# Attribute names used on rfcrew spans
+ATTR_TASK_NAME = 'rfcrew.task.name'
+ATTR_AGENT_ROLE = 'rfcrew.agent.role'
+ATTR_TOOL_NAME = 'rfcrew.tool.name'
+ATTR_CACHE_HIT = 'rfcrew.cache.hit'
+ATTR_CACHE_NAME = 'rfcrew.cache.name'
+ATTR_STRUCTURED_OUTPUT = 'rfcrew.structured_output'
+ATTR_MODEL = 'gen_ai.request.model'
+ATTR_PROMPT_TOKENS = 'gen_ai.usage.input_tokens'
+ATTR_COMPLETION_TOKENS = 'gen_ai.usage.output_tokens'
+ATTR_TOTAL_TOKENS = 'gen_ai.usage.total_tokens'
+
+_lock = threading.Lock()
+_initialized = False
+
+
+class JsonLinesSpanExporter(SpanExporter):
+    """Append finished spans to a local file, one JSON object per line."""
+
+    def __init__(self, path: plb.Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _to_dict(span: ReadableSpan) -> dict[str, Any]:
+        context = span.get_span_context()
+        return {
+            'name': span.name,
+            'trace_id': f'{context.trace_id:032x}' if context else None,
+            'span_id': f'{context.span_id:016x}' if context else None,
+            'parent_id': f'{span.parent.span_id:016x}' if span.parent else None,
+            'start_time': span.start_time,
+            'end_time': span.end_time,
+            'status': span.status.status_code.name,
+            'attributes': dict(span.attributes or {}),
+        }
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = [json.dumps(self._to_dict(span), default=str) for span in spans]
+        try:
+            with self._lock, self.path.open('a') as f:
+                f.write('\n'.join(lines) + '\n')
+        except OSError:
+            logger.exception(f'Failed to write spans to {self.path}')
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        pass
+
+
+class CrewAITracingListener:
+    """
+    Translate crewai events into nested spans.
+
+    Task spans are parented to the span registered for their crew with `trace_crew`, and
+    tool call spans are parented to the span of the task that made the call.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._crew_spans: dict[int, Span] = {}
+        self._task_spans: dict[str, Span] = {}
+        self._agent_tasks: dict[str, str] = {}
+        self._tool_spans: dict[tuple[str, str], list[Span]] = {}
+        self._task_usage: dict[str, dict[str, int]] = {}
+
+    def register(self) -> None:
+        try:
+            from crewai.events import (
+                crewai_event_bus,
+                TaskStartedEvent,
+                TaskCompletedEvent,
+                TaskFailedEvent,
+                ToolUsageStartedEvent,
+                ToolUsageFinishedEvent,
+                ToolUsageErrorEvent,
+                LLMCallCompletedEvent,
+            )
+        except ImportError:  # crewai < 1.0
+            from crewai.utilities.events import (
+                crewai_event_bus,
+                TaskStartedEvent,
+                TaskCompletedEvent,
+                TaskFailedEvent,
+                ToolUsageStartedEvent,
+                ToolUsageFinishedEvent,
+                ToolUsageErrorEvent,
+                LLMCallCompletedEvent,
+            )
+        crewai_event_bus.on(TaskStartedEvent)(self.on_task_started)
+        crewai_event_bus.on(TaskCompletedEvent)(self.on_task_completed)
+        crewai_event_bus.on(TaskFailedEvent)(self.on_task_failed)
+        crewai_event_bus.on(ToolUsageStartedEvent)(self.on_tool_started)
+        crewai_event_bus.on(ToolUsageFinishedEvent)(self.on_tool_finished)
+        crewai_event_bus.on(ToolUsageErrorEvent)(self.on_tool_error)
+        crewai_event_bus.on(LLMCallCompletedEvent)(self.on_llm_call_completed)
+
+    def attach_crew(self, crew: Any, span: Span) -> None:
+        with self._lock:
+            self._crew_spans[id(crew)] = span
+
+    def detach_crew(self, crew: Any) -> None:
+        with self._lock:
+            self._crew_spans.pop(id(crew), None)
+
+    @staticmethod
+    def _task_key(task: Any) -> str:
+        return str(getattr(task, 'id', id(task)))
+
+    def on_task_started(self, source: Any, event: Any) -> None:
+        task = getattr(event, 'task', None) or source
+        agent = getattr(task, 'agent', None)
+        crew_span = self._crew_spans.get(id(getattr(agent, 'crew', None)))
+        attributes = {ATTR_TASK_NAME: getattr(task, 'name', None) or 'unnamed'}
+        if agent is not None:
+            attributes[ATTR_AGENT_ROLE] = str(agent.role).strip()
+            model = getattr(getattr(agent, 'llm', None), 'model', None)
+            if model is not None:
+                attributes[ATTR_MODEL] = str(model)
+        span = trace.get_tracer(TRACER_NAME).start_span(
+            f'task {attributes[ATTR_TASK_NAME]}',
+            context=trace.set_span_in_context(crew_span) if crew_span is not None else None,
+            attributes=attributes,
+        )
+        with self._lock:
+            self._task_spans[self._task_key(task)] = span
+            if agent is not None:
+                self._agent_tasks[str(agent.key)] = self._task_key(task)
+
+    def _end_task(self, task: Any, error: str | None = None) -> None:
+        with self._lock:
+            span = self._task_spans.pop(self._task_key(task), None)
+            self._task_usage.pop(self._task_key(task), None)
+        if span is None:
+            return
+        if error is not None:
+            span.set_status(Status(StatusCode.ERROR, error))
+        span.end()
+
+    def on_task_completed(self, source: Any, event: Any) -> None:
+        self._end_task(getattr(event, 'task', None) or source)
+
+    def on_task_failed(self, source: Any, event: Any) -> None:
+        self._end_task(getattr(event, 'task', None) or source, error=str(event.error))
+
+    def _tool_parent(self, event: Any) -> tuple[str, Span | None]:
+        task_key = getattr(event, 'task_id', None) or self._agent_tasks.get(
+            str(getattr(event, 'agent_key', None))
+        )
+        return str(task_key), self._task_spans.get(str(task_key))
+
+    def on_tool_started(self, source: Any, event: Any) -> None:
+        task_key, parent = self._tool_parent(event)
+        span = trace.get_tracer(TRACER_NAME).start_span(
+            f'tool {event.tool_name}',
+            context=trace.set_span_in_context(parent) if parent is not None else None,
+            attributes={ATTR_TOOL_NAME: event.tool_name},
+        )
+        with self._lock:
+            self._tool_spans.setdefault((task_key, event.tool_name), []).append(span)
+
+    def _end_tool(self, event: Any, cache_hit: bool = False, error: str | None = None) -> None:
+        task_key, _ = self._tool_parent(event)
+        with self._lock:
+            stack = self._tool_spans.get((task_key, event.tool_name))
+            span = stack.pop() if stack else None
+        if span is None:
+            return
+        span.set_attribute(ATTR_CACHE_HIT, cache_hit)
+        if error is not None:
+            span.set_status(Status(StatusCode.ERROR, error))
+        span.end()
+
+    def on_tool_finished(self, source: Any, event: Any) -> None:
+        self._end_tool(event, cache_hit=bool(getattr(event, 'from_cache', False)))
+
+    def on_tool_error(self, source: Any, event: Any) -> None:
+        self._end_tool(event, error=str(event.error))
+
+    def on_llm_call_completed(self, source: Any, event: Any) -> None:
+        usage = getattr(event, 'usage', None)
+        task_key = str(getattr(event, 'task_id', None))
+        span = self._task_spans.get(task_key)
+        if not usage or span is None:
+            return
+        with self._lock:
+            totals = self._task_usage.setdefault(task_key, {})
+            for key, value in usage.items():
+                if isinstance(value, int):
+                    totals[key] = totals.get(key, 0) + value
+            record_token_usage(span, dict(totals))
+
+
+_listener = CrewAITracingListener()
+
+
+def _shutdown(provider: TracerProvider, meter_provider: MeterProvider, spool: OTLPSpool) -> None:
+    # The providers register their own exit handlers, but those run after this one (handlers
+    # run in reverse order of registration), when the spool has already stopped. Flush the
+    # last spans and metrics into the spool first so they are sent before exiting.
+    provider.shutdown()
+    meter_provider.shutdown()
+    spool.shutdown()
+
+
+def init_tracing(
+    otlp_endpoint: str | None = None,
+    trace_file: plb.Path | None = None,
+    console: bool = False,
+    spool_directory: plb.Path | None = None,
+) -> None:
+    """
+    Configure tracing once per process. Subsequent calls are no-ops.
+
+    Spans and metrics are exported to the OTLP endpoint without ever blocking the caller:
+    they are buffered in memory and delivered in the background, or spooled to
+    `spool_directory` while the collector is unreachable (see `rfcrew.telemetry`). openlit
+    is initialised on top of these providers to instrument the LLM calls. Spans can also be
+    written to a local JSON-lines file or the console to profile runs without a collector.
+    """
+    global _initialized
+    with _lock:
+        if _initialized:
+            logger.debug('Tracing already initialized.')
+            return
+        if otlp_endpoint is None and trace_file is None and not console:
+            return
+        resource = Resource.create({SERVICE_NAME: TRACER_NAME})
+        provider = TracerProvider(resource=resource)
+        if otlp_endpoint is not None:
+            spool = OTLPSpool(
+                endpoint=otlp_endpoint,
+                spool_directory=spool_directory or get_cache_directory() / 'telemetry',
+            )
+            spool.start()
+            provider.add_span_processor(BatchSpanProcessor(SpoolingSpanExporter(spool)))
+            meter_provider = MeterProvider(
+                resource=resource,
+                metric_readers=[PeriodicExportingMetricReader(SpoolingMetricExporter(spool))],
+            )
+            metrics.set_meter_provider(meter_provider)
+            atexit.register(_shutdown, provider, meter_provider, spool)
+        if trace_file is not None:
+            logger.info(f'Writing spans to {trace_file}')
+            provider.add_span_processor(BatchSpanProcessor(JsonLinesSpanExporter(trace_file)))
+        if console:
+            provider.add_span_processor(SimpleSpanProcessor(ConsoleSpanExporter()))
+        trace.set_tracer_provider(provider)
+        if otlp_endpoint is not None:
+            import openlit
+
+            # openlit (>= 1.45) reuses the tracer and meter providers configured above instead
+            # of adding its own exporters. Pricing data is read from a local copy so that
+            # initialisation does not wait on the network.
+            logger.info(f'Initializing openlit for OTLP endpoint: {otlp_endpoint}')
+            openlit.init(
+                application_name=TRACER_NAME,
+                pricing_json=str(
+                    cached_pricing_json(get_cache_directory() / 'openlit_pricing.json')
+                ),
+            )
+        _listener.register()
+        _initialized = True
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span]:
+    """Start a span as the current span. A no-op if tracing was not initialized."""
+    with trace.get_tracer(TRACER_NAME).start_as_current_span(
+        name, attributes={k: v for k, v in attributes.items() if v is not None}
+    ) as current:
+        yield current
+
+
+@contextmanager
+def trace_crew(crew: Any, name: str, **attributes: Any) -> Iterator[Span]:
+    """Start a span for a crew kickoff under which its task and tool spans are nested."""
+    with span(name, **attributes) as current:
+        _listener.attach_crew(crew, current)
+        try:
+            yield current
+        finally:
+            _listener.detach_crew(crew)
+
+
+def record_token_usage(span: Span, usage: Any) -> None:
+    """Add token counts from a crewai `UsageMetrics` object or a usage dict to a span."""
+    if not isinstance(usage, dict):
+        usage = usage.model_dump() if hasattr(usage, 'model_dump') else vars(usage)
+    for attribute, keys in (
+        (ATTR_PROMPT_TOKENS, ('prompt_tokens', 'input_tokens')),
+        (ATTR_COMPLETION_TOKENS, ('completion_tokens', 'output_tokens')),
+        (ATTR_TOTAL_TOKENS, ('total_tokens',)),
+    ):
+        value = next((usage[k] for k in keys if usage.get(k) is not None), None)
+        if value is not None:
+            span.set_attribute(attribute, int(value))
+
+
+# Created on the global meter, which forwards to the provider set up by `init_tracing`.
+_cache_lookups = metrics.get_meter(TRACER_NAME).create_counter(
+    'rfcrew.cache.lookups', description='Lookups in rfcrew caches, by cache and outcome'
+)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """Count a lookup in one of rfcrew's caches and mark the current span as a hit or miss."""
+    _cache_lookups.add(1, {ATTR_CACHE_NAME: cache, ATTR_CACHE_HIT: hit})
+    trace.get_current_span().set_attribute(ATTR_CACHE_HIT, hit)
+
+
+def read_spans(path: plb.Path) -> list[dict[str, Any]]:
+    with path.open('r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def render_waterfall(spans: list[dict[str, Any]], width: int = 40) -> list[str]:
+    """
+    Render spans from a JSON-lines trace file as a text waterfall, one line per span,
+    grouped by trace and indented by nesting depth.
+    """
+    lines = []
+    traces: dict[str, list[dict[str, Any]]] = {}
+    for s in spans:
+        traces.setdefault(s['trace_id'], []).append(s)
+    for trace_id, trace_spans in traces.items():
+        known = {s['span_id'] for s in trace_spans}
+        children: dict[str | None, list[dict[str, Any]]] = {}
+        for s in trace_spans:
+            parent = s['parent_id'] if s['parent_id'] in known else None
+            children.setdefault(parent, []).append(s)
+        start = min(s['start_time'] for s in trace_spans)
+        end = max(s['end_time'] for s in trace_spans)
+        total = max(end - start, 1)
+        lines.append(f'trace {trace_id} ({total / 1e9:.2f}s)')
+
+        def _walk(parent: str | None, depth: int) -> None:
+            for s in sorted(children.get(parent, []), key=lambda x: x['start_time']):
+                offset = int((s['start_time'] - start) / total * width)
+                length = max(int((s['end_time'] - s['start_time']) / total * width), 1)
+                bar = ' ' * offset + '█' * min(length, width - offset)
+                label = ('  ' * depth + s['name'])[:40]
+                lines.append(
+                    f'{label:<40} |{bar:<{width}}| {(s["end_time"] - s["start_time"]) / 1e9:8.2f}s'
+                )
+                _walk(s['span_id'], depth + 1)
+
+        _walk(None, 0)
+    return lines
@@ -1,14 +1,47 @@
+import os
+import hashlib
 import logging
+import pathlib as plb
 from typing import Any
 
 import yaml
 
+from rfcrew.log import Preview
+
 logger = logging.getLogger('rfcrew.utils')
 
 
 def read_yaml(file_path) -> dict[str, Any]:
-    logger.info(f'Reading YAML file: {file_path}')
+    logger.info('Reading YAML file: %s', file_path)
     with open(file_path, 'r') as file:
         data = yaml.safe_load(file)
-    logger.debug(f'YAML data: {data}')
+    logger.debug('YAML data: %s', Preview(data))
     return data
+
+
+def get_cache_directory() -> plb.Path:
+    """
+    Return the directory used for persistent local state (caches, indices, stores).
+
+    Defaults to `~/.cache/rfcrew` and can be overridden with the `RFCREW_CACHE_DIR`
+    environment variable.
+    """
+    cache_dir = plb.Path(
+        os.environ.get('RFCREW_CACHE_DIR', plb.Path.home() / '.cache' / 'rfcrew')
+    ).expanduser()
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+def hash_text(text: str) -> str:
+    """Return the SHA-256 hex digest of a piece of text."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def clean_markdown(raw_mkd: str) -> str:
+    # Post-process the raw markdown to remove code blocks
+    if raw_mkd.startswith('```markdown'):
+        raw_mkd = raw_mkd.lstrip('```markdown').lstrip('\n')
+    if raw_mkd.endswith('```'):
+        raw_mkd = raw_mkd.rstrip('```').rstrip('\n')
+    return raw_mkd
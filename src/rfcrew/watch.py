@@ -0,0 +1,162 @@
+import time
+import sqlite3
+import fnmatch
+import logging
+import threading
+import pathlib as plb
+import datetime as dt
+from typing import Callable, Iterator
+
+from pydantic import BaseModel, Field
+from watchfiles import Change, watch
+
+from rfcrew.commands import SCORE_MODEL, score_text
+from rfcrew.crews.assessor import ScoreAgentOutputModel
+from rfcrew.utils import hash_text
+
+logger = logging.getLogger('rfcrew.watch')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    notes_hash TEXT NOT NULL,
+    model TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    justification TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (notes_hash, model)
+);
+"""
+
+
+class ScoreCache:
+    """
+    Persistent cache of notes scores, keyed by a hash of the notes and the scoring model.
+    """
+
+    def __init__(self, path: plb.Path, model: str = SCORE_MODEL):
+        self.path = path
+        self.model = model
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def get(self, notes: str) -> ScoreAgentOutputModel | None:
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT score, justification FROM scores WHERE notes_hash = ? AND model = ?',
+                (hash_text(notes.rstrip()), self.model),
+            ).fetchone()
+        if row is None:
+            return None
+        return ScoreAgentOutputModel(score=row['score'], justification=row['justification'])
+
+    def put(self, notes: str, result: ScoreAgentOutputModel) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO scores (notes_hash, model, score, justification, created_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (
+                    hash_text(notes.rstrip()),
+                    self.model,
+                    result.score,
+                    result.justification,
+                    dt.datetime.now(dt.timezone.utc).isoformat(),
+                ),
+            )
+
+
+class NotesScore(BaseModel):
+    path: plb.Path = Field(..., description='Path to the notes file')
+    result: ScoreAgentOutputModel | None = Field(default=None, description='Score of the notes')
+    cached: bool = Field(default=False, description='Whether the score was served from cache')
+    latency: float = Field(default=0.0, description='Time taken to score the notes in seconds')
+    error: str | None = Field(default=None, description='Error message if scoring failed')
+
+
+class NotesWatcher:
+    """
+    Re-score notes in a directory whenever they change.
+
+    Files are only re-scored if their content changed since they were last scored, and
+    scores are looked up in the cache by content hash before the ScoreAgent is called.
+    """
+
+    def __init__(
+        self,
+        directory: plb.Path,
+        cache: ScoreCache,
+        pattern: str = '*.md',
+        scorer: Callable[[str], ScoreAgentOutputModel] = score_text,
+    ):
+        self.directory = directory
+        self.cache = cache
+        self.pattern = pattern
+        self.scorer = scorer
+        self._hashes: dict[plb.Path, str] = {}
+
+    def _matches(self, path: plb.Path) -> bool:
+        return fnmatch.fnmatch(path.name, self.pattern)
+
+    def score_file(self, path: plb.Path) -> NotesScore | None:
+        """Score a notes file. Returns None if its content did not change since the last call."""
+        try:
+            notes = path.read_text()
+        except FileNotFoundError:
+            self._hashes.pop(path, None)
+            return None
+        content_hash = hash_text(notes.rstrip())
+        if self._hashes.get(path) == content_hash or not notes.strip():
+            return None
+        self._hashes[path] = content_hash
+        start = time.perf_counter()
+        result = self.cache.get(notes)
+        if result is not None:
+            logger.debug(f'Score cache hit for {path}')
+            return NotesScore(path=path, result=result, cached=True)
+        try:
+            result = self.scorer(notes)
+        except Exception as e:
+            logger.exception(f'Failed to score {path}')
+            # Forget the hash so that the next save retries.
+            self._hashes.pop(path, None)
+            return NotesScore(path=path, error=str(e), latency=time.perf_counter() - start)
+        self.cache.put(notes, result)
+        return NotesScore(path=path, result=result, latency=time.perf_counter() - start)
+
+    def score_all(self) -> Iterator[NotesScore]:
+        """Score every matching file in the directory."""
+        for path in sorted(self.directory.glob(self.pattern)):
+            if path.is_file() and (score := self.score_file(path.resolve())) is not None:
+                yield score
+
+    def watch(
+        self, debounce_ms: int = 500, stop_event: threading.Event | None = None
+    ) -> Iterator[NotesScore]:
+        """
+        Score all notes, then yield new scores as files change until `stop_event` is set.
+
+        Rapid successive saves are grouped into one batch of changes, which is scored once no
+        changes were seen for `debounce_ms` milliseconds (or after at most four times that
+        while changes keep coming in).
+        """
+        yield from self.score_all()
+        for changes in watch(
+            self.directory,
+            watch_filter=lambda change, path: (
+                change != Change.deleted and self._matches(plb.Path(path))
+            ),
+            step=debounce_ms,
+            debounce=debounce_ms * 4,
+            stop_event=stop_event,
+            recursive=False,
+        ):
+            paths = sorted({plb.Path(path).resolve() for _, path in changes})
+            logger.debug(f'Detected changes in {len(paths)} notes files.')
+            for path in paths:
+                if (score := self.score_file(path)) is not None:
+                    yield score
@@ -0,0 +1,224 @@
+import time
+import sqlite3
+import logging
+import pathlib as plb
+from typing import Any, cast
+
+import numpy as np
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+
+from rfcrew import scraping
+from rfcrew.utils import hash_text
+
+logger = logging.getLogger('rfcrew.website_index')
+
+DEFAULT_EMBEDDING_MODEL = 'gemini/text-embedding-004'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT NOT NULL,
+    model TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (url, model)
+);
+CREATE TABLE IF NOT EXISTS passages (
+    url TEXT NOT NULL,
+    model TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    embedding BLOB NOT NULL,
+    PRIMARY KEY (url, model, idx)
+);
+CREATE TABLE IF NOT EXISTS queries (
+    query_hash TEXT NOT NULL,
+    model TEXT NOT NULL,
+    embedding BLOB NOT NULL,
+    PRIMARY KEY (query_hash, model)
+);
+"""
+
+
+class Embedder:
+    """
+    Embed texts with any embedding model supported by litellm, e.g. `gemini/text-embedding-004`
+    or a local model served by Ollama such as `ollama/nomic-embed-text`.
+    """
+
+    def __init__(
+        self, model: str = DEFAULT_EMBEDDING_MODEL, api_key: str | None = None, batch_size: int = 50
+    ):
+        self.model = model
+        self.api_key = api_key
+        self.batch_size = batch_size
+
+    def __call__(self, texts: list[str]) -> np.ndarray:
+        # Imported on first use: importing litellm is slow and not needed for cached pages.
+        import litellm
+
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            response = cast(
+                litellm.EmbeddingResponse,
+                litellm.embedding(
+                    model=self.model,
+                    input=texts[start : start + self.batch_size],
+                    api_key=self.api_key,
+                ),
+            )
+            vectors.extend(item['embedding'] for item in response.data)
+        logger.debug(f'Embedded {len(texts)} texts with {self.model}.')
+        return np.asarray(vectors, dtype=np.float32)
+
+
+class SearchResult(BaseModel):
+    url: str = Field(..., description='URL of the page the passage is from')
+    text: str = Field(..., description='Text of the passage')
+    similarity: float = Field(..., description='Cosine similarity to the query')
+
+
+class WebsiteIndex:
+    """
+    Persistent vector index of website passages.
+
+    Pages are stored per URL and embedding model together with a hash of their extracted
+    content. A page is only re-embedded when its content hash changes, and pages fetched
+    less than `max_age` seconds ago are not fetched again, so repeated searches of the same
+    documentation across runs and agents need no embedding calls for the pages.
+    """
+
+    def __init__(self, path: plb.Path, embedder: Embedder, max_age: float = 24 * 60 * 60):
+        self.path = path
+        self.embedder = embedder
+        self.max_age = max_age
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def is_fresh(self, url: str) -> bool:
+        """Whether the page was indexed less than `max_age` seconds ago."""
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT fetched_at FROM pages WHERE url = ? AND model = ?',
+                (url, self.embedder.model),
+            ).fetchone()
+        return row is not None and time.time() - row['fetched_at'] < self.max_age
+
+    def add(self, url: str, content: str) -> bool:
+        """Index the content of a page. Returns False if it was already indexed unchanged."""
+        content_hash = hash_text(content)
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT content_hash FROM pages WHERE url = ? AND model = ?',
+                (url, self.embedder.model),
+            ).fetchone()
+            if row is not None and row['content_hash'] == content_hash:
+                conn.execute(
+                    'UPDATE pages SET fetched_at = ? WHERE url = ? AND model = ?',
+                    (time.time(), url, self.embedder.model),
+                )
+                logger.debug(f'Content of {url} unchanged; reusing embeddings.')
+                return False
+        passages = [p.text for p in scraping.split_passages(content)]
+        embeddings = self.embedder(passages) if passages else []
+        with self._connect() as conn:
+            conn.execute(
+                'DELETE FROM passages WHERE url = ? AND model = ?', (url, self.embedder.model)
+            )
+            conn.executemany(
+                'INSERT INTO passages (url, model, idx, text, embedding) VALUES (?, ?, ?, ?, ?)',
+                [
+                    (url, self.embedder.model, idx, text, embedding.tobytes())
+                    for idx, (text, embedding) in enumerate(zip(passages, embeddings))
+                ],
+            )
+            conn.execute(
+                'INSERT OR REPLACE INTO pages (url, model, content_hash, fetched_at) '
+                'VALUES (?, ?, ?, ?)',
+                (url, self.embedder.model, content_hash, time.time()),
+            )
+        logger.info(f'Indexed {len(passages)} passages of {url}.')
+        return True
+
+    def _embed_query(self, query: str) -> np.ndarray:
+        query_hash = hash_text(query)
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT embedding FROM queries WHERE query_hash = ? AND model = ?',
+                (query_hash, self.embedder.model),
+            ).fetchone()
+            if row is not None:
+                return np.frombuffer(row['embedding'], dtype=np.float32)
+        embedding = self.embedder([query])[0]
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO queries (query_hash, model, embedding) VALUES (?, ?, ?)',
+                (query_hash, self.embedder.model, embedding.tobytes()),
+            )
+        return embedding
+
+    def search(self, query: str, url: str | None = None, limit: int = 5) -> list[SearchResult]:
+        """Return the passages most similar to `query`, optionally restricted to one page."""
+        sql = 'SELECT url, text, embedding FROM passages WHERE model = ?'
+        params: list[Any] = [self.embedder.model]
+        if url is not None:
+            sql += ' AND url = ?'
+            params.append(url)
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        if not rows:
+            return []
+        matrix = np.stack([np.frombuffer(row['embedding'], dtype=np.float32) for row in rows])
+        query_embedding = self._embed_query(query)
+        similarities = matrix @ query_embedding
+        similarities /= np.linalg.norm(matrix, axis=1) * np.linalg.norm(query_embedding) + 1e-12
+        best = np.argsort(-similarities)[:limit]
+        return [
+            SearchResult(
+                url=rows[i]['url'], text=rows[i]['text'], similarity=float(similarities[i])
+            )
+            for i in best
+        ]
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute(
+                'SELECT COUNT(*) FROM pages WHERE model = ?', (self.embedder.model,)
+            ).fetchone()[0]
+
+
+class CachedWebsiteSearchToolSchema(BaseModel):
+    search_query: str = Field(
+        ..., description='Mandatory search query you want to use to search a specific website'
+    )
+    website: str = Field(..., description='Mandatory valid website URL you want to search on')
+
+
+class CachedWebsiteSearchTool(BaseTool):
+    """
+    Semantic search within a website, backed by a persistent local `WebsiteIndex`.
+    """
+
+    name: str = 'Search in a specific website'
+    description: str = (
+        'A tool that can be used to semantic search a query from a specific URL content.'
+    )
+    args_schema: type[BaseModel] = CachedWebsiteSearchToolSchema
+    index: Any = Field(..., description='The WebsiteIndex used to store and search pages')
+    limit: int = 5
+
+    def _run(self, search_query: str, website: str, **kwargs: Any) -> str:
+        index: WebsiteIndex = self.index
+        if not index.is_fresh(website):
+            index.add(website, scraping.extract_main_text(scraping.fetch_html(website)))
+        results = index.search(search_query, url=website, limit=self.limit)
+        if not results:
+            return f'No content found on {website}.'
+        passages = '\n\n---\n\n'.join(result.text for result in results)
+        return f'Relevant content:\n{passages}'
@@ -0,0 +1,72 @@
+import re
+import pathlib as plb
+
+from rfcrew import commands
+from rfcrew.chunking import chunk_markdown, split_sections
+
+DOCUMENT = """Preamble text.
+
+# Title
+
+Intro.
+
+## Design
+
+```python
+# not a heading
+print('hello')
+```
+
+### Storage
+
+Stored in BigQuery.
+
+## Alternatives
+
+None considered.
+"""
+
+
+def test_split_sections_ignores_fenced_headings():
+    """Test that sections follow ATX headings, with breadcrumbs, but not headings in code."""
+    sections = split_sections(DOCUMENT)
+    assert [s.title for s in sections] == ['', 'Title', 'Design', 'Storage', 'Alternatives']
+    assert sections[3].breadcrumb == ['Title', 'Design']
+    assert '# not a heading' in sections[2].text
+
+
+def test_chunk_markdown_merges_and_splits():
+    """Test that small sections are merged and oversized sections split at paragraphs."""
+    assert len(chunk_markdown(DOCUMENT, max_chars=10_000)) == 1
+    long_section = '## Big\n\n' + '\n\n'.join(f'Paragraph {i} ' + 'x' * 80 for i in range(20))
+    chunks = chunk_markdown(long_section, max_chars=500)
+    assert len(chunks) > 1
+    assert all(len(c.text) <= 600 for c in chunks)
+    assert chunks[1].text.startswith('*(continued: Big)*')
+    text = ' '.join(c.text for c in chunks)
+    assert all(f'Paragraph {i} ' in text for i in range(20))
+
+
+def test_chunk_markdown_keeps_all_content():
+    """Test that chunking a sample RFC loses no content."""
+    path = plb.Path(__file__).parents[2] / 'samples/bq_write_api/generated/rfc_ruby_panda.md'
+    document = path.read_text()
+    chunks = chunk_markdown(document, max_chars=8_000)
+    assert len(chunks) > 1
+    text = ''.join(c.text for c in chunks)
+    text = re.sub(r'\*\(continued: [^\n]*\)\*', '', text)
+    assert ''.join(document.split()) == ''.join(text.split())
+
+
+def test_map_documents_drops_irrelevant_chunks(monkeypatch):
+    """Test that extracts are grouped per document and irrelevant chunks are dropped."""
+
+    def _extract(purpose, position, sections, section):
+        return commands.NOTHING_RELEVANT if 'Alternatives' in sections else f'- {position}'
+
+    monkeypatch.setattr(commands, '_extract_chunk', _extract)
+    first, second = commands.map_documents(
+        [DOCUMENT, '## Alternatives\n\nNone.'], purpose='testing', max_chunk_chars=40
+    )
+    assert '- part 1 of' in first
+    assert second == ''
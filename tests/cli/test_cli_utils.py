@@ -1,6 +1,8 @@
+import time
 import pathlib as plb
 
 import pytest
+from pydantic import ValidationError
 
 from rfcrew.cli import Common
 
@@ -11,10 +13,14 @@ def test_common_model_passes(tmp_path: plb.Path):
     Common(verbose=True, output_directory=tmp_path, otlp_endpoint=None)
 
 
-def test_common_model_with_bad_oltp(tmp_path: plb.Path):
-    """Test the Common model with a bad otlp endpoint."""
-    # Create an instance of the Common model with test data
-    with pytest.raises(ConnectionError):
-        Common(
-            verbose=True, output_directory=tmp_path, otlp_endpoint='http://bad-otel-collector:4318'
-        )
+def test_common_model_with_unreachable_oltp_does_not_block(tmp_path: plb.Path):
+    """Test that an unreachable otlp endpoint does not delay the command."""
+    start = time.monotonic()
+    Common(verbose=True, output_directory=tmp_path, otlp_endpoint='http://bad-otel-collector:4318')
+    assert time.monotonic() - start < 1
+
+
+def test_common_model_with_malformed_oltp(tmp_path: plb.Path):
+    """Test the Common model with a malformed otlp endpoint."""
+    with pytest.raises(ValidationError):
+        Common(verbose=True, output_directory=tmp_path, otlp_endpoint='bad-otel-collector')
@@ -0,0 +1,40 @@
+from rfcrew import commands
+from rfcrew.commands import rank_candidates
+from rfcrew.crews.ranker import RankingAgentModel
+from rfcrew.flows import Candidate, CandidateConfig
+
+
+def _candidate(name: str, rfc: str | None, total_tokens: int | None = None) -> Candidate:
+    return Candidate(config=CandidateConfig(name=name), rfc=rfc, total_tokens=total_tokens)
+
+
+def test_rank_candidates(monkeypatch):
+    """Test that candidates are ranked by rubric total, ties broken by token usage."""
+    totals = {'# A': 7, '# B': 9, '# C': 9}
+
+    def _grade(notes, candidate):
+        if candidate.rfc is None:
+            return None
+        score = totals[candidate.rfc]
+        return RankingAgentModel(
+            completeness=score,
+            technical_soundness=score,
+            clarity=score,
+            actionability=score,
+            justification='ok',
+        )
+
+    monkeypatch.setattr(commands, '_grade_candidate', _grade)
+    ranking = rank_candidates(
+        'notes',
+        [
+            _candidate('a', '# A', 100),
+            _candidate('b', '# B', 300),
+            _candidate('failed', None),
+            _candidate('c', '# C', 200),
+        ],
+    )
+    assert [r.candidate.config.name for r in ranking] == ['c', 'b', 'a', 'failed']
+    assert [r.rank for r in ranking] == [1, 2, 3, 4]
+    assert ranking[0].scores is not None and ranking[0].scores.total == 36
+    assert ranking[-1].scores is None
@@ -6,7 +6,7 @@ import os
 from crewai import Agent, Task, Crew, CrewOutput, LLM
 
 # Import the classes to be tested
-from src.rfcrew.crews.assessor import ScoreAgent, ScoreAgentOutputModel
+from src.rfcrew.crews.assessor import ScoreAgent
 
 
 # Mock the LLM class entirely for all tests in this module
@@ -67,7 +67,6 @@ def test_score_agent_task_property(mock_task_class, score_agent):
             agent=mock_agent_instance,
             description=ANY,  # Check specific description string if needed
             expected_output=ANY,  # Check specific expected_output string if needed
-            output_pydantic=ScoreAgentOutputModel,
         )
 
 
@@ -0,0 +1,211 @@
+import pathlib as plb
+
+import pytest
+import yaml
+from crewai import CrewOutput
+from crewai.tasks.task_output import TaskOutput
+from crewai.tools import tool
+from crewai.types.usage_metrics import UsageMetrics
+
+from rfcrew.crews.conditions import Condition, ConditionError, count_components
+from rfcrew.crews.rfc import RFCrew
+
+CONFIG = plb.Path(__file__).parents[2] / 'config'
+TOOLS = ('serper_dev_tool', 'scrape_website_tool', 'website_search_tool')
+
+
+def _crew_builder(tasks_config: plb.Path = CONFIG / 'tasks.yaml') -> RFCrew:
+    @tool('dummy')
+    def dummy(query: str) -> str:
+        """Dummy tool."""
+        return query
+
+    return RFCrew.from_config(
+        CONFIG / 'agents.yaml', tasks_config, tools={name: dummy for name in TOOLS}
+    )
+
+
+@pytest.mark.parametrize(
+    'expression,facts,expected',
+    [
+        ('notes_words >= 300', {'notes_words': 300}, True),
+        ('notes_score > 8 or notes_words > 500', {'notes_score': 7, 'notes_words': 600}, True),
+        (
+            'not (draft_components >= 2 and draft_words < 100)',
+            {'draft_components': 3, 'draft_words': 50},
+            False,
+        ),
+        ('2 <= draft_components < 4', {'draft_components': 4}, False),
+    ],
+)
+def test_condition(expression: str, facts: dict[str, float], expected: bool):
+    """Test that conditions are evaluated against the facts."""
+    assert Condition(expression).evaluate(facts) is expected
+
+
+@pytest.mark.parametrize(
+    'expression',
+    ['notes_words >', 'unknown > 1', 'notes_words + 1 > 2', '__import__("os")', 'notes_words in 1'],
+)
+def test_invalid_conditions_are_rejected(expression: str):
+    """Test that only comparisons of known variables with numbers are accepted."""
+    with pytest.raises(ConditionError):
+        Condition(expression)
+
+
+SMALL_DRAFT = """# RFC: Nightly export of the CRM contacts
+
+## 🤓 TL;DR;
+---
+Export the CRM contacts to BigQuery every night.
+
+## 🦉 The Actual Design
+---
+The existing export job gets an extra step that appends the contacts to a BigQuery table. The
+step reuses the credentials of the job, and failed runs are retried by the scheduler.
+
+It does not change the schedule or the format of the export.
+
+## 🌈 Alternatives considered
+---
+* Option 1
+* Option 2
+"""
+
+LARGE_DRAFT = """# RFC: Streaming ingestion of CRM events
+
+## 🤓 TL;DR;
+---
+Stream CRM events into BigQuery instead of loading nightly exports.
+
+## 🦉 The Actual Design
+---
+The **Ingestion service** runs on Cloud Run and pulls events from the CRM webhook queue. It
+writes them to **BigQuery** with the Storage Write API default stream, so no staging tables are
+needed.
+
+* **Pub/Sub topic**: receives the webhooks and buffers events while the service scales up.
+* **Ingestion service**: validates events and appends them to BigQuery.
+* **Dead letter table**: stores events that fail validation, for later replay.
+* `crm-replay` job: replays events from the dead letter table once they are fixed.
+
+```mermaid
+graph TD
+    A-->B
+```
+
+The **Ingestion service** is deployed by the platform team's standard pipeline and **must** run
+in the EU region.
+
+## 🌈 Alternatives considered
+---
+* Option 1
+* Option 2
+"""
+
+
+@pytest.mark.parametrize(
+    'design,components',
+    [
+        ('### Ingestion\n#### Retries\n### Storage\n', 2),
+        ('* **Ingestion**: a\n* **Storage**: b\n* Scheduling: c\n', 3),
+        ('Components:\n\n- Ingestion service\n  - Retries\n- Storage\n', 2),
+        ('1. Ingestion service\n2. Storage\n', 2),
+        ('The service writes records to BigQuery.\n\nFailed runs are retried.\n', 0),
+        ('The **Ingestion service** writes to **BigQuery**, which is **always** on.\n', 2),
+        (
+            '1. Read the new records from the source table.\n'
+            '2. Write the records to the target table and log their count.\n',
+            0,
+        ),
+    ],
+)
+def test_count_components(design: str, components: int):
+    """Test that components are counted from subsections, list items and bold names."""
+    assert count_components(f'## 🦉 The Actual Design\n---\n{design}') == components
+
+
+def test_count_components_in_template_shaped_drafts():
+    """Test counting in realistic drafts that follow the RFC template."""
+    assert count_components(SMALL_DRAFT) == 0
+    # Ingestion service, BigQuery, Pub/Sub topic, dead letter table and the replay job.
+    assert count_components(LARGE_DRAFT) == 5
+    assert count_components('## 🤓 TL;DR;\n---\n* **Ingestion**: a\n') == 0
+
+
+def test_draft_conditions_must_follow_the_author(tmp_path: plb.Path, monkeypatch):
+    """Test that a condition on the draft is rejected for tasks that run before the draft."""
+    monkeypatch.setenv('GOOGLE_API_KEY', 'test')
+    tasks_config = yaml.safe_load((CONFIG / 'tasks.yaml').read_text())
+    tasks_config['rfc_research_assistant']['run_if'] = 'draft_words > 100'
+    path = tmp_path / 'tasks.yaml'
+    path.write_text(yaml.safe_dump(tasks_config, sort_keys=False))
+    with pytest.raises(ConditionError):
+        _crew_builder(path)
+
+
+class _FakeCrew:
+    def __init__(self, crew_builder: RFCrew, task_names: list[str]):
+        self.tasks = [crew_builder.tasks[name] for name in task_names]
+        self.task_names = task_names
+
+    def kickoff(self, inputs: dict) -> CrewOutput:
+        for name, task in zip(self.task_names, self.tasks):
+            # A draft with a single component.
+            raw = (
+                '## 🦉 The Actual Design\n---\n* **Service**: a\n' if name == 'rfc_author' else name
+            )
+            task.output = TaskOutput(name=name, description=name, agent='agent', raw=raw)
+        return CrewOutput(
+            raw=self.tasks[-1].output.raw,
+            tasks_output=[task.output for task in self.tasks],
+            token_usage=UsageMetrics(total_tokens=10),
+        )
+
+
+def test_kickoff_prunes_tasks_and_editor_context(monkeypatch):
+    """Test that tasks are pruned by notes conditions first and draft conditions after the draft."""
+    monkeypatch.setenv('GOOGLE_API_KEY', 'test')
+    crew_builder = _crew_builder()
+    crews: list[list[str]] = []
+
+    def _crew(planning_llm: str | None = None, task_names: list[str] | None = None):
+        crews.append(list(task_names or []))
+        return _FakeCrew(crew_builder, crews[-1])
+
+    crew_builder.crew = _crew  # type: ignore[method-assign]
+    editor = crew_builder.tasks['editor']
+    result = crew_builder.kickoff({'notes': '# Notes'}, facts={'notes_words': 10})
+
+    assert crews == [
+        ['rfc_research_assistant', 'rfc_author'],
+        ['peer_reviewer', 'editor'],
+    ]
+    assert list(crew_builder.pruned) == [
+        'operational_and_risk_assessor',
+        'technical_diagram_illustrator',
+    ]
+    assert [task.name for task in editor.context] == ['rfc_author', 'peer_reviewer']
+    assert [task.name for task in result.tasks_output] == [
+        'rfc_research_assistant',
+        'rfc_author',
+        'peer_reviewer',
+        'editor',
+    ]
+    assert (result.raw, result.token_usage.total_tokens) == ('editor', 20)
+
+
+def test_kickoff_runs_once_without_draft_conditions(monkeypatch):
+    """Test that the crew runs in one go if no condition depends on the draft."""
+    monkeypatch.setenv('GOOGLE_API_KEY', 'test')
+    crew_builder = _crew_builder()
+    del crew_builder.conditions['technical_diagram_illustrator']
+    crews: list[list[str]] = []
+
+    def _crew(planning_llm: str | None = None, task_names: list[str] | None = None):
+        crews.append(list(task_names or []))
+        return _FakeCrew(crew_builder, crews[-1])
+
+    crew_builder.crew = _crew  # type: ignore[method-assign]
+    crew_builder.kickoff({'notes': '# Notes'}, facts={'notes_words': 1_000})
+    assert len(crews) == 1 and len(crews[0]) == 6
@@ -0,0 +1,65 @@
+import pathlib as plb
+
+import pytest
+from crewai import Agent, LLM, Task
+
+from rfcrew.crews.drafting import split_task_into_sections, template_sections
+from rfcrew.utils import read_yaml
+
+TASKS_CONFIG = plb.Path(__file__).parents[2] / 'config' / 'tasks.yaml'
+
+
+@pytest.fixture
+def author_expected_output() -> str:
+    return read_yaml(TASKS_CONFIG)['rfc_author']['expected_output']
+
+
+def test_template_sections(author_expected_output: str):
+    """Test that the RFC template is split into sections, skipping the table of contents."""
+    sections = template_sections(author_expected_output)
+    titles = [s.title for s in sections]
+    assert len(sections) == 10
+    assert not any('Table of contents' in t for t in titles)
+    assert sections[3].slug == 'the_actual_design'
+    assert sections[3].template.startswith('## 🦉 The Actual Design')
+    assert all('```' not in s.template for s in sections)
+
+
+def test_split_task_into_sections(author_expected_output: str):
+    """Test that section tasks run async and downstream tasks receive the stitched draft."""
+    llm = LLM(model='gemini/gemini-2.0-flash', api_key='test')
+    agents = {
+        name: Agent(role=name, goal='goal', backstory='backstory', llm=llm)
+        for name in ('researcher', 'author', 'editor')
+    }
+    research = Task(
+        name='research', agent=agents['researcher'], description='d', expected_output='e'
+    )
+    author = Task(
+        name='rfc_author',
+        agent=agents['author'],
+        description='Write the RFC.',
+        expected_output=author_expected_output,
+        context=[research],
+    )
+    editor = Task(
+        name='editor',
+        agent=agents['editor'],
+        description='d',
+        expected_output='e',
+        context=[author],
+    )
+    tasks, agents = split_task_into_sections(
+        {'research': research, 'rfc_author': author, 'editor': editor}, agents
+    )
+    names = list(tasks)
+    assert names[0] == 'research' and names[-2:] == ['rfc_author', 'editor']
+    section_tasks = [tasks[n] for n in names[1:-2]]
+    assert len(section_tasks) == 10
+    assert all(t.async_execution and t.context == [research] for t in section_tasks)
+    assert len({id(t.agent) for t in section_tasks}) == 10
+    stitch = tasks['rfc_author']
+    assert stitch is not author and not stitch.async_execution
+    assert stitch.context[1:] == section_tasks
+    assert tasks['editor'].context == [stitch]
+    assert len(agents) == 13
@@ -0,0 +1,131 @@
+import pathlib as plb
+
+import pytest
+from crewai import CrewOutput
+from crewai.tasks.task_output import TaskOutput
+from crewai.tools import tool
+
+from rfcrew.crews.editing import (
+    EditorPatch,
+    PatchError,
+    SectionEdit,
+    apply_patch,
+    insert_diagram,
+    parse_patch,
+)
+from rfcrew.crews.rfc import RFCrew
+
+CONFIG = plb.Path(__file__).parents[2] / 'config'
+
+DRAFT = """## 📜 Table of contents
+---
+```table-of-contents```
+
+## 🤓 TL;DR;
+---
+Old summary.
+
+## 🦉 The Actual Design
+---
+Design text.
+
+### Storage
+
+Storage text.
+
+## 💬 Discussion
+---
+Open question.
+"""
+
+
+def test_apply_patch():
+    """Test that section edits are applied and untouched sections are kept verbatim."""
+    patch = EditorPatch(
+        title='Write API ingestion',
+        edits=[
+            SectionEdit(section='TL;DR;', operation='replace', content='## 🤓 TL;DR;\n---\nNew.'),
+            SectionEdit(section='The Actual Design', operation='append', content='More design.'),
+            SectionEdit(
+                section='Discussion', operation='insert_after', content='## Reviewer Notes\n\n* a'
+            ),
+        ],
+    )
+    document = apply_patch(DRAFT, patch)
+    assert document.startswith('# Write API ingestion\n')
+    assert '## 🤓 TL;DR;\n---\nNew.' in document and 'Old summary' not in document
+    assert 'Storage text.\n\nMore design.' in document
+    assert document.rstrip().endswith('## Reviewer Notes\n\n* a')
+    assert '```table-of-contents```' in document
+
+
+def test_replace_removes_subsections():
+    """Test that replacing a section also replaces its subsections."""
+    patch = EditorPatch(
+        edits=[SectionEdit(section='The Actual Design', operation='replace', content='New.')]
+    )
+    document = apply_patch(DRAFT, patch)
+    assert '### Storage' not in document
+    assert '## 💬 Discussion' in document
+
+
+@pytest.mark.parametrize(
+    'edits',
+    [
+        [SectionEdit(section='Unknown', operation='delete')],
+        [SectionEdit(section='TL;DR;', operation='append', content='## Another section')],
+        [
+            SectionEdit(section='The Actual Design', operation='replace', content='a'),
+            SectionEdit(section='Storage', operation='append', content='b'),
+        ],
+        [SectionEdit(section='Discussion', operation='insert_after', content='No heading')],
+    ],
+)
+def test_invalid_patches_are_rejected(edits):
+    """Test that unknown, structure-changing, overlapping and headless edits are rejected."""
+    with pytest.raises(PatchError):
+        apply_patch(DRAFT, EditorPatch(edits=edits))
+
+
+def test_insert_diagram():
+    """Test that the diagram is added to the design section once."""
+    diagram = '```mermaid\ngraph TD\n  A --> B\n```'
+    document = insert_diagram(DRAFT, f'```markdown\n{diagram}\n```')
+    assert f'Storage text.\n\n{diagram}\n\n## 💬 Discussion' in document
+    assert insert_diagram(document, diagram) == document
+
+
+def test_parse_patch_from_raw_output():
+    """Test that a patch is parsed from raw JSON output when no pydantic output is set."""
+    output = TaskOutput(description='d', agent='editor', raw='```json\n{"edits": []}\n```')
+    assert parse_patch(output) == EditorPatch()
+    with pytest.raises(PatchError):
+        parse_patch(TaskOutput(description='d', agent='editor', raw='# A full RFC'))
+
+
+def test_finalize_applies_editor_patch(monkeypatch):
+    """Test that in patch mode the final output is the patched draft."""
+    monkeypatch.setenv('GOOGLE_API_KEY', 'test')
+
+    @tool('dummy')
+    def dummy(query: str) -> str:
+        """Dummy tool."""
+        return query
+
+    crew_builder = RFCrew.from_config(
+        CONFIG / 'agents.yaml',
+        CONFIG / 'tasks.yaml',
+        tools={
+            name: dummy
+            for name in ('serper_dev_tool', 'scrape_website_tool', 'website_search_tool')
+        },
+        patch_editor=True,
+    )
+    assert crew_builder.rewrite_editor is not None
+    crew_builder.tasks['rfc_author'].output = TaskOutput(description='d', agent='a', raw=DRAFT)
+    patch = EditorPatch(edits=[SectionEdit(section='Discussion', operation='append', content='Q2')])
+    crew_builder.tasks['editor'].output = TaskOutput(
+        description='d', agent='e', raw=patch.model_dump_json(), pydantic=patch
+    )
+    result = crew_builder.finalize(CrewOutput(raw=patch.model_dump_json()), inputs={})
+    assert result.raw.rstrip().endswith('Open question.\n\nQ2')
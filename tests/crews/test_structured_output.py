@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from rfcrew.crews import base
+from rfcrew.crews.assessor import ScoreAgent, ScoreAgentOutputModel
+from rfcrew.crews.base import StructuredOutputError, structured_output_stats
+
+
+def _execute(raw: str, repaired: str | None = None) -> tuple[object, MagicMock]:
+    crew = MagicMock()
+    crew.kickoff.return_value = SimpleNamespace(raw=raw, pydantic=None, token_usage={})
+    llm = MagicMock()
+    llm.call.return_value = repaired
+    with (
+        patch.object(ScoreAgent, '_crew', new=crew),
+        patch.object(ScoreAgent, '_llm', new=llm),
+    ):
+        return ScoreAgent(model='test-model').execute({'notes': 'notes'}), llm
+
+
+def test_score_agent_requests_json_schema_output(monkeypatch: pytest.MonkeyPatch):
+    """Test that the schema is requested from the provider instead of converting the task output."""
+    monkeypatch.setenv('GOOGLE_API_KEY', 'test')
+    agent = ScoreAgent(model='gemini/gemini-2.5-flash')
+    assert agent._llm.response_format is ScoreAgentOutputModel
+    assert agent._task.output_pydantic is None
+
+
+def test_output_parsed_without_extra_calls():
+    """Test that valid JSON (also in a code fence) is parsed locally in one call."""
+    before = structured_output_stats()
+    output, llm = _execute('```json\n{"score": 7, "justification": "Clear."}\n```')
+    assert output.pydantic == ScoreAgentOutputModel(score=7, justification='Clear.')
+    llm.call.assert_not_called()
+    after = structured_output_stats()
+    assert (after.parsed - before.parsed, after.repair_calls - before.repair_calls) == (1, 0)
+
+
+def test_output_repaired_once():
+    """Test that an invalid output gets exactly one repair call, and fails if that is invalid too."""
+    before = structured_output_stats()
+    output, llm = _execute('Score: 7', repaired='{"score": 7, "justification": "Clear."}')
+    assert output.pydantic.score == 7
+    assert llm.call.call_count == 1
+    assert 'justification' in llm.call.call_args.args[0][0]['content']
+
+    with pytest.raises(StructuredOutputError):
+        # Strict parsing does not coerce strings to integers.
+        _execute('Score: 7', repaired='{"score": "7", "justification": "Clear."}')
+    after = structured_output_stats()
+    assert (after.repaired - before.repaired, after.failed - before.failed) == (1, 1)
+    assert after.repair_calls - before.repair_calls == 2
+    assert base.parse_structured_output('{"score": 1, "justification": ""}', ScoreAgentOutputModel)
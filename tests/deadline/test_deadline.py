@@ -0,0 +1,146 @@
+import time
+import pathlib as plb
+from typing import Callable
+
+import pytest
+from crewai import CrewOutput
+from crewai.tasks.task_output import TaskOutput
+from crewai.tools import tool
+from crewai.types.usage_metrics import UsageMetrics
+
+from rfcrew.crews.rfc import SKIPPED_NOTE, RFCrew
+from rfcrew.deadline import Deadline, DeadlineExceeded, parse_duration
+
+CONFIG = plb.Path(__file__).parents[2] / 'config'
+# A draft with several components, so that the diagram is not skipped by its `run_if`.
+DRAFT = '## 🦉 The Actual Design\n---\n### Ingestion\n\n### Storage\n'
+
+
+@pytest.mark.parametrize(
+    'value,seconds',
+    [('90', 90), ('90s', 90), ('10m', 600), ('1h30m', 5400), ('1.5m', 90), ('7d', 604800)],
+)
+def test_parse_duration(value: str, seconds: float):
+    """Test that durations are parsed into seconds."""
+    assert parse_duration(value) == seconds
+
+
+@pytest.mark.parametrize('value', ['', 'soon', '10x', 'm10'])
+def test_parse_duration_rejects_invalid_values(value: str):
+    """Test that anything but a sequence of numbers with units is rejected."""
+    with pytest.raises(ValueError):
+        parse_duration(value)
+
+
+class _FakeCrew:
+    """Crew of a single task that runs `work` and then sets the task output."""
+
+    def __init__(self, crew_builder: RFCrew, name: str, work: Callable[[], None]):
+        self.task = crew_builder.tasks[name]
+        self.name = name
+        self.work = work
+
+    def kickoff(self, inputs: dict) -> CrewOutput:
+        self.work()
+        self.task.output = TaskOutput(
+            name=self.name,
+            description=self.name,
+            agent='agent',
+            raw=f'# {self.name}\n\n{DRAFT}' if self.name == 'rfc_author' else f'# {self.name}',
+        )
+        return CrewOutput(
+            raw=self.task.output.raw,
+            tasks_output=[self.task.output],
+            token_usage=UsageMetrics(total_tokens=10),
+        )
+
+
+def _slow(crew_builder: RFCrew, name: str) -> Callable[[], None]:
+    def _work() -> None:
+        # An agent loop that takes far too long, with crewai's step callback after each step.
+        agent = crew_builder.tasks[name].agent
+        for _ in range(500):
+            time.sleep(0.01)
+            agent.step_callback(None)
+
+    return _work
+
+
+@pytest.fixture
+def crew_builder(monkeypatch) -> RFCrew:
+    monkeypatch.setenv('GOOGLE_API_KEY', 'test')
+
+    @tool('dummy')
+    def dummy(query: str) -> str:
+        """Dummy tool."""
+        return query
+
+    crew_builder = RFCrew.from_config(
+        CONFIG / 'agents.yaml',
+        CONFIG / 'tasks.yaml',
+        tools={
+            name: dummy
+            for name in ('serper_dev_tool', 'scrape_website_tool', 'website_search_tool')
+        },
+    )
+    assert crew_builder.optional == {
+        'technical_diagram_illustrator',
+        'peer_reviewer',
+        'operational_and_risk_assessor',
+    }
+    return crew_builder
+
+
+def _use_fake_crews(crew_builder: RFCrew, slow: set[str]) -> list[str]:
+    started: list[str] = []
+
+    def _crew(planning_llm: str | None = None, task_names: list[str] | None = None):
+        [name] = task_names or []
+        started.append(name)
+        work = _slow(crew_builder, name) if name in slow else lambda: None
+        return _FakeCrew(crew_builder, name, work)
+
+    crew_builder.crew = _crew  # type: ignore[method-assign]
+    return started
+
+
+def test_slow_optional_task_is_cancelled(crew_builder: RFCrew):
+    """Test that an optional task past its timeout is cancelled and noted in the RFC."""
+    started = _use_fake_crews(crew_builder, slow={'technical_diagram_illustrator'})
+    crew_builder.timeouts['technical_diagram_illustrator'] = 0.2
+    start = time.perf_counter()
+    result = crew_builder.kickoff_with_deadline({'notes': '# Notes'}, Deadline(30))
+    assert time.perf_counter() - start < 2
+    assert list(crew_builder.skipped) == ['technical_diagram_illustrator']
+    assert 'technical_diagram_illustrator' in crew_builder._cancelled
+    assert len(started) == 6
+    assert result.raw.startswith('# editor\n\n' + SKIPPED_NOTE)
+    assert 'technical_diagram_illustrator' not in [task.name for task in result.tasks_output]
+    assert result.token_usage.total_tokens == 50
+
+
+def test_draft_is_returned_when_editor_runs_out_of_time(crew_builder: RFCrew):
+    """Test that optional stages are skipped near the deadline and the draft is returned."""
+    started = _use_fake_crews(crew_builder, slow={'editor'})
+    # With the whole budget reserved, no optional stage starts.
+    result = crew_builder.kickoff_with_deadline({'notes': '# Notes'}, Deadline(0.5, reserve=1.0))
+    assert started == ['rfc_research_assistant', 'rfc_author', 'editor']
+    assert list(crew_builder.skipped) == [
+        'technical_diagram_illustrator',
+        'peer_reviewer',
+        'operational_and_risk_assessor',
+        'editor',
+    ]
+    assert result.raw.startswith('# rfc_author\n\n')
+    # Tasks that use a skipped task as context are told to proceed without it.
+    assert 'skipped' in crew_builder.tasks['peer_reviewer'].output.raw
+
+
+def test_deadline_without_draft_raises(crew_builder: RFCrew):
+    """Test that later stages are skipped after a required stage is cut, without a draft."""
+    started = _use_fake_crews(crew_builder, slow={'rfc_author'})
+    with pytest.raises(DeadlineExceeded) as exc_info:
+        crew_builder.kickoff_with_deadline({'notes': '# Notes'}, Deadline(0.3))
+    assert started == ['rfc_research_assistant', 'rfc_author']
+    assert 'an earlier required stage' in crew_builder.skipped['editor']
+    assert exc_info.value.skipped == crew_builder.skipped
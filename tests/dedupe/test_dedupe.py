@@ -0,0 +1,64 @@
+import pathlib as plb
+
+from rfcrew.dedupe import (
+    MinHasher,
+    cluster_near_duplicates,
+    diff_documents,
+    estimate_jaccard,
+    shingles,
+)
+
+NOTES = (
+    'We have a Python application that retrieves data from an internal API and stores it in '
+    'BigQuery every ten minutes. We need to choose the best way of writing data to BigQuery '
+    'given that we are using a Python application on Google Cloud Run. We cannot use Pub/Sub. '
+    'All services must be deployed on Google Cloud Platform and we prefer serverless tools.'
+)
+
+
+def test_minhash_estimates_jaccard():
+    """Test that identical texts have identical signatures and disjoint texts do not."""
+    hasher = MinHasher(num_perm=64)
+    signature = hasher.signature(shingles(NOTES))
+    assert estimate_jaccard(signature, hasher.signature(shingles(NOTES))) == 1.0
+    other = hasher.signature(shingles('Completely unrelated notes about Kafka consumer lag.'))
+    assert estimate_jaccard(signature, other) < 0.2
+
+
+def test_cluster_near_duplicates():
+    """Test that a revised draft is clustered with the original and unrelated notes are not."""
+    documents = {
+        plb.Path('draft.md'): NOTES,
+        plb.Path('revised.md'): NOTES + ' We also want to use Protobuf.',
+        plb.Path('other.md'): 'Move our batch ingestion from Airflow to Cloud Composer 2 with '
+        'dynamic task mapping, and retire the legacy cron jobs on the VM.',
+    }
+    clusters = cluster_near_duplicates(documents, threshold=0.7)
+    assert len(clusters) == 2
+    cluster = next(c for c in clusters if c.members)
+    assert cluster.representative == plb.Path('revised.md')
+    assert cluster.members == [plb.Path('draft.md')]
+    assert cluster.similarities[plb.Path('draft.md')] >= 0.7
+
+
+def test_cluster_near_duplicates_does_not_chain():
+    """Test that a document similar to a member, but not to the representative, is split off."""
+    words = [f'word{i}' for i in range(130)]
+    documents = {
+        plb.Path('a.md'): ' '.join(words[0:105]),
+        plb.Path('b.md'): ' '.join(words[10:110]),
+        plb.Path('c.md'): ' '.join(words[20:120]),
+    }
+    clusters = cluster_near_duplicates(documents, threshold=0.76, num_perm=256, bands=64)
+    assert len(clusters) == 2
+    cluster = next(c for c in clusters if c.members)
+    assert cluster.representative == plb.Path('a.md')
+    assert cluster.members == [plb.Path('b.md')]
+    assert next(c for c in clusters if not c.members).representative == plb.Path('c.md')
+
+
+def test_diff_documents():
+    """Test that the diff report lists changed lines."""
+    diff = diff_documents('a\nb\n', 'a\nc\n', from_name='one.md', to_name='two.md')
+    assert '-b' in diff
+    assert '+c' in diff
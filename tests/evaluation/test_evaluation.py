@@ -0,0 +1,86 @@
+import pathlib as plb
+from types import SimpleNamespace
+
+import pytest
+
+from rfcrew import evaluation
+from rfcrew.crews.evaluator import EvaluationAgentModel
+from rfcrew.evaluation import EvalStore, EvalSuite, run_suite
+
+
+@pytest.fixture
+def suite(tmp_path: plb.Path) -> plb.Path:
+    (tmp_path / 'notes.md').write_text('Some notes')
+    (tmp_path / 'truth.md').write_text('# RFC')
+    (tmp_path / 'agents.yaml').write_text('agent: {}')
+    (tmp_path / 'tasks.yaml').write_text('task: {}')
+    path = tmp_path / 'suite.yaml'
+    path.write_text(
+        'cases:\n'
+        '  - {name: case, notes: notes.md, ground_truth: truth.md}\n'
+        'configs:\n'
+        '  - {name: a, agents_config: agents.yaml, tasks_config: tasks.yaml}\n'
+        '  - {name: b, agents_config: agents.yaml, tasks_config: tasks.yaml, planning_llm: x}\n'
+    )
+    return path
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    scores = {'a': 7, 'b': 8}
+
+    def _generate(path_to_notes, agents_config, tasks_config, planning_llm):
+        return None, SimpleNamespace(
+            raw=f'# Generated {planning_llm}', token_usage=SimpleNamespace(total_tokens=100)
+        )
+
+    def _compare(path_to_rfc, path_to_ground_truth):
+        config_name = path_to_rfc.stem.split('__')[1]
+        return EvaluationAgentModel(score=scores[config_name], justification='ok')
+
+    monkeypatch.setattr(evaluation, 'generate_rfc_from_notes', _generate)
+    monkeypatch.setattr(evaluation, 'compare_documents', _compare)
+    return scores
+
+
+def test_suite_paths_are_relative_to_suite_file(suite: plb.Path):
+    """Test that the suite name defaults to the file name and paths are resolved."""
+    loaded = EvalSuite.from_yaml(suite)
+    assert loaded.name == 'suite'
+    assert loaded.cases[0].notes == suite.parent / 'notes.md'
+    assert loaded.configs[0].config_hash != loaded.configs[1].config_hash
+
+
+def test_run_suite_records_results_and_diffs_previous_run(
+    suite: plb.Path, fake_llm: dict, tmp_path: plb.Path
+):
+    """Test that a second run is compared with the first one per case and config."""
+    loaded = EvalSuite.from_yaml(suite)
+    store = EvalStore(tmp_path / 'eval.db')
+
+    first_run, diffs = run_suite(loaded, store, tmp_path / 'out', max_workers=2)
+    assert {d.current.config_name: d.current.score for d in diffs} == {'a': 7, 'b': 8}
+    assert all(d.previous is None for d in diffs)
+    assert (tmp_path / 'out' / first_run / 'case__a.md').read_text() == '# Generated None'
+
+    fake_llm['a'] = 5
+    (tmp_path / 'tasks.yaml').write_text('task: {changed: true}')
+    _, diffs = run_suite(loaded, store, tmp_path / 'out', max_workers=2)
+    by_config = {d.current.config_name: d for d in diffs}
+    assert by_config['a'].score_delta == -2
+    assert by_config['b'].score_delta == 0
+    assert by_config['a'].tokens_delta == 0
+    assert by_config['a'].config_changed
+
+
+def test_failed_case_is_recorded(suite: plb.Path, monkeypatch, tmp_path: plb.Path):
+    """Test that an exception in one case is stored as an error instead of aborting the run."""
+
+    def _fail(**kwargs):
+        raise RuntimeError('quota exceeded')
+
+    monkeypatch.setattr(evaluation, 'generate_rfc_from_notes', _fail)
+    store = EvalStore(tmp_path / 'eval.db')
+    _, diffs = run_suite(EvalSuite.from_yaml(suite), store, tmp_path / 'out')
+    assert [d.current.error for d in diffs] == ['quota exceeded', 'quota exceeded']
+    assert all(d.current.score is None for d in diffs)
@@ -0,0 +1,109 @@
+import time
+import threading
+import pathlib as plb
+from typing import Any
+
+import pytest
+
+from rfcrew.jobs import JobKind, JobQueue, JobStatus, Worker
+
+
+@pytest.fixture
+def queue(tmp_path: plb.Path) -> JobQueue:
+    return JobQueue(tmp_path / 'queue.db', lease_seconds=0.2, retry_delay=0.0)
+
+
+def test_expired_lease_is_handed_to_another_worker(queue: JobQueue):
+    """Test that a job is leased to one worker at a time, and reclaimed once its lease expires."""
+    job_id = queue.enqueue(JobKind.score, {'path_to_notes': 'notes.md'}, max_attempts=2)
+    job = queue.claim('node-a')
+    assert (job.id, job.attempts, job.lease_owner) == (job_id, 1, 'node-a')
+    assert queue.claim('node-b') is None
+
+    time.sleep(0.3)
+    job = queue.claim('node-b')
+    assert (job.attempts, job.lease_owner) == (2, 'node-b')
+    # The worker that lost its lease can neither extend it nor store a result.
+    assert not queue.heartbeat(job_id, 'node-a')
+    assert not queue.complete(job_id, 'node-a', {'score': 1})
+    assert queue.complete(job_id, 'node-b', {'score': 8})
+    assert queue.get(job_id).result == {'score': 8}
+
+    # A job whose worker dies on the last attempt fails instead of being retried forever.
+    job_id = queue.enqueue(JobKind.score, {'path_to_notes': 'notes.md'}, max_attempts=1)
+    assert queue.claim('node-a').id == job_id
+    time.sleep(0.3)
+    assert queue.claim('node-b') is None
+    assert queue.get(job_id).status == JobStatus.failed
+
+
+def test_failed_jobs_are_retried_with_backoff(tmp_path: plb.Path):
+    """Test that failures are retried after a delay until the attempts run out."""
+    queue = JobQueue(tmp_path / 'queue.db', retry_delay=0.2)
+    job_id = queue.enqueue(JobKind.convert, {'path_to_rfc': 'rfc.md'}, max_attempts=2)
+    assert queue.fail(job_id, 'node-a', 'not leased') is False
+
+    queue.claim('node-a')
+    assert queue.fail(job_id, 'node-a', 'rate limited')
+    assert queue.get(job_id).status == JobStatus.queued
+    assert queue.claim('node-a') is None
+    time.sleep(0.25)
+    queue.claim('node-a')
+    queue.fail(job_id, 'node-a', 'rate limited')
+    job = queue.get(job_id)
+    assert (job.status, job.attempts, job.error) == (JobStatus.failed, 2, 'rate limited')
+
+
+def test_heartbeat_keeps_long_jobs_leased(queue: JobQueue):
+    """Test that a job that runs longer than its lease is not handed to another worker."""
+    started = threading.Event()
+
+    def _slow(payload: dict[str, Any]) -> dict[str, Any]:
+        started.set()
+        time.sleep(0.6)
+        return {'done': True}
+
+    job_id = queue.enqueue(JobKind.generate, {'path_to_notes': 'notes.md'})
+    worker = Worker(queue, handlers={JobKind.generate: _slow}, worker_id='node-a')
+    thread = threading.Thread(target=worker.run_once)
+    thread.start()
+    started.wait()
+    for _ in range(4):
+        time.sleep(0.15)
+        assert queue.claim('node-b') is None
+    thread.join()
+    assert queue.get(job_id).status == JobStatus.done
+
+
+def test_workers_process_each_job_once(tmp_path: plb.Path):
+    """Test that concurrent workers on one database split the jobs without duplicates."""
+    path = tmp_path / 'queue.db'
+    queue = JobQueue(path)
+    job_ids = {queue.enqueue(JobKind.score, {'path_to_notes': f'{i}.md'}) for i in range(30)}
+    seen: list[str] = []
+    lock = threading.Lock()
+
+    def _score(payload: dict[str, Any]) -> dict[str, Any]:
+        if payload['path_to_notes'] == '0.md':
+            raise RuntimeError('quota exceeded')
+        with lock:
+            seen.append(payload['path_to_notes'])
+        return {'score': 7}
+
+    # Each worker opens the database separately, as workers on other nodes would.
+    workers = [
+        Worker(JobQueue(path, retry_delay=0.0), handlers={JobKind.score: _score}, worker_id=f'w{i}')
+        for i in range(4)
+    ]
+    threads = [threading.Thread(target=w.run, kwargs={'burst': True}) for w in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(seen) == sorted(f'{i}.md' for i in range(1, 30))
+    counts = queue.counts()
+    assert (counts[JobStatus.done], counts[JobStatus.failed]) == (29, 1)
+    [failed] = queue.jobs(status=JobStatus.failed)
+    assert failed.id in job_ids
+    assert (failed.attempts, failed.error) == (3, 'RuntimeError: quota exceeded')
@@ -0,0 +1,74 @@
+import pathlib as plb
+
+import pytest
+
+from rfcrew.knowledge import (
+    ResearchKnowledgeBase,
+    build_match_query,
+    extract_sources,
+    format_prior_research,
+    NO_PRIOR_RESEARCH,
+)
+
+
+@pytest.fixture
+def knowledge_base(tmp_path: plb.Path) -> ResearchKnowledgeBase:
+    """Provides an empty knowledge base backed by a temporary SQLite file."""
+    return ResearchKnowledgeBase(tmp_path / 'knowledge.db')
+
+
+def test_extract_sources():
+    """Test that cited URLs are extracted once, in order."""
+    report = (
+        'See [docs](https://cloud.google.com/bigquery/docs/write-api). '
+        'Also https://example.com/a, and again https://cloud.google.com/bigquery/docs/write-api.'
+    )
+    assert extract_sources(report) == [
+        'https://cloud.google.com/bigquery/docs/write-api',
+        'https://example.com/a',
+    ]
+
+
+def test_build_match_query_ignores_stopwords():
+    """Test that the FTS query only contains meaningful terms."""
+    assert build_match_query('the and for') is None
+    assert build_match_query('BigQuery write API with the protobuf') == (
+        '"bigquery" OR "write" OR "api" OR "protobuf"'
+    )
+
+
+def test_knowledge_base_add_and_search(knowledge_base: ResearchKnowledgeBase):
+    """Test that relevant reports are retrieved and duplicates are ignored."""
+    report_id = knowledge_base.add(
+        notes='Ingest data into BigQuery using the Storage Write API',
+        report='## Research Summary\nUse the BigQuery Storage Write API default stream.\n'
+        '## Sources\n- https://cloud.google.com/bigquery/docs/write-api',
+    )
+    knowledge_base.add(
+        notes='Batch ingestion strategy for the data lake',
+        report='## Research Summary\nUse scheduled batch loads from GCS.',
+    )
+    assert report_id is not None
+    assert (
+        knowledge_base.add(
+            notes='Other notes',
+            report='## Research Summary\nUse the BigQuery Storage Write API default stream.\n'
+            '## Sources\n- https://cloud.google.com/bigquery/docs/write-api',
+        )
+        is None
+    )
+    assert len(knowledge_base) == 2
+
+    results = knowledge_base.search('How do we write protobuf rows to BigQuery?', limit=1)
+    assert len(results) == 1
+    assert results[0].id == report_id
+    assert results[0].sources == ['https://cloud.google.com/bigquery/docs/write-api']
+
+
+def test_format_prior_research_truncates(knowledge_base: ResearchKnowledgeBase):
+    """Test that formatted research respects the character budget."""
+    assert format_prior_research([]) == NO_PRIOR_RESEARCH
+    knowledge_base.add(notes='kafka streaming', report='kafka ' * 1000)
+    formatted = format_prior_research(knowledge_base.search('kafka'), max_chars=100)
+    assert '[... report truncated ...]' in formatted
+    assert len(formatted) < 300
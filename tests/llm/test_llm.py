@@ -0,0 +1,87 @@
+import json
+import inspect
+import threading
+from typing import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from crewai import LLM
+
+from rfcrew import llm
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        body = json.dumps(
+            {
+                'candidates': [
+                    {
+                        'content': {'parts': [{'text': 'ok'}], 'role': 'model'},
+                        'finishReason': 'STOP',
+                    }
+                ],
+                'usageMetadata': {
+                    'promptTokenCount': 3,
+                    'candidatesTokenCount': 1,
+                    'totalTokenCount': 4,
+                },
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server() -> Iterator[str]:
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _StandInHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}'
+    httpd.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def reset_pool() -> Iterator[None]:
+    llm.reset()
+    yield
+    llm.reset()
+
+
+def test_llm_calls_reuse_connections(server: str, monkeypatch: pytest.MonkeyPatch):
+    """Test that LLM calls from several agents are sent over one kept-alive connection."""
+    # Use the model cost map bundled with LiteLLM instead of downloading it.
+    monkeypatch.setenv('LITELLM_LOCAL_MODEL_COST_MAP', 'True')
+    # Newer crewai versions route Gemini to a native client unless LiteLLM is requested.
+    kwargs = (
+        {'is_litellm': True} if 'is_litellm' in inspect.signature(LLM.__init__).parameters else {}
+    )
+    for _ in range(3):
+        agent_llm = llm.get_llm(
+            'gemini/gemini-2.5-flash', api_key='test', api_base=server, **kwargs
+        )
+        assert agent_llm.call('Say ok') == 'ok'
+    stats = llm.pool_stats()
+    assert (stats.requests, stats.connections, stats.reused_connections) == (3, 1, 2)
+
+
+def test_get_llm_shares_configurations():
+    """Test that LLMs are cached per model and configuration and handed out as copies."""
+    first = llm.get_llm('gemini/gemini-2.5-flash', temperature=0.2, api_key='test')
+    second = llm.get_llm('gemini/gemini-2.5-flash', temperature=0.2, api_key='test')
+    assert second is not first
+    second.stop = ['Observation:']
+    assert first.stop != second.stop
+    assert (
+        llm.get_llm('gemini/gemini-2.5-flash', temperature=0.7, api_key='test').temperature == 0.7
+    )
+    stats = llm.pool_stats()
+    assert (stats.llm_instances, stats.llm_reuses) == (2, 1)
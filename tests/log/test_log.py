@@ -0,0 +1,107 @@
+import json
+import time
+import queue
+import logging
+import pathlib as plb
+from typing import Iterator
+from logging.handlers import QueueListener
+
+import pytest
+
+from rfcrew import log
+
+
+@pytest.fixture(autouse=True)
+def restore_logger() -> Iterator[None]:
+    root = logging.getLogger('rfcrew')
+    handlers, level, propagate = root.handlers, root.level, root.propagate
+    yield
+    log.stop_logging()
+    root.handlers, root.level, root.propagate = handlers, level, propagate
+
+
+class _Expensive:
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self) -> str:
+        self.formatted += 1
+        return 'x' * 100_000
+
+
+def test_preview_is_lazy_and_bounded():
+    """Test that previews are only formatted for emitted records, and then truncated."""
+    logger = logging.getLogger('rfcrew.test')
+    logger.setLevel(logging.INFO)
+    value = _Expensive()
+    logger.debug('Output: %s', log.Preview(value))
+    assert value.formatted == 0
+
+    preview = str(log.Preview(value, max_chars=10))
+    assert preview == 'x' * 10 + '… [99990 more characters]'
+    assert str(log.Preview('short')) == 'short'
+
+
+def test_json_lines_sink_caps_messages(tmp_path: plb.Path):
+    """Test that the file sink receives capped JSON records with their extra fields."""
+    log_file = tmp_path / 'rfcrew.jsonl'
+    log.configure_logging(log_file=log_file, json_lines=True, max_chars=100)
+    logger = logging.getLogger('rfcrew.test')
+    logger.debug('Not written without --verbose')
+    logger.info('Raw output: %s', 'y' * 1_000, extra={'task': 'editor'})
+    log.stop_logging()
+
+    [entry] = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert entry['message'] == 'Raw output: ' + 'y' * 88 + '… [912 more characters]'
+    assert (entry['level'], entry['logger'], entry['task']) == ('INFO', 'rfcrew.test', 'editor')
+
+
+def _recurse(depth: int) -> None:
+    if depth == 0:
+        raise ValueError('Draft is empty')
+    _recurse(depth - 1)
+
+
+def test_exceptions_are_kept_in_full(tmp_path: plb.Path):
+    """Test that long tracebacks are not truncated with the message and end up in JSON lines."""
+    log_file = tmp_path / 'rfcrew.jsonl'
+    log.configure_logging(log_file=log_file, json_lines=True, max_chars=100)
+    try:
+        _recurse(60)
+    except ValueError:
+        logging.getLogger('rfcrew.test').exception('Failed: %s', 'z' * 1_000)
+    log.stop_logging()
+
+    [entry] = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert entry['message'] == 'Failed: ' + 'z' * 92 + '… [908 more characters]'
+    assert entry['exception'].startswith('Traceback (most recent call last):')
+    assert 'Previous line repeated 57 more times' in entry['exception']
+    assert entry['exception'].endswith('ValueError: Draft is empty')
+
+
+def test_slow_sinks_do_not_block_logging():
+    """Test that records are handed off to the listener instead of written by the caller."""
+
+    class _SlowHandler(logging.Handler):
+        def __init__(self):
+            super().__init__()
+            self.messages: list[str] = []
+
+        def emit(self, record: logging.LogRecord) -> None:
+            time.sleep(0.05)
+            self.messages.append(record.getMessage())
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    sink = _SlowHandler()
+    listener = QueueListener(log_queue, sink)
+    listener.start()
+    logger = logging.getLogger('rfcrew.test.slow')
+    logger.propagate = False
+    logger.handlers = [log.BoundedQueueHandler(log_queue, max_chars=5)]
+    start = time.perf_counter()
+    for idx in range(10):
+        logger.warning('Message %d', idx)
+    assert time.perf_counter() - start < 0.25
+    listener.stop()
+    assert sink.messages[:2] == ['Messa… [4 more characters]', 'Messa… [4 more characters]']
+    assert len(sink.messages) == 10
@@ -0,0 +1,89 @@
+from types import SimpleNamespace
+
+import pytest
+
+from rfcrew.mermaid import MermaidGuardrail, validate_markdown, validate_mermaid
+
+VALID_FLOWCHART = """graph TD
+    Input[Data Source] --> Process{"Data Validation (Rule Engine)"};
+    Process -- Valid --> Transform["Data Transformation (.ToUpper())"];
+    Process -->|Invalid| ErrorLog[Log Error];
+    Transform & ErrorLog -.-> Output[(Target Storage)]
+    subgraph storage
+        direction LR
+        Output ==> Archive([Archive])
+    end
+    classDef db fill:#f9f
+    class Output db
+"""
+
+VALID_SEQUENCE = """sequenceDiagram
+    participant C as Client
+    participant S as Server
+    C->>S: Request
+    alt cached
+        S-->>C: Cached response
+    else miss
+        S->>+DB: Query
+        DB-->>-S: Rows
+    end
+    Note over C,S: Done
+"""
+
+
+@pytest.mark.parametrize(
+    'diagram',
+    [
+        'graph TD\n  A-->B',
+        'graph TD\n  A-.->B',
+        'graph LR\n  A==>B\n  B---C',
+        'graph TD\n  api-gateway-->|calls|user-service[User service]',
+        'flowchart TD\n  A-->B-.->C==>D',
+    ],
+)
+def test_compact_links(diagram: str):
+    """Test that links without spaces are not read as part of the node ids."""
+    validation = validate_mermaid(diagram)
+    assert validation.valid, validation.errors
+
+
+def test_valid_diagrams():
+    """Test that common flowchart and sequence diagram syntax is accepted."""
+    assert validate_mermaid(VALID_FLOWCHART).valid
+    assert validate_mermaid(VALID_SEQUENCE).valid
+    assert validate_mermaid('erDiagram\n    USER ||--o{ ORDER : places\n').valid
+
+
+@pytest.mark.parametrize(
+    'diagram,line,message',
+    [
+        ('graph TD\n    A[Serialize (.ToString)] --> B', 2, 'double quotes'),
+        ('graph TD\n    A["unterminated] --> B', 2, 'quoted label'),
+        ('graph TD\n    A --> B[Open', 2, 'Missing'),
+        ('graph TD\n    A -->', 2, 'target'),
+        ('graph TD\n    subgraph x\n    A --> B', 3, 'unclosed'),
+        ('sequenceDiagram\n    A->>B hello', 2, 'Cannot parse'),
+        ('sequenceDiagram\n    loop every minute\n    A->>B: ping', 3, 'Unclosed'),
+        ('graphs TD\n    A --> B', 1, 'Unknown diagram type'),
+    ],
+)
+def test_invalid_diagrams(diagram: str, line: int, message: str):
+    """Test that syntax errors are reported with their line number."""
+    validation = validate_mermaid(diagram)
+    assert not validation.valid
+    assert validation.errors[0].line == line
+    assert message in validation.errors[0].message
+
+
+def test_guardrail_retries_then_accepts():
+    """Test that the guardrail returns feedback until its retries are exhausted."""
+    guardrail = MermaidGuardrail(max_retries=1)
+    invalid = SimpleNamespace(raw='```mermaid\ngraph TD\n    A[f(x)] --> B\n```')
+    ok, feedback = guardrail(invalid)
+    assert not ok
+    assert 'line 2' in feedback
+    ok, result = guardrail(invalid)
+    assert ok
+    assert result.startswith(invalid.raw)
+    assert '<!-- Mermaid validation failed' in result
+    assert not validate_markdown('No diagram here.').valid
@@ -0,0 +1,107 @@
+import pathlib as plb
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from crewai.tools import tool
+from crewai.utilities.planning_handler import CrewPlanner, PlannerTaskPydanticOutput, PlanPerTask
+
+from rfcrew.crews import rfc
+from rfcrew.crews.rfc import RFCrew
+from rfcrew.planning import PlanCache, create_plans, neutralize_placeholders
+
+CONFIG = plb.Path(__file__).parents[2] / 'config'
+INPUTS = {'notes': '# Notes', 'prior_research': 'None'}
+
+
+def _crew_builder(**kwargs: Any) -> RFCrew:
+    @tool('dummy')
+    def dummy(query: str) -> str:
+        """Dummy tool."""
+        return query
+
+    return RFCrew.from_config(
+        CONFIG / 'agents.yaml',
+        CONFIG / 'tasks.yaml',
+        tools={
+            name: dummy
+            for name in ('serper_dev_tool', 'scrape_website_tool', 'website_search_tool')
+        },
+        **kwargs,
+    )
+
+
+@pytest.fixture
+def crew_builder(monkeypatch) -> RFCrew:
+    monkeypatch.setenv('GOOGLE_API_KEY', 'test')
+    return _crew_builder()
+
+
+def _fake_plans(tasks, planning_llm, inputs=None) -> dict[str, str]:
+    return {name: f'Plan for {name}: read `notes`.' for name in tasks}
+
+
+def test_neutralize_placeholders():
+    """Test that placeholders are neutralized while JSON in plans is kept."""
+    plan = 'Use {notes} and return {"score": 1}.'
+    assert neutralize_placeholders(plan) == 'Use `notes` and return {"score": 1}.'
+
+
+def test_create_plans_maps_plans_to_tasks(crew_builder: RFCrew):
+    """Test that plans are mapped to task names and that the planner sees interpolated tasks."""
+    tasks = {name: crew_builder.tasks[name] for name in ('rfc_research_assistant', 'editor')}
+    result = PlannerTaskPydanticOutput(
+        list_of_plans_per_task=[
+            PlanPerTask(task_number=2, task='editor', plan='Edit the {notes}.'),
+            PlanPerTask(task_number=1, task='research', plan='Research.'),
+        ]
+    )
+    planners = []
+
+    def _handle_crew_planning(self):
+        planners.append(self)
+        return result
+
+    with patch.object(CrewPlanner, '_handle_crew_planning', _handle_crew_planning):
+        plans = create_plans(tasks, planning_llm=None, inputs=INPUTS)
+        assert plans == {'rfc_research_assistant': 'Research.', 'editor': 'Edit the `notes`.'}
+        assert '# Notes' in planners[0].tasks[0].description
+        create_plans(tasks, planning_llm=None)
+        assert '{notes}' in planners[1].tasks[0].description
+    # The tasks themselves are not interpolated.
+    assert '{notes}' in tasks['rfc_research_assistant'].description
+
+
+def test_plans_are_cached_by_config(tmp_path: plb.Path, crew_builder: RFCrew):
+    """Test that plans are only created once per config, and can be added to the tasks."""
+    cache = PlanCache(tmp_path / 'plans.db')
+    with (
+        patch.object(rfc, '_planning_llm'),
+        patch.object(rfc, 'create_plans', side_effect=_fake_plans) as create,
+    ):
+        crew_builder.plan('gemini/flash', INPUTS, cache=cache)
+        # A new crew with the same config reuses the plans, also for other notes.
+        _crew_builder().plan('gemini/flash', {**INPUTS, 'notes': '# Other'}, cache=cache)
+        assert create.call_count == 1
+        _crew_builder().plan('gemini/pro', INPUTS, cache=cache)
+        _crew_builder(patch_editor=True).plan('gemini/flash', INPUTS, cache=cache)
+        for _ in range(2):
+            _crew_builder().plan('gemini/flash', INPUTS, cache=cache, per_notes=True)
+        assert create.call_count == 4
+    assert sorted(entry.hits for entry in cache.entries()) == [0, 0, 1, 1]
+
+    # The plans are added to the tasks and survive crewai's interpolation of the tasks.
+    task = crew_builder.tasks['rfc_research_assistant']
+    task.interpolate_inputs_and_add_conversation_history(INPUTS)
+    assert '{notes}' not in task.description and '# Notes' in task.description
+    assert task.description.endswith('Plan for rfc_research_assistant: read `notes`.')
+
+
+def test_clear(tmp_path: plb.Path):
+    """Test that plans can be cleared by age."""
+    cache = PlanCache(tmp_path / 'plans.db')
+    cache.put('a', {'editor': 'Plan'}, planning_llm='gemini/flash', scope='config')
+    assert cache.clear(older_than=3600) == 0
+    assert cache.get('a') == {'editor': 'Plan'}
+    assert cache.clear() == 1
+    assert cache.get('a') is None
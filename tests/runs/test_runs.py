@@ -0,0 +1,153 @@
+import pathlib as plb
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from crewai import CrewOutput
+from crewai.tasks.task_output import TaskOutput
+from typer.testing import CliRunner
+
+from rfcrew import cli
+from rfcrew.crews.assessor import ScoreAgentOutputModel
+from rfcrew.deadline import DeadlineExceeded
+from rfcrew.runs import RunInputs, RunStore
+
+FEEDBACK = ScoreAgentOutputModel(score=8, justification='Clear.')
+
+
+def _output(rfc: str) -> CrewOutput:
+    tasks = [
+        TaskOutput(name=name, description=name, agent='agent', raw=raw)
+        for name, raw in (('rfc_research_assistant', 'Research'), ('editor', rfc))
+    ]
+    return CrewOutput(raw=rfc, tasks_output=tasks)
+
+
+@pytest.fixture
+def inputs(tmp_path: plb.Path) -> RunInputs:
+    agents_config = tmp_path / 'agents.yaml'
+    agents_config.write_text('editor:\n  llm: gemini/gemini-2.5-flash\n')
+    tasks_config = tmp_path / 'tasks.yaml'
+    tasks_config.write_text('editor:\n  description: Edit\n')
+    notes = tmp_path / 'notes.md'
+    notes.write_text('# Notes\n')
+    return RunInputs(
+        notes=notes.read_text(),
+        notes_path=notes,
+        agents_config=agents_config,
+        tasks_config=tasks_config,
+    )
+
+
+def test_lookup_returns_run_with_identical_inputs(tmp_path: plb.Path, inputs: RunInputs):
+    """Test that runs are found by their inputs and that artifacts are stored once."""
+    store = RunStore(tmp_path / 'runs')
+    assert store.lookup(inputs) is None
+    store.record(inputs, FEEDBACK, output=None, latency=1.0)
+    assert store.lookup(inputs) is None
+
+    run = store.record(inputs, FEEDBACK, output=_output('```markdown\n# RFC\n```'), latency=2.0)
+    assert store.lookup(inputs) == run
+    assert (run.models, run.score) == (['gemini/gemini-2.5-flash'], 8)
+    assert store.artifacts.get(run.rfc) == '# RFC'
+    assert [task.task_name for task in run.tasks] == ['rfc_research_assistant', 'editor']
+
+    again = store.record(inputs, FEEDBACK, output=_output('```markdown\n# RFC\n```'), latency=2.0)
+    assert again.rfc == run.rfc
+    assert len(list((tmp_path / 'runs' / 'objects').rglob('*/*'))) == 3
+    assert store.get(again.id[:-2]) == again
+    assert store.get('2') is None  # Not unique
+
+    assert store.lookup(inputs.model_copy(update={'planning_llm': 'gemini/flash'})) is None
+    assert store.lookup(inputs.model_copy(update={'knowledge_base': True})) is None
+    assert store.lookup(inputs.model_copy(update={'plans_per_notes': True})) is None
+    assert store.lookup(inputs.model_copy(update={'notes': '# Other notes\n'})) is None
+    assert len(store.latest(notes='# Notes')) == 3
+
+    paths = store.export(run, tmp_path / 'export')
+    assert [path.name for path in paths] == [
+        'rfc.md',
+        '01_rfc_research_assistant.md',
+        '02_editor.md',
+        'run.json',
+    ]
+
+
+def test_lookups_use_indexes(tmp_path: plb.Path, inputs: RunInputs):
+    """Test that lookups, listings and id prefixes do not scan the runs table."""
+    store = RunStore(tmp_path / 'runs')
+    with store._connect() as conn:
+        for sql, params in (
+            (
+                "SELECT * FROM runs WHERE input_hash = ? AND status = 'done' "
+                'ORDER BY created_at DESC LIMIT 1',
+                ('x',),
+            ),
+            ('SELECT * FROM runs WHERE id >= ? AND id < ? LIMIT 2', ('a', 'b')),
+            ('SELECT * FROM runs ORDER BY created_at DESC LIMIT ?', (20,)),
+            ('SELECT * FROM runs WHERE notes_hash = ? ORDER BY created_at DESC LIMIT ?', ('x', 20)),
+        ):
+            plan = ' '.join(
+                row['detail'] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            )
+            assert 'USING' in plan and 'TEMP B-TREE' not in plan, plan
+
+
+def test_generate_reuses_identical_run(tmp_path: plb.Path, inputs: RunInputs):
+    """Test that `generate --reuse` only runs the crew once for the same notes and configuration."""
+    state = SimpleNamespace(notes_feedback=FEEDBACK, skipped_stages={})
+    args = [
+        '--output-directory',
+        str(tmp_path),
+        'generate',
+        str(inputs.notes_path),
+        '--agents-config',
+        str(inputs.agents_config),
+        '--tasks-config',
+        str(inputs.tasks_config),
+        '--runs-dir',
+        str(tmp_path / 'runs'),
+        '--no-knowledge-base',
+    ]
+    with patch.object(
+        cli, 'generate_rfc_from_notes', return_value=(state, _output('# RFC'))
+    ) as generate:
+        for _ in range(2):
+            result = CliRunner().invoke(cli.app, [*args, '--reuse'])
+            assert result.exit_code == 0, result.output
+        CliRunner().invoke(cli.app, args)
+        CliRunner().invoke(cli.app, [*args, '--reuse', '--knowledge-base'])
+    assert generate.call_count == 3
+    [path_to_rfc] = tmp_path.glob('rfc_notes_*.md')
+    assert path_to_rfc.read_text() == '# RFC'
+
+
+def test_generate_records_failed_run_when_deadline_is_exceeded(
+    tmp_path: plb.Path, inputs: RunInputs
+):
+    """Test that `generate` reports the skipped stages and exits if there is no draft."""
+    error = DeadlineExceeded('No draft.', skipped={'rfc_author': 'it ran past its timeout'})
+    with patch.object(cli, 'generate_rfc_from_notes', side_effect=error):
+        result = CliRunner().invoke(
+            cli.app,
+            [
+                '--output-directory',
+                str(tmp_path),
+                'generate',
+                str(inputs.notes_path),
+                '--agents-config',
+                str(inputs.agents_config),
+                '--tasks-config',
+                str(inputs.tasks_config),
+                '--runs-dir',
+                str(tmp_path / 'runs'),
+                '--no-knowledge-base',
+                '--deadline',
+                '1m',
+            ],
+        )
+    assert result.exit_code == 1
+    assert 'Skipped rfc_author' in result.output
+    [run] = RunStore(tmp_path / 'runs').latest()
+    assert (run.status, run.rfc) == ('failed', None)
+    assert list(tmp_path.glob('rfc_*.md')) == []
@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+
+import pytest
+
+from rfcrew import scraping
+from rfcrew.ranking import bm25_scores
+from rfcrew.scraping import RelevantScrapeWebsiteTool, extract_main_text, select_passages
+
+FILLER = ' '.join(['General information about the product and its history.'] * 20)
+
+PAGE = f"""
+<html>
+<head><title>Docs</title><script>var tracking = 1;</script></head>
+<body>
+<div id="cookie-banner"><p>We use cookies to improve your experience.</p></div>
+<nav><ul><li>Home</li><li>Pricing</li></ul></nav>
+<main>
+  <h1>Storage Write API</h1>
+  <p>{FILLER}</p>
+  <h2>Exactly-once delivery</h2>
+  <p>Use committed streams with stream offsets to get exactly-once semantics.</p>
+  <ul><li>Offsets are tracked per stream.</li></ul>
+  <h2>Pricing</h2>
+  <p>{FILLER}</p>
+  <pre>client.append_rows(requests)
+client.finalize()</pre>
+</main>
+<footer><p>Copyright 2025</p></footer>
+</body>
+</html>
+"""
+
+
+def test_extract_main_text_removes_boilerplate():
+    """Test that navigation, banners, scripts and footers are dropped and structure is kept."""
+    text = extract_main_text(PAGE)
+    for boilerplate in ('cookies', 'Home', 'tracking', 'Copyright'):
+        assert boilerplate not in text
+    assert '## Exactly-once delivery' in text
+    assert '* Offsets are tracked per stream.' in text
+    assert 'client.append_rows(requests)\nclient.finalize()' in text
+
+
+@pytest.mark.parametrize(
+    'wrapper', ['<div class="md-container has-sidebar">', '<div class="shared-layout">']
+)
+def test_extract_main_text_keeps_wrappers_of_the_content(wrapper: str):
+    """Test that wrappers whose classes resemble boilerplate are not removed with the content."""
+    html = PAGE.replace('<main>', f'{wrapper}<main>').replace('</main>', '</main></div>')
+    text = extract_main_text(html)
+    assert '## Exactly-once delivery' in text
+    assert 'cookies' not in text
+
+
+def test_extract_main_text_keeps_wrappers_without_main():
+    """Test that an element holding most of the page text is not treated as boilerplate."""
+    html = (
+        f'<body><div class="has-sidebar"><p>{FILLER}</p></div><div class="menu">Home</div></body>'
+    )
+    text = extract_main_text(html)
+    assert 'General information' in text
+    assert 'Home' not in text
+
+
+def test_select_passages_ranks_and_caps():
+    """Test that the most relevant passage is kept with its heading within the token budget."""
+    text = extract_main_text(PAGE)
+    passages = select_passages(text, 'exactly-once semantics with stream offsets', max_tokens=100)
+    assert len(passages) == 1
+    assert passages[0].text.startswith('## Exactly-once delivery')
+    assert 'Offsets are tracked' in passages[0].text
+
+    # Without any matching terms, the page is returned from the top within the budget.
+    unmatched = select_passages(text, 'kubernetes', max_tokens=100)
+    assert unmatched[0].index == 0
+    assert sum(len(p.text) for p in unmatched) <= 400
+
+
+def test_bm25_prefers_rare_terms():
+    """Test that documents matching rarer query terms rank higher."""
+    scores = bm25_scores(
+        ['streams and offsets', 'streams only', 'nothing relevant here'], 'streams offsets'
+    )
+    assert scores[0] > scores[1] > scores[2] == 0
+
+
+def test_tool_falls_back_to_default_query(monkeypatch: pytest.MonkeyPatch):
+    """Test that the tool ranks passages against the notes if the agent passes no query."""
+    monkeypatch.setattr(
+        scraping,
+        '_get',
+        lambda *args, **kwargs: SimpleNamespace(text=PAGE, apparent_encoding='utf-8'),
+    )
+    tool = RelevantScrapeWebsiteTool(default_query='exactly-once delivery', max_tokens=100)
+    output = tool.run(website_url='https://example.com')
+    assert 'committed streams' in output
+    assert 'cookies' not in output
+    assert 'General information' not in output
@@ -0,0 +1,95 @@
+import socket
+import threading
+import pathlib as plb
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from rfcrew.telemetry import (
+    EndpointHealthChecker,
+    OTLPSpool,
+    TRACES_PATH,
+    parse_endpoint,
+)
+
+
+class _CollectorHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.received.append((self.path, body))
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def collector():
+    """Provides a local stand-in for an OTLP/HTTP collector."""
+    server = HTTPServer(('127.0.0.1', 0), _CollectorHandler)
+    server.received = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_parse_endpoint():
+    """Test parsing of OTLP endpoints."""
+    assert parse_endpoint('http://127.0.0.1:4318') == ('127.0.0.1', 4318)
+    with pytest.raises(ValueError):
+        parse_endpoint('collector')
+
+
+def test_spool_spills_to_disk_when_endpoint_is_down(tmp_path: plb.Path):
+    """Test that payloads are spooled to disk, not lost, when the collector is down."""
+    endpoint = f'http://127.0.0.1:{_free_port()}'
+    spool = OTLPSpool(endpoint, spool_directory=tmp_path, timeout=0.5)
+    assert not spool.health_checker.check()
+    spool.submit(TRACES_PATH, b'payload')
+    spool.shutdown()
+    assert [p.read_bytes() for p in tmp_path.glob('*.traces')] == [b'payload']
+
+
+def test_spool_is_bounded(tmp_path: plb.Path):
+    """Test that the oldest payloads are dropped when the spool exceeds its size."""
+    spool = OTLPSpool('http://127.0.0.1:1', spool_directory=tmp_path, max_spool_bytes=10)
+    spool.shutdown()
+    for payload in (b'first-', b'second', b'third-'):
+        spool.submit(TRACES_PATH, payload)
+    assert [p.read_bytes() for p in sorted(tmp_path.glob('*.traces'))] == [b'third-']
+
+
+def test_spool_replays_when_endpoint_is_back(tmp_path: plb.Path, collector: HTTPServer):
+    """Test that spooled payloads are delivered once the collector is reachable."""
+    endpoint = f'http://127.0.0.1:{collector.server_address[1]}'
+    offline = OTLPSpool('http://127.0.0.1:1', spool_directory=tmp_path)
+    offline.shutdown()
+    offline.submit(TRACES_PATH, b'spooled')
+
+    spool = OTLPSpool(
+        endpoint, spool_directory=tmp_path, health_checker=EndpointHealthChecker(endpoint)
+    )
+    assert spool.health_checker.check()
+    assert spool.replay() == 1
+    assert collector.received == [(TRACES_PATH, b'spooled')]
+    assert list(tmp_path.glob('*.traces')) == []
+
+
+def test_shutdown_delivers_queued_payloads(tmp_path: plb.Path, collector: HTTPServer):
+    """Test that payloads queued at shutdown are sent while the collector is reachable."""
+    endpoint = f'http://127.0.0.1:{collector.server_address[1]}'
+    spool = OTLPSpool(endpoint, spool_directory=tmp_path)
+    spool.start()
+    assert spool.health_checker.check()
+    spool.submit(TRACES_PATH, b'last')
+    spool.shutdown()
+    assert collector.received == [(TRACES_PATH, b'last')]
+    assert list(tmp_path.glob('*.traces')) == []
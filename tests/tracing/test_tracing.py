@@ -0,0 +1,48 @@
+import pathlib as plb
+
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+
+from rfcrew.tracing import JsonLinesSpanExporter, read_spans, render_waterfall
+
+
+def test_json_lines_exporter_writes_nested_spans(tmp_path: plb.Path):
+    """Test that spans are written with their parent ids and attributes."""
+    path = tmp_path / 'trace.jsonl'
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(JsonLinesSpanExporter(path)))
+    tracer = provider.get_tracer('test')
+    with tracer.start_as_current_span('RFCFlow.ok'):
+        with tracer.start_as_current_span('task editor', attributes={'rfcrew.task.name': 'editor'}):
+            pass
+
+    spans = read_spans(path)
+    assert [s['name'] for s in spans] == ['task editor', 'RFCFlow.ok']
+    assert spans[0]['parent_id'] == spans[1]['span_id']
+    assert spans[0]['attributes'] == {'rfcrew.task.name': 'editor'}
+
+
+def test_render_waterfall():
+    """Test that the waterfall is indented by depth and scaled to the trace duration."""
+    spans = [
+        {
+            'name': 'root',
+            'trace_id': 't',
+            'span_id': 'a',
+            'parent_id': None,
+            'start_time': 0,
+            'end_time': 4_000_000_000,
+        },
+        {
+            'name': 'child',
+            'trace_id': 't',
+            'span_id': 'b',
+            'parent_id': 'a',
+            'start_time': 2_000_000_000,
+            'end_time': 4_000_000_000,
+        },
+    ]
+    lines = render_waterfall(spans, width=4)
+    assert lines[0] == 'trace t (4.00s)'
+    assert lines[1].startswith('root ') and '|████|' in lines[1]
+    assert lines[2].startswith('  child ') and '|  ██|' in lines[2]
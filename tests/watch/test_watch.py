@@ -0,0 +1,70 @@
+import time
+import threading
+import pathlib as plb
+
+from rfcrew.crews.assessor import ScoreAgentOutputModel
+from rfcrew.watch import NotesWatcher, ScoreCache
+
+
+class FakeScorer:
+    def __init__(self):
+        self.calls: list[str] = []
+
+    def __call__(self, notes: str) -> ScoreAgentOutputModel:
+        self.calls.append(notes)
+        return ScoreAgentOutputModel(score=len(notes.split()), justification='Counted words.')
+
+
+def test_score_file_skips_unchanged_and_uses_cache(tmp_path: plb.Path):
+    """Test that unchanged files are skipped and known content is served from cache."""
+    scorer = FakeScorer()
+    cache = ScoreCache(tmp_path / 'scores.db')
+    notes = tmp_path / 'notes' / 'a.md'
+    notes.parent.mkdir()
+    notes.write_text('one two three')
+
+    watcher = NotesWatcher(notes.parent, cache=cache, scorer=scorer)
+    [first] = list(watcher.score_all())
+    assert first.result.score == 3 and not first.cached
+    assert watcher.score_file(notes) is None
+
+    notes.write_text('one two three four')
+    assert watcher.score_file(notes).result.score == 4
+    notes.write_text('one two three')
+    assert watcher.score_file(notes).cached
+    assert len(scorer.calls) == 2
+
+    # A fresh watcher (e.g. a new CLI session) reuses the persistent cache.
+    restarted = NotesWatcher(notes.parent, cache=cache, scorer=scorer)
+    assert [s.cached for s in restarted.score_all()] == [True]
+
+
+def test_watch_rescores_changed_files(tmp_path: plb.Path):
+    """Test that saving a file while watching yields a new score for that file only."""
+    (tmp_path / 'a.md').write_text('alpha')
+    (tmp_path / 'b.md').write_text('beta')
+    watcher = NotesWatcher(tmp_path, cache=ScoreCache(tmp_path / 'scores.db'), scorer=FakeScorer())
+    stop = threading.Event()
+    results = []
+
+    def _run():
+        for score in watcher.watch(debounce_ms=100, stop_event=stop):
+            results.append(score)
+
+    thread = threading.Thread(target=_run)
+    thread.start()
+    time.sleep(0.5)
+    for _ in range(3):
+        (tmp_path / 'b.md').write_text('beta gamma delta')
+    (tmp_path / 'ignored.txt').write_text('not notes')
+    deadline = time.monotonic() + 5
+    while len(results) < 3 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    stop.set()
+    thread.join(timeout=5)
+
+    assert [(s.path.name, s.result.score) for s in results] == [
+        ('a.md', 1),
+        ('b.md', 1),
+        ('b.md', 3),
+    ]
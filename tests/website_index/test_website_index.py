@@ -0,0 +1,75 @@
+import pathlib as plb
+
+import numpy as np
+import pytest
+
+from rfcrew import scraping
+from rfcrew.website_index import CachedWebsiteSearchTool, WebsiteIndex
+
+VOCABULARY = ['streams', 'offsets', 'pricing', 'quota', 'schema', 'protobuf']
+
+
+class FakeEmbedder:
+    model = 'fake/bag-of-words'
+
+    def __init__(self):
+        self.embedded: list[str] = []
+
+    def __call__(self, texts: list[str]) -> np.ndarray:
+        self.embedded.extend(texts)
+        return np.asarray(
+            [[text.lower().count(word) + 0.01 for word in VOCABULARY] for text in texts],
+            dtype=np.float32,
+        )
+
+
+PAGE = """# Write API
+
+## Streams
+
+Committed streams use offsets for exactly-once delivery of streams.
+
+## Pricing
+
+Pricing depends on the quota and the pricing tier."""
+
+
+def test_index_reembeds_only_changed_pages(tmp_path: plb.Path):
+    """Test that unchanged pages are not re-embedded and the index persists across instances."""
+    embedder = FakeEmbedder()
+    index = WebsiteIndex(tmp_path / 'index.db', embedder=embedder)
+    assert index.add('https://example.com', PAGE)
+    assert len(embedder.embedded) == 2
+    assert not index.add('https://example.com', PAGE)
+    assert len(embedder.embedded) == 2
+
+    [result] = index.search('streams offsets', limit=1)
+    assert result.text.startswith('## Streams')
+    assert len(embedder.embedded) == 3
+
+    # A new index on the same file (e.g. another run or agent) needs no embedding calls.
+    reopened = WebsiteIndex(tmp_path / 'index.db', embedder=embedder)
+    assert reopened.is_fresh('https://example.com')
+    assert reopened.search('streams offsets', limit=1)[0].text == result.text
+    assert len(embedder.embedded) == 3
+
+    assert index.add('https://example.com', PAGE.replace('tier', 'plan'))
+    assert len(embedder.embedded) == 5
+    assert len(index) == 1
+
+
+def test_tool_fetches_stale_pages_only(tmp_path: plb.Path, monkeypatch: pytest.MonkeyPatch):
+    """Test that the tool only downloads a page again once it is older than the max age."""
+    fetched = []
+
+    def _fetch_html(url: str, **kwargs) -> str:
+        fetched.append(url)
+        return '<main><h2>Pricing</h2><p>Pricing depends on the quota.</p></main>'
+
+    monkeypatch.setattr(scraping, 'fetch_html', _fetch_html)
+    index = WebsiteIndex(tmp_path / 'index.db', embedder=FakeEmbedder(), max_age=60)
+    tool = CachedWebsiteSearchTool(index=index)
+    for _ in range(2):
+        output = tool.run(search_query='quota', website='https://example.com/pricing')
+        assert 'Pricing depends on the quota.' in output
+    assert fetched == ['https://example.com/pricing']